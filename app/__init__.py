@@ -6,7 +6,7 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_caching import Cache
-from .extensions import migrate, jwt, csrf
+from .extensions import migrate, jwt, csrf, reddit_clients, refresh_scheduler, stream_ingestor, nltk_resources, model_registry
 from config import Config
 import json
 from .extensions import db
@@ -52,6 +52,11 @@ def create_app(config_class=Config):
     jwt.init_app(app)
     csrf.init_app(app)
     login_manager.init_app(app)
+    nltk_resources.init_app(app)  # Fails fast when NLTK data is missing
+    model_registry.init_app(app)  # Loads MODEL_PRELOAD now, before workers fork
+    reddit_clients.init_app(app)
+    refresh_scheduler.init_app(app)
+    stream_ingestor.init_app(app)
 
 
     login_manager.login_view = 'auth.login'
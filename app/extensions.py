@@ -3,8 +3,18 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_caching import Cache
 from flask_wtf import CSRFProtect
 from flask_migrate import Migrate
+from app.services.reddit_client import RedditClientRegistry
+from app.services.refresh_scheduler import RefreshScheduler
+from app.services.stream_ingest import StreamIngestor
+from app.services.model_registry import ModelRegistry
+from app.utils.nltk_resources import NltkResources
 
 db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
 csrf = CSRFProtect()
+reddit_clients = RedditClientRegistry()
+refresh_scheduler = RefreshScheduler()
+stream_ingestor = StreamIngestor()
+nltk_resources = NltkResources()
+model_registry = ModelRegistry()
@@ -66,7 +66,8 @@ class Audience(db.Model):
         self.name = reddit_data['name']
         self.description = reddit_data['description']
         self.subscribers = reddit_data['subscribers']
-        self.weekly_posts = reddit_data['weekly_posts']
+        # Bulk /api/info records carry no post counts; keep the last known value
+        self.weekly_posts = reddit_data.get('weekly_posts', self.weekly_posts)
         self.active_users = reddit_data['active_users']
         self.data = {
             'icon_img': reddit_data['icon_img'],
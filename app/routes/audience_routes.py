@@ -1,8 +1,8 @@
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, current_app, render_template, jsonify, request
 from flask_login import login_required, current_user
 from app.models import Audience,db
 from app.services.reddit_service import RedditService
-from app.extensions import db
+from app.extensions import db, refresh_scheduler
 from sqlalchemy import or_
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
@@ -52,75 +52,20 @@ def get_audience(id):
             )
             
         reddit_service = RedditService()
-        content = {
-            'trending_topics': [],
-            'theme_analysis': [],
-            'total_posts': 0,
-            'total_subreddits': len(audience.subreddit_list)
-        }
-        
-        # Debug counter for successful analyses
-        successful_analyses = 0
-        
-        # Analyze each subreddit
-        for subreddit in audience.subreddit_list:
-            try:
-                print(f"\nAnalyzing subreddit: {subreddit['name']}")
-                analysis = reddit_service.get_subreddit_analysis(subreddit['name'])
-                
-                if analysis:
-                    print(f"Analysis received for {subreddit['name']}")
-                    print(f"Trending topics count: {len(analysis.get('trending_topics', []))}")
-                    print(f"Themes count: {len(analysis.get('themes', []))}")
-                    
-                    # Add trending topics with subreddit context
-                    for topic in analysis['trending_topics']:
-                        topic['subreddit'] = subreddit['name']
-                        content['trending_topics'].append(topic)
-                        
-                    # Add themes with subreddit context
-                    for theme in analysis['themes']:
-                        theme['subreddit'] = subreddit['name']
-                        content['theme_analysis'].append(theme)
-                        
-                    successful_analyses += 1
-                else:
-                    print(f"No analysis data received for {subreddit['name']}")
-            except Exception as e:
-                print(f"Error analyzing subreddit {subreddit['name']}: {e}")
-                continue
+        # Fetch and analyze all subreddits concurrently, bounded by the deadline
+        content = reddit_service.audience_content(
+            [subreddit['name'] for subreddit in audience.subreddit_list]
+        )
         
         print(f"\nAnalysis Summary:")
         print(f"Total subreddits processed: {len(audience.subreddit_list)}")
-        print(f"Successful analyses: {successful_analyses}")
-        print(f"Total trending topics collected: {len(content['trending_topics'])}")
+        print(f"Successful analyses: {content['analysed']}")
         print(f"Total themes collected: {len(content['theme_analysis'])}")
-        
-        # Sort and limit trending topics by engagement score
-        if content['trending_topics']:
-            content['trending_topics'].sort(key=lambda x: x['engagement'], reverse=True)
-            content['trending_topics'] = content['trending_topics'][:20]
-        
-        # Group themes by category
-        if content['theme_analysis']:
-            from collections import defaultdict
-            theme_summary = defaultdict(lambda: {'count': 0, 'subreddits': set()})
-            for theme in content['theme_analysis']:
-                theme_summary[theme['theme']]['count'] += theme['count']
-                theme_summary[theme['theme']]['subreddits'].add(theme['subreddit'])
-            
-            # Convert theme summary to list and sort
-            content['theme_summary'] = [
-                {
-                    'theme': theme,
-                    'count': data['count'],
-                    'subreddits': list(data['subreddits'])
-                }
-                for theme, data in theme_summary.items()
-            ]
-            content['theme_summary'].sort(key=lambda x: x['count'], reverse=True)
-        else:
-            content['theme_summary'] = []
+        if content['timed_out'] or content['cancelled']:
+            current_app.logger.warning(
+                f"Audience {audience.id}: {len(content['timed_out'])} analyses timed out, "
+                f"{len(content['cancelled'])} cancelled"
+            )
         
         print("\nFinal content structure:")
         print(f"Trending topics: {len(content['trending_topics'])}")
@@ -199,7 +144,8 @@ def fetch_subreddit():
     subreddit_data = reddit_service.get_subreddit_info(subreddit_name)
     
     if not subreddit_data:
-        return jsonify({'error': 'Subreddit not found'}), 404
+        reason = reddit_service.unavailable.get(subreddit_name.strip())
+        return jsonify({'error': 'Subreddit not found', 'reason': reason}), 404
         
     return jsonify(subreddit_data)
 
@@ -233,8 +179,8 @@ def save_subreddit():
 @audience.route('/curated')
 @login_required
 def curated_audiences():
-    reddit_service = RedditService()
-    audiences = reddit_service.get_curated_audiences()
+    # Kept current by the refresh scheduler
+    audiences = refresh_scheduler.read('curated_audiences', 'curated') or []
 
     # Group by category
     categories = {}
@@ -281,8 +227,7 @@ def save_curated_audience():
 @audience.route('/trending')
 @login_required
 def trending_audiences():
-    reddit_service = RedditService()
-    trending_data = reddit_service.get_trending_audiences()
+    trending_data = refresh_scheduler.read('trending_audiences', 'trending') or []
     
     # Convert audience data to serializable format
     audiences = [{
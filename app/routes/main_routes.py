@@ -5,6 +5,7 @@ from flask_login import current_user, login_required
 from app.models import Audience, CuratedList
 from sqlalchemy import or_
 from app import db
+from app.extensions import reddit_clients, refresh_scheduler, stream_ingestor, model_registry
 from functools import wraps
 import time
 from copy import deepcopy
@@ -82,6 +83,10 @@ def trending():
         limit = int(request.args.get('limit', 10))
         
         query = Audience.query.filter_by(category='trending')
+        # The refresh scheduler keeps these rows current; on a cold start
+        # it fills them in the background
+        if not query.first():
+            refresh_scheduler.run_soon('trending')
         
         if timeframe == 'weekly':
             query = query.order_by(Audience.weekly_posts.desc())
@@ -279,75 +284,20 @@ def audience_detail(id):
             )
             
         reddit_service = RedditService()
-        content = {
-            'trending_topics': [],
-            'theme_analysis': [],
-            'total_posts': 0,
-            'total_subreddits': len(audience.subreddit_list)
-        }
-        
-        # Debug counter for successful analyses
-        successful_analyses = 0
-        
-        # Analyze each subreddit
-        for subreddit in audience.subreddit_list:
-            try:
-                print(f"\nAnalyzing subreddit: {subreddit['name']}")
-                analysis = reddit_service.get_subreddit_analysis(subreddit['name'])
-                
-                if analysis:
-                    print(f"Analysis received for {subreddit['name']}")
-                    print(f"Trending topics count: {len(analysis.get('trending_topics', []))}")
-                    print(f"Themes count: {len(analysis.get('themes', []))}")
-                    
-                    # Add trending topics with subreddit context
-                    for topic in analysis['trending_topics']:
-                        topic['subreddit'] = subreddit['name']
-                        content['trending_topics'].append(topic)
-                        
-                    # Add themes with subreddit context
-                    for theme in analysis['themes']:
-                        theme['subreddit'] = subreddit['name']
-                        content['theme_analysis'].append(theme)
-                        
-                    successful_analyses += 1
-                else:
-                    print(f"No analysis data received for {subreddit['name']}")
-            except Exception as e:
-                print(f"Error analyzing subreddit {subreddit['name']}: {e}")
-                continue
+        # Fetch and analyze all subreddits concurrently, bounded by the deadline
+        content = reddit_service.audience_content(
+            [subreddit['name'] for subreddit in audience.subreddit_list]
+        )
         
         print(f"\nAnalysis Summary:")
         print(f"Total subreddits processed: {len(audience.subreddit_list)}")
-        print(f"Successful analyses: {successful_analyses}")
-        print(f"Total trending topics collected: {len(content['trending_topics'])}")
+        print(f"Successful analyses: {content['analysed']}")
         print(f"Total themes collected: {len(content['theme_analysis'])}")
-        
-        # Sort and limit trending topics by engagement score
-        if content['trending_topics']:
-            content['trending_topics'].sort(key=lambda x: x['engagement'], reverse=True)
-            content['trending_topics'] = content['trending_topics'][:20]
-        
-        # Group themes by category
-        if content['theme_analysis']:
-            from collections import defaultdict
-            theme_summary = defaultdict(lambda: {'count': 0, 'subreddits': set()})
-            for theme in content['theme_analysis']:
-                theme_summary[theme['theme']]['count'] += theme['count']
-                theme_summary[theme['theme']]['subreddits'].add(theme['subreddit'])
-            
-            # Convert theme summary to list and sort
-            content['theme_summary'] = [
-                {
-                    'theme': theme,
-                    'count': data['count'],
-                    'subreddits': list(data['subreddits'])
-                }
-                for theme, data in theme_summary.items()
-            ]
-            content['theme_summary'].sort(key=lambda x: x['count'], reverse=True)
-        else:
-            content['theme_summary'] = []
+        if content['timed_out'] or content['cancelled']:
+            current_app.logger.warning(
+                f"Audience {audience.id}: {len(content['timed_out'])} analyses timed out, "
+                f"{len(content['cancelled'])} cancelled"
+            )
         
         print("\nFinal content structure:")
         print(f"Trending topics: {len(content['trending_topics'])}")
@@ -372,13 +322,38 @@ def get_subreddit_analysis(subreddit):
         analysis = reddit_service.get_subreddit_analysis(subreddit)
         
         if analysis is None:
-            return jsonify({'error': 'Unable to analyze subreddit'}), 404
+            if reddit_service.unavailable.get(subreddit):
+                return jsonify({'error': 'Unable to analyze subreddit'}), 404
+            # Being computed in the background; ask again shortly
+            return jsonify({'status': 'pending'}), 202
             
         return jsonify(analysis)
     except Exception as e:
         current_app.logger.error(f"Error in subreddit analysis: {e}")
         return jsonify({'error': str(e)}), 500
 
+@main.route('/api/subreddit/<subreddit>/comments')
+@login_required
+@rate_limit(limit=5, per=60)
+def get_subreddit_comments(subreddit):
+    try:
+        reddit_service = RedditService()
+        limit = min(int(request.args.get('limit', 20)), 100)
+        comments = reddit_service.top_comments(subreddit, limit=limit)
+        return jsonify({'comments': comments})
+    except Exception as e:
+        current_app.logger.error(f"Error in subreddit comments: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@main.route('/api/reddit/stats')
+@login_required
+def reddit_stats():
+    stats = reddit_clients.stats()
+    stats['refresh_scheduler'] = refresh_scheduler.stats()
+    stats['stream_ingestor'] = stream_ingestor.stats()
+    stats['models'] = model_registry.stats()
+    return jsonify(stats)
+
 @main.route('/api/subreddit/<subreddit>/search')
 @login_required
 @rate_limit(limit=10, per=60)
@@ -389,7 +364,7 @@ def search_subreddit(subreddit):
         
     try:
         reddit_service = RedditService()
-        results = reddit_service.search_posts(subreddit, query)
+        results = reddit_service.search_subreddit(subreddit, query.split())
         return jsonify({'results': results})
     except Exception as e:
         current_app.logger.error(f"Error in subreddit search: {e}")
@@ -403,7 +378,9 @@ def save_subreddit_analysis(subreddit):
         analysis = reddit_service.get_subreddit_analysis(subreddit)
         
         if analysis is None:
-            return jsonify({'error': 'Unable to analyze subreddit'}), 404
+            if reddit_service.unavailable.get(subreddit):
+                return jsonify({'error': 'Unable to analyze subreddit'}), 404
+            return jsonify({'status': 'pending'}), 202
             
         # Create new audience from analysis
         audience = Audience(
@@ -0,0 +1,70 @@
+import time
+import logging
+from concurrent.futures import wait
+
+logger = logging.getLogger(__name__)
+
+
+class CommentIngestor:
+    """Fetches bounded comment trees for posts in parallel into the post store.
+
+    Each post costs one request for its tree (cut at ``max_depth`` levels and
+    ``max_comments`` comments) plus at most ``replace_more_limit`` requests
+    expanding the largest ``more`` placeholders. Posts are fetched on the
+    shared fan-out pool, every request still paced by the rate governor, and
+    each tree is stored as soon as it arrives. A post is fetched again only
+    when its ``num_comments`` moved and ``refresh_interval`` has passed.
+    """
+
+    def __init__(self, data, store, executor, max_depth=3, max_comments=200,
+                 replace_more_limit=2, refresh_interval=900):
+        self.data = data
+        self.store = store
+        self.executor = executor
+        self.max_depth = max_depth
+        self.max_comments = max_comments
+        self.replace_more_limit = replace_more_limit
+        self.refresh_interval = refresh_interval
+
+    def needs_sync(self, post):
+        synced = self.store.get_comment_sync(post.id)
+        if synced is None:
+            return True
+        if synced.num_comments == post.num_comments:
+            return False
+        return time.time() - synced.synced_at >= self.refresh_interval
+
+    def ingest(self, posts, deadline=None):
+        """Fetch comments for ``posts`` that need it; returns ``{post_id: stored}``"""
+        pending = [post for post in posts if post.num_comments and self.needs_sync(post)]
+        futures = {self.executor.submit(self.ingest_post, post): post for post in pending}
+        done, not_done = wait(futures, timeout=deadline)
+        for future in not_done:
+            future.cancel()
+
+        stored = {}
+        for future in done:
+            post = futures[future]
+            try:
+                stored[post.id] = future.result()
+            except Exception as e:
+                logger.warning("Comment ingestion failed for %s: %s", post.id, e)
+        logger.debug("Ingested comments for %d of %d posts (%d up to date, %d past deadline)",
+                     len(stored), len(posts), len(posts) - len(pending), len(not_done))
+        return stored
+
+    def ingest_post(self, post):
+        _, comments, more = self.data.comments(post.id, depth=self.max_depth,
+                                                limit=self.max_comments)
+
+        # Expand the biggest collapsed branches first, within the limits
+        more.sort(key=lambda m: m['count'], reverse=True)
+        for placeholder in more[:self.replace_more_limit]:
+            if len(comments) >= self.max_comments:
+                break
+            expanded = self.data.more_comments(post.id, placeholder['children'])
+            comments.extend(c for c in expanded if c.depth < self.max_depth)
+
+        comments = comments[:self.max_comments]
+        self.store.upsert_comments(post.id, comments, post.num_comments)
+        return len(comments)
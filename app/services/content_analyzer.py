@@ -1,8 +1,6 @@
 import numpy as np
-from transformers import pipeline, AutoTokenizer, AutoModel
 from sklearn.cluster import KMeans
 from gensim import corpora, models
-import spacy
 import torch
 from collections import defaultdict
 from datetime import datetime, timedelta
@@ -10,16 +8,17 @@ import torch.nn.functional as F
 from textstat import textstat
 from sklearn.feature_extraction.text import TfidfVectorizer
 from langdetect import detect
-import re
+
+from .theme_matcher import ThemeDictionary, CONTENT_THEMES
+from app.utils.post_batch import PostBatch
+from app.extensions import model_registry
 
 class ContentAnalyzer:
-    def __init__(self):
-        # Load models
-        self.nlp = spacy.load('en_core_web_sm')
-        self.tokenizer = AutoTokenizer.from_pretrained('bert-base-uncased')
-        self.model = AutoModel.from_pretrained('bert-base-uncased')
-        self.sentiment_analyzer = pipeline('sentiment-analysis')
-        self.zero_shot = pipeline('zero-shot-classification')
+    def __init__(self, themes=None, registry=None, sentiment_mode=None):
+        # Models are loaded on first use and shared by the whole process
+        self.models = registry if registry is not None else model_registry
+        # None uses SENTIMENT_MODE; 'lexical' skips the transformer for bulk runs
+        self.sentiment_mode = sentiment_mode
         self.tfidf = TfidfVectorizer(max_features=1000)
         
         # Theme categories
@@ -28,16 +27,35 @@ class ContentAnalyzer:
             'Entertainment', 'Science', 'Education', 'Politics'
         ]
 
-        self.theme_patterns = {
-            'Questions': r'\?|how|what|why|when|where|who',
-            'Discussion': r'discuss|opinion|thoughts|think|debate',
-            'News': r'update|announcement|release|launch|breaking',
-            'Guide': r'guide|tutorial|help|tips|howto',
-            'Review': r'review|rating|experience|recommend',
-            'Showcase': r'project|created|built|made|completed',
-            'Problem': r'issue|bug|error|problem|help',
-            'Meta': r'subreddit|rules|meta|mod|announcement'
-        }
+        self.theme_matcher = themes if themes is not None else ThemeDictionary(CONTENT_THEMES)
+
+    @property
+    def nlp(self):
+        return self.models.get('spacy')
+
+    @property
+    def preprocessor(self):
+        return self.models.get('preprocessor')
+
+    @property
+    def tokenizer(self):
+        return self.models.get('bert')[0]
+
+    @property
+    def model(self):
+        return self.models.get('bert')[1]
+
+    @property
+    def embedder(self):
+        return self.models.get('embeddings')
+
+    @property
+    def sentiment_analyzer(self):
+        return self.models.get('sentiment')
+
+    @property
+    def sentiment(self):
+        return self.models.get('sentiment_service')
 
     def analyze_content(self, posts):
         if not posts:
@@ -63,38 +81,29 @@ class ContentAnalyzer:
         }
 
     def _preprocess_posts(self, posts):
+        batch = PostBatch.of(posts)
+        # num_comments ships with the listing; post.comments.list()
+        # would download the whole comment tree of every post
+        engagement = batch.engagement().tolist()
+        created = batch.created_utc.tolist()
+        texts = [f"{title} {text}" for title, text in zip(batch.titles, batch.selftexts)]
+        # Meaningful tokens of every post, streamed through the needed spaCy components only
+        tokens = self.preprocessor.tokens(texts)
         processed = []
-        for post in posts:
-            text = f"{post.title} {getattr(post, 'selftext', '')}"
-            doc = self.nlp(text)
-            
-            # Extract meaningful tokens
-            tokens = [token.text.lower() for token in doc 
-                     if not token.is_stop and token.is_alpha]
-            
+        for i, title in enumerate(batch.titles):
             processed.append({
-                'text': text,
-                'tokens': tokens,
-                'title': post.title,
-                'url': f"https://reddit.com{post.permalink}",
-                'engagement': post.score + len(post.comments.list()),
-                'created': datetime.fromtimestamp(post.created_utc)
+                'text': texts[i],
+                'tokens': tokens[i],
+                'title': title,
+                'url': f"https://reddit.com{batch.permalinks[i]}",
+                'engagement': engagement[i],
+                'created': datetime.fromtimestamp(created[i])
             })
         return processed
 
     def _get_embeddings(self, processed_posts):
-        embeddings = []
-        for post in processed_posts:
-            # Get BERT embeddings
-            inputs = self.tokenizer(post['text'], 
-                                 return_tensors='pt', 
-                                 truncation=True, 
-                                 max_length=512)
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-            # Use CLS token embedding
-            embeddings.append(outputs.last_hidden_state[0][0].numpy())
-        return np.array(embeddings)
+        # CLS embeddings of all posts in length-sorted, dynamically padded batches
+        return self.embedder.embed([post['text'] for post in processed_posts])
 
     def _extract_topics(self, processed_posts):
         # Prepare corpus
@@ -130,13 +139,13 @@ class ContentAnalyzer:
             'summary': ''
         })
         
+        matcher = self.theme_matcher.matcher
         for post in processed_posts:
-            # Check each theme pattern
-            for theme, pattern in self.theme_patterns.items():
-                if re.search(pattern, post['text'], re.IGNORECASE):
-                    theme_data[theme]['posts'] += 1
-                    theme_data[theme]['total_engagement'] += post['engagement']
-                    theme_data[theme]['recent_posts'].append(post['text'])
+            # Every theme of the post in one scan
+            for theme in matcher.match(post['text']):
+                theme_data[theme]['posts'] += 1
+                theme_data[theme]['total_engagement'] += post['engagement']
+                theme_data[theme]['recent_posts'].append(post['text'])
 
         # Create summaries for each theme
         for theme in theme_data:
@@ -186,9 +195,11 @@ class ContentAnalyzer:
         } for cluster_id, posts in cluster_data.items()]
 
     def _analyze_sentiment(self, processed_posts):
+        # One batched, cached pass over every post
+        results = self.sentiment.analyze([post['text'] for post in processed_posts],
+                                         mode=self.sentiment_mode)
         sentiments = []
-        for post in processed_posts:
-            result = self.sentiment_analyzer(post['text'][:512])[0]
+        for post, result in zip(processed_posts, results):
             sentiments.append({
                 'title': post['title'],
                 'label': result['label'],
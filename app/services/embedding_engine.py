@@ -0,0 +1,68 @@
+import threading
+
+import numpy as np
+import torch
+
+
+class EmbeddingEngine:
+    """Batched BERT ``[CLS]`` embeddings of many texts.
+
+    All texts are tokenized in one call without padding and ordered by
+    token count; consecutive runs of ``batch_size`` texts form the batches,
+    so each forward pass handles many posts and pads only to the longest
+    one of its own, similar-length, batch. Vectors come back in input order
+    as one contiguous float32 matrix.
+
+    ``num_threads`` sets ``torch.set_num_threads``, which applies to the
+    whole process. With an ``EmbeddingCache`` only texts not embedded
+    before are run through the model.
+    """
+
+    def __init__(self, tokenizer, model, batch_size=32, max_length=512, num_threads=None,
+                 cache=None):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.cache = cache
+        self.batch_size = batch_size
+        self.max_length = max_length
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.dim = model.config.hidden_size
+        # One forward pass at a time; torch already uses every thread it has
+        self._lock = threading.Lock()
+        self._stats = {'texts': 0, 'batches': 0, 'tokens': 0, 'padded_tokens': 0}
+
+    def embed(self, texts):
+        """``(len(texts), hidden size)`` float32 matrix of ``[CLS]`` vectors"""
+        if self.cache is not None:
+            return self.cache.embed(texts, self.compute)
+        return self.compute(texts)
+
+    def compute(self, texts):
+        """Run ``texts`` through the model, bypassing the cache"""
+        texts = list(texts)
+        vectors = np.empty((len(texts), self.dim), dtype=np.float32)
+        if not texts:
+            return vectors
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        lengths = np.fromiter(map(len, encoded['input_ids']), dtype=np.int64, count=len(texts))
+        order = np.argsort(lengths, kind='stable')
+
+        with self._lock, torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                rows = order[start:start + self.batch_size]
+                inputs = self.tokenizer.pad(
+                    {key: [values[i] for i in rows] for key, values in encoded.items()},
+                    return_tensors='pt'
+                )
+                outputs = self.model(**inputs)
+                vectors[rows] = outputs.last_hidden_state[:, 0].float().numpy()
+                self._stats['batches'] += 1
+                self._stats['padded_tokens'] += inputs['input_ids'].numel()
+        self._stats['texts'] += len(texts)
+        self._stats['tokens'] += int(lengths.sum())
+        return vectors
+
+    def stats(self):
+        return dict(self._stats, batch_size=self.batch_size, threads=torch.get_num_threads(),
+                    cache=self.cache.stats() if self.cache is not None else None)
@@ -0,0 +1,197 @@
+import gc
+import os
+import time
+import logging
+import resource
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def _load_spacy(registry):
+    import spacy
+    return spacy.load(registry.config.get('spacy_model') or 'en_core_web_sm')
+
+
+def _load_preprocessor(registry):
+    from .text_preprocessor import TextPreprocessor
+    return TextPreprocessor(
+        registry.get('spacy'),
+        batch_size=registry.config.get('spacy_batch_size') or 256,
+        n_process=registry.config.get('spacy_n_process') or 1,
+        components=registry.config.get('spacy_components') or (),
+    )
+
+
+def _load_bert(registry):
+    from transformers import AutoTokenizer, AutoModel
+    name = registry.config.get('bert_model') or 'bert-base-uncased'
+    model = AutoModel.from_pretrained(name)
+    model.eval()
+    return AutoTokenizer.from_pretrained(name), model
+
+
+def _load_embeddings(registry):
+    from .embedding_engine import EmbeddingEngine
+    from app.utils.embedding_cache import EmbeddingCache
+    tokenizer, model = registry.get('bert')
+    cache = None
+    if registry.config.get('embedding_cache_path'):
+        # Vectors of posts embedded before, by any process on this host
+        cache = EmbeddingCache(registry.config['embedding_cache_path'],
+                               model_id=registry.config.get('bert_model') or 'bert-base-uncased',
+                               dim=model.config.hidden_size)
+    return EmbeddingEngine(
+        tokenizer, model,
+        batch_size=registry.config.get('embedding_batch_size') or 32,
+        max_length=registry.config.get('embedding_max_length') or 512,
+        num_threads=registry.config.get('torch_num_threads'),
+        cache=cache,
+    )
+
+
+def _load_sentiment(registry):
+    from transformers import pipeline
+    return pipeline('sentiment-analysis', model=registry.config.get('sentiment_model'))
+
+
+def _load_sentiment_service(registry):
+    from .sentiment import SentimentService
+    from app.utils.cache_store import CacheStore
+    path = registry.config.get('sentiment_cache_path')
+    # The pipeline itself is only loaded once model-mode scoring needs it
+    return SentimentService(
+        registry,
+        store=CacheStore(path, namespace='sentiment') if path else None,
+        batch_size=registry.config.get('sentiment_batch_size') or 32,
+        max_length=registry.config.get('embedding_max_length') or 512,
+        mode=registry.config.get('sentiment_mode') or 'model',
+    )
+
+
+# Models ContentAnalyzer uses, by registry name
+LOADERS = {
+    'spacy': _load_spacy,
+    'preprocessor': _load_preprocessor,
+    'bert': _load_bert,
+    'embeddings': _load_embeddings,
+    'sentiment': _load_sentiment,
+    'sentiment_service': _load_sentiment_service,
+}
+
+
+def resident_bytes():
+    """Resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current RSS, in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ModelRegistry:
+    """Process-wide owner of the NLP models, each loaded once on first use.
+
+    ``get(name)`` loads a model the first time any thread asks for it (one
+    lock per model, so loading BERT does not block a spaCy caller) and
+    returns the same instance ever after. ``preload`` loads models up
+    front: called in the master before gunicorn forks (``--preload`` with
+    ``MODEL_PRELOAD``), the workers share the model pages copy-on-write,
+    and the loaded objects are moved out of the garbage collector's reach
+    (``gc.freeze``) so collections do not touch, and copy, those pages.
+    Load time and the growth of resident memory are recorded per model.
+    """
+
+    def __init__(self, app=None):
+        self.config = {}
+        self.loaders = dict(LOADERS)
+        self._models = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.config = {
+            'spacy_model': app.config.get('SPACY_MODEL', 'en_core_web_sm'),
+            'spacy_batch_size': app.config.get('SPACY_BATCH_SIZE', 256),
+            'spacy_n_process': app.config.get('SPACY_N_PROCESS', 1),
+            'spacy_components': [name.strip() for name in
+                                 (app.config.get('SPACY_COMPONENTS') or '').split(',')
+                                 if name.strip()],
+            'bert_model': app.config.get('BERT_MODEL', 'bert-base-uncased'),
+            'sentiment_model': app.config.get('SENTIMENT_MODEL'),
+            'embedding_batch_size': app.config.get('EMBEDDING_BATCH_SIZE', 32),
+            'embedding_max_length': app.config.get('EMBEDDING_MAX_LENGTH', 512),
+            'torch_num_threads': app.config.get('TORCH_NUM_THREADS'),
+            'embedding_cache_path': (app.config.get('EMBEDDING_CACHE_PATH')
+                                     or os.path.join(app.instance_path, 'embeddings'))
+            if app.config.get('EMBEDDING_CACHE_ENABLED', True) else None,
+            'sentiment_batch_size': app.config.get('SENTIMENT_BATCH_SIZE', 32),
+            'sentiment_mode': app.config.get('SENTIMENT_MODE', 'model'),
+            'sentiment_cache_path': app.config.get('SENTIMENT_CACHE_PATH')
+            or os.path.join(app.instance_path, 'sentiment_cache.db'),
+        }
+        app.extensions['model_registry'] = self
+        preload = [name.strip() for name in (app.config.get('MODEL_PRELOAD') or '').split(',')
+                   if name.strip()]
+        if preload and not app.config.get('TESTING'):
+            self.preload(preload)
+
+    def register(self, name, loader):
+        """Add or replace the loader of ``name``; ``loader(registry)`` returns the model"""
+        with self._lock:
+            self.loaders[name] = loader
+            self._models.pop(name, None)
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        if name not in self.loaders:
+            raise KeyError(f"No model registered as {name!r}")
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            model = self._models.get(name)
+            if model is None:
+                model = self._load(name)
+        return model
+
+    def _load(self, name):
+        rss_before, start = resident_bytes(), time.perf_counter()
+        model = self.loaders[name](self)
+        elapsed = time.perf_counter() - start
+        self._stats[name] = {
+            'load_seconds': round(elapsed, 3),
+            'rss_bytes': max(0, resident_bytes() - rss_before),
+            'pid': os.getpid(),
+        }
+        self._models[name] = model
+        logger.info("Loaded model %s in %.1f s (+%.0f MiB resident)", name, elapsed,
+                    self._stats[name]['rss_bytes'] / 2**20)
+        return model
+
+    def loaded(self, name):
+        return name in self._models
+
+    def preload(self, names=None):
+        """Load ``names`` (default: every registered model) now, before forking"""
+        for name in names or list(self.loaders):
+            self.get(name)
+        # Long-lived from here on; keep the collector off their pages
+        gc.collect()
+        gc.freeze()
+
+    def stats(self):
+        models = {}
+        for name in self.loaders:
+            stats = dict(self._stats.get(name, {}), loaded=name in self._models)
+            if hasattr(self._models.get(name), 'stats'):
+                stats['usage'] = self._models[name].stats()
+            # Loaded by the parent before the fork, so shared copy-on-write
+            stats['inherited'] = stats.get('pid', os.getpid()) != os.getpid()
+            models[name] = stats
+        return {'pid': os.getpid(), 'rss_bytes': resident_bytes(), 'models': models}
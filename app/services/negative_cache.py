@@ -0,0 +1,83 @@
+import time
+import logging
+
+from prawcore.exceptions import Forbidden, NotFound, Redirect
+
+logger = logging.getLogger(__name__)
+
+# Reason codes for subreddits Reddit will not serve
+NOT_FOUND = 'not_found'
+PRIVATE = 'private'
+BANNED = 'banned'
+QUARANTINED = 'quarantined'
+
+REASON_LABELS = {
+    NOT_FOUND: 'does not exist',
+    PRIVATE: 'is private',
+    BANNED: 'is banned',
+    QUARANTINED: 'is quarantined',
+}
+
+
+def classify_error(error):
+    """Reason code for a Reddit error about a subreddit, ``None`` if transient"""
+    if isinstance(error, Redirect):
+        # Unknown subreddits redirect to the subreddit search page
+        return NOT_FOUND
+    if not isinstance(error, (NotFound, Forbidden)):
+        return None
+    try:
+        reason = (error.response.json() or {}).get('reason')
+    except Exception:
+        reason = None
+    if reason in (PRIVATE, 'gold_only'):
+        return PRIVATE
+    if reason in (BANNED, QUARANTINED):
+        return reason
+    return NOT_FOUND if isinstance(error, NotFound) else PRIVATE
+
+
+class NegativeCache:
+    """Remembers subreddits Reddit refused to serve, with a reason code.
+
+    Entries expire after ``ttl`` seconds so a subreddit that comes back
+    (unbanned, made public) is picked up again.
+    """
+
+    def __init__(self, store, ttl=900):
+        self.store = store
+        self.ttl = ttl
+
+    def get(self, subreddit_name):
+        """Reason code while ``subreddit_name`` is known unavailable, else ``None``"""
+        cached = self.store.get(subreddit_name.lower())
+        if cached is None:
+            return None
+        reason, recorded_at = cached
+        if time.time() - recorded_at.timestamp() >= self.ttl:
+            self.store.delete(subreddit_name.lower())
+            return None
+        return reason
+
+    def add(self, subreddit_name, reason):
+        logger.debug("r/%s unavailable: %s", subreddit_name, reason)
+        self.store.set(subreddit_name.lower(), reason)
+
+    def record(self, subreddit_name, error):
+        """Remember ``subreddit_name`` if ``error`` says it is unavailable"""
+        reason = classify_error(error)
+        if reason is not None:
+            self.add(subreddit_name, reason)
+        return reason
+
+    def discard(self, subreddit_name):
+        self.store.delete(subreddit_name.lower())
+
+    def reasons(self, subreddit_names):
+        """``{name: reason}`` for the unavailable names among ``subreddit_names``"""
+        reasons = {}
+        for name in subreddit_names:
+            reason = self.get(name)
+            if reason is not None:
+                reasons[name] = reason
+        return reasons
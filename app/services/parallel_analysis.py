@@ -0,0 +1,247 @@
+import os
+import re
+import time
+import heapq
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, BrokenExecutor, TimeoutError as ResultTimeout
+
+import numpy as np
+
+from .theme_matcher import ThemeMatcher
+from .trending_sketch import TrendingSketch
+from app.utils.post_batch import TREND_BODY_CHARS
+
+logger = logging.getLogger(__name__)
+
+# Example posts kept per theme
+THEME_EXAMPLES = 3
+# Shards per worker; a few more than one evens out shards of uneven text length
+SHARDS_PER_WORKER = 2
+
+URL_PATTERN = re.compile(r'http\S+|www\S+|https\S+')
+NON_WORD_PATTERN = re.compile(r'[^\w\s]')
+
+
+def extract_phrases(text, stop_words):
+    """Single words and two-word phrases of a lower-cased title and body start"""
+    words = NON_WORD_PATTERN.sub(' ', URL_PATTERN.sub('', text)).split()
+    keep = [len(w) > 2 and not w.isnumeric() and w not in stop_words for w in words]
+    phrases = [w for w, k in zip(words, keep) if k]
+    phrases.extend(f"{words[i]} {words[i + 1]}" for i in range(len(words) - 1)
+                   if keep[i] and keep[i + 1])
+    return phrases
+
+
+def columns(batch, rows):
+    """The fields ``aggregate`` reads, for the posts of ``batch`` at ``rows``"""
+    texts, titles, ids = batch.texts, batch.titles, batch.ids
+    return (rows, [texts[i] for i in rows], [len(titles[i]) for i in rows],
+            batch.scores[rows].tolist(), batch.num_comments[rows].tolist(),
+            batch.created_utc[rows].tolist(), [ids[i] for i in rows])
+
+
+def aggregate(cols, matcher, stop_words, capacity, trends=True, themes=True,
+              bucket_seconds=None):
+    """Partial trend and theme aggregates of some posts.
+
+    Returns ``{key: part}`` with ``key`` the start of the post's creation
+    bucket (``None`` without ``bucket_seconds``). A part holds its post
+    count, a ``TrendingSketch`` and per theme ``[count, first row, top]``,
+    ``top`` being a min-heap of ``(score, created_utc, id, -row)`` for the
+    best examples. Ranking ties by creation time and id, not by position,
+    picks the same examples however the posts were sharded. Parts of
+    disjoint posts combine with ``merge_parts``.
+    """
+    rows, texts, title_lens, scores, comments, created, ids = cols
+    parts = {}
+    for i, text in enumerate(texts):
+        key = created[i] - created[i] % bucket_seconds if bucket_seconds else None
+        part = parts.get(key)
+        if part is None:
+            part = parts[key] = {'posts': 0, 'themes': {},
+                                 'sketch': TrendingSketch(capacity) if trends else None}
+        part['posts'] += 1
+        if trends:
+            phrases = extract_phrases(text[:title_lens[i] + 1 + TREND_BODY_CHARS], stop_words)
+            part['sketch'].add(phrases, scores[i], comments[i])
+        if themes:
+            for theme in matcher.match(text, lowered=True) or ('Other',):
+                entry = part['themes'].get(theme)
+                if entry is None:
+                    entry = part['themes'][theme] = [0, rows[i], []]
+                entry[0] += 1
+                _keep_example(entry[2], (scores[i], created[i], ids[i], -rows[i]))
+    return parts
+
+
+def _keep_example(top, example):
+    if len(top) < THEME_EXAMPLES:
+        heapq.heappush(top, example)
+    elif example > top[0]:
+        heapq.heapreplace(top, example)
+
+
+def merge_parts(results):
+    """Combine the ``aggregate`` results of disjoint posts"""
+    merged = {}
+    for parts in results:
+        for key, part in parts.items():
+            into = merged.get(key)
+            if into is None:
+                merged[key] = part
+                continue
+            into['posts'] += part['posts']
+            if into['sketch'] is not None:
+                into['sketch'].merge(part['sketch'])
+            for theme, (count, first, top) in part['themes'].items():
+                entry = into['themes'].get(theme)
+                if entry is None:
+                    into['themes'][theme] = [count, first, top]
+                    continue
+                entry[0] += count
+                entry[1] = min(entry[1], first)
+                for example in top:
+                    _keep_example(entry[2], example)
+    return merged
+
+
+def _pack(cols):
+    """A shard as a few flat buffers: strings and NumPy arrays pickle cheaply"""
+    rows, texts, title_lens, scores, comments, created, ids = cols
+    return (np.asarray(rows, dtype=np.int64), _join(texts), np.asarray(title_lens, dtype=np.int32),
+            np.asarray(scores, dtype=np.int64), np.asarray(comments, dtype=np.int64),
+            np.asarray(created, dtype=np.float64), _join(ids))
+
+
+def _join(strings):
+    return ''.join(strings), np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+
+
+def _split(joined):
+    joined, lengths = joined
+    ends = np.cumsum(lengths).tolist()
+    starts = [0] + ends[:-1]
+    return [joined[start:end] for start, end in zip(starts, ends)]
+
+
+def _unpack(packed):
+    rows, texts, title_lens, scores, comments, created, ids = packed
+    return (rows.tolist(), _split(texts), title_lens.tolist(), scores.tolist(),
+            comments.tolist(), created.tolist(), _split(ids))
+
+
+# Matcher and stop words of the last shard, rebuilt only when they change
+_worker_state = {'themes': None, 'matcher': None}
+
+
+def _run_shard(packed, themes, stop_words, capacity, trends, with_themes, bucket_seconds):
+    if _worker_state['themes'] != themes:
+        _worker_state['themes'] = themes
+        _worker_state['matcher'] = ThemeMatcher(themes)
+    parts = aggregate(_unpack(packed), _worker_state['matcher'], stop_words, capacity,
+                      trends, with_themes, bucket_seconds)
+    for part in parts.values():
+        if part['sketch'] is not None:
+            part['sketch'] = part['sketch'].to_dict()
+    return parts
+
+
+class ParallelAnalysis:
+    """Process pool running ``aggregate`` over shards of large post batches.
+
+    Trend and theme analysis is pure Python and holds the GIL, so a batch of
+    at least ``min_posts`` posts is split into shards analysed by
+    ``workers`` processes; their partial aggregates (phrase sketches, theme
+    counts and top examples) are merged here. Shards travel packed as joined
+    strings plus NumPy arrays. The pool is started on first use with the
+    ``forkserver`` method where available, since forking a threaded web
+    process is unsafe.
+
+    A pool that breaks (a worker killed) or misses the ``timeout`` of a
+    batch is discarded, its workers terminated, and the failure raised as
+    ``BrokenExecutor``; the next batch starts a fresh pool.
+    """
+
+    def __init__(self, workers, min_posts=5000, timeout=120):
+        self.workers = workers
+        self.min_posts = min_posts
+        self.timeout = timeout  # seconds for all shards of one batch
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.failures = 0
+
+    def wanted(self, posts):
+        return self.workers > 0 and posts >= self.min_posts
+
+    @property
+    def pool(self):
+        if self._pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pid != os.getpid():
+                    methods = multiprocessing.get_all_start_methods()
+                    context = multiprocessing.get_context(
+                        'forkserver' if 'forkserver' in methods else 'spawn'
+                    )
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=context)
+                    self._pid = os.getpid()
+        return self._pool
+
+    def aggregate(self, batch, rows, themes, stop_words, capacity, trends=True,
+                  with_themes=True, bucket_seconds=None):
+        """``merge_parts`` of ``aggregate`` over shards of the posts at ``rows``"""
+        if bucket_seconds:
+            # Shards of whole buckets, mostly: a bucket split over shards
+            # costs a sketch merge here
+            created = batch.created_utc[rows]
+            order = np.argsort(created - created % bucket_seconds, kind='stable')
+            rows = [rows[i] for i in order.tolist()]
+        shards = min(len(rows), self.workers * SHARDS_PER_WORKER)
+        bounds = np.linspace(0, len(rows), shards + 1).astype(int).tolist()
+        pool = self.pool
+        deadline = time.monotonic() + self.timeout
+        try:
+            futures = [
+                pool.submit(_run_shard, _pack(columns(batch, rows[start:end])), themes,
+                            stop_words, capacity, trends, with_themes, bucket_seconds)
+                for start, end in zip(bounds, bounds[1:]) if end > start
+            ]
+            results = [future.result(timeout=max(deadline - time.monotonic(), 0))
+                       for future in futures]
+        except ResultTimeout:
+            self._discard(pool)
+            raise BrokenExecutor(f"shards not done within {self.timeout}s")
+        except (BrokenExecutor, OSError):
+            self._discard(pool)
+            raise
+        for parts in results:
+            for part in parts.values():
+                if part['sketch'] is not None:
+                    part['sketch'] = TrendingSketch.from_dict(part['sketch'])
+        self.batches += 1
+        return merge_parts(results)
+
+    def _discard(self, pool):
+        """Drop a broken or stuck pool so the next batch starts a new one"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        # Taken before shutdown clears them; a hung worker would outlive its pool
+        processes = list((getattr(pool, '_processes', None) or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    def stats(self):
+        return {'workers': self.workers, 'min_posts': self.min_posts,
+                'batches': self.batches, 'failures': self.failures}
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,104 @@
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PostIngestor:
+    """Keeps the local post snapshot of a subreddit up to date incrementally.
+
+    The first sync seeds the store from ``hot`` and ``new``. Later syncs ask
+    the ``new`` listing only for posts newer than the stored cursor
+    (``before=<fullname>``), then refresh score and comment counts of recent
+    posts in bulk through ``/api/info`` (100 ids per request). Counts go
+    stale at the same interval even while a stream keeps the cursor fresh,
+    and are then refreshed without a listing request.
+
+    Reddit answers ``before`` with an empty listing once the anchor post is
+    deleted or removed, so an empty answer is followed by one uncursored
+    ``new`` request: posts not stored yet are added and the cursor moves to
+    the newest live post.
+    """
+
+    def __init__(self, data, store, single_flight=None, sync_interval=300,
+                 refresh_window=2 * 24 * 3600, refresh_limit=300):
+        self.data = data  # RedditData; every request here is counted
+        self.store = store
+        self.single_flight = single_flight
+        self.sync_interval = sync_interval
+        self.refresh_window = refresh_window
+        self.refresh_limit = refresh_limit
+
+    def sync(self, subreddit_name, force=False):
+        """Bring ``subreddit_name`` up to date unless it was synced recently"""
+        key = subreddit_name.lower()
+        cursor = self.store.get_cursor(key)
+        now = time.time()
+        if not force and cursor and cursor.synced_at and now - cursor.synced_at < self.sync_interval:
+            # The stream worker keeps active subreddits synced without
+            # touching counts, so those are refreshed on their own schedule
+            if cursor.newest and now - (cursor.refreshed_at or cursor.synced_at) >= self.sync_interval:
+                self._refresh_once(key)
+            return 0
+        if self.single_flight is None:
+            return self._sync(key, cursor)
+        return self.single_flight.do(('post_sync', key), self._sync, key, cursor)
+
+    def _sync(self, subreddit_name, cursor):
+        # Two requests to seed, one per incremental sync (two when it comes back empty)
+        anchor = None
+        if cursor is None or not cursor.newest:
+            fetched = self.data.posts(subreddit_name, 'hot', limit=100) + \
+                self.data.posts(subreddit_name, 'new', limit=100)
+        else:
+            fetched = self.data.posts(subreddit_name, 'new', limit=100,
+                                      params={'before': cursor.newest})
+            if not fetched:
+                # Nothing new, or the anchor is gone; the uncursored listing tells
+                listed = self.data.posts(subreddit_name, 'new', limit=100)
+                anchor = max(listed, key=lambda p: p.created_utc, default=None)
+                unknown = set(self.store.unknown(post.id for post in listed))
+                fetched = [post for post in listed if post.id in unknown]
+
+        posts = {post.id: post for post in fetched}
+        self.store.upsert(posts.values())
+
+        # Advance the cursor only when something newer than it arrived
+        newest = max(posts.values(), key=lambda p: p.created_utc, default=None)
+        if anchor is not None and anchor.fullname != cursor.newest:
+            # Onto the newest live post, even one older than a deleted anchor
+            logger.info("r/%s: cursor %s moved to %s, %d missed posts stored",
+                        subreddit_name, cursor.newest, anchor.fullname, len(posts))
+            self.store.set_cursor(subreddit_name, newest=anchor.fullname,
+                                  newest_created=anchor.created_utc, synced_at=time.time())
+        elif newest and (cursor is None or newest.created_utc > (cursor.newest_created or 0)):
+            self.store.set_cursor(subreddit_name, newest=newest.fullname,
+                                  newest_created=newest.created_utc, synced_at=time.time())
+        else:
+            self.store.set_cursor(subreddit_name, synced_at=time.time())
+
+        # A fresh seed already carries current counts
+        refreshed = self.refresh_counts(subreddit_name) if cursor and cursor.newest else 0
+        logger.debug("Synced r/%s: %d new or updated posts, %d counts refreshed",
+                     subreddit_name, len(posts), refreshed)
+        return len(posts)
+
+    def _refresh_once(self, subreddit_name):
+        if self.single_flight is None:
+            return self.refresh_counts(subreddit_name)
+        return self.single_flight.do(('post_refresh', subreddit_name),
+                                     self.refresh_counts, subreddit_name)
+
+    def refresh_counts(self, subreddit_name):
+        """Re-read score and num_comments of recent posts, 100 per request"""
+        recent = self.store.recent(
+            subreddit_name, limit=self.refresh_limit, since=time.time() - self.refresh_window
+        )
+        if not recent:
+            return 0
+
+        counts = [(post.id, post.score, post.num_comments)
+                  for post in self.data.posts_by_fullname(post.fullname for post in recent)]
+        self.store.update_counts(counts)
+        self.store.set_cursor(subreddit_name, refreshed_at=time.time())
+        return len(counts)
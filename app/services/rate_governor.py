@@ -0,0 +1,280 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+
+from prawcore import Requestor
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+_priority = ContextVar('reddit_priority', default=INTERACTIVE)
+_budget = ContextVar('reddit_call_budget', default=None)
+
+
+class BudgetExhausted(Exception):
+    """Raised when a call would exceed the active call budget"""
+
+
+class CallBudget:
+    """Counts, and optionally caps, the Reddit calls made inside ``RateGovernor.budget``.
+
+    Budgets nest: a call is charged to the innermost budget and every
+    enclosing one, so a per-analysis cap also counts against a per-cycle cap.
+    """
+
+    def __init__(self, limit=None, parent=None):
+        self.limit = limit  # None only counts
+        self.parent = parent
+        self.used = 0
+        # Fan-out threads charge the same budget concurrently
+        self._lock = threading.Lock()
+
+    @property
+    def exhausted(self):
+        if self.parent is not None and self.parent.exhausted:
+            return True
+        return self.limit is not None and self.used >= self.limit
+
+    def spend(self):
+        with self._lock:
+            if self.limit is not None and self.used >= self.limit:
+                raise BudgetExhausted(f"Reddit call budget of {self.limit} used up")
+            if self.parent is not None:
+                self.parent.spend()
+            self.used += 1
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool running each task in a copy of the submitter's context.
+
+    Priority and call budget are context variables, which worker threads
+    do not inherit; without the copy, fanned-out calls would run at
+    interactive priority and outside the caller's budget.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class RateGovernor:
+    """Token bucket for Reddit calls shared by all threads and worker processes.
+
+    The bucket state lives in a small SQLite file; ``BEGIN IMMEDIATE`` gives
+    every process on the host the same lock. Reddit's ``X-Ratelimit-*``
+    headers clamp the bucket so the local estimate never exceeds what the
+    server says is left. Background callers leave ``background_reserve`` of
+    the bucket untouched so interactive requests are served first.
+    """
+
+    def __init__(self, path, per_minute=100, burst=10, background_reserve=0.3,
+                 safety_margin=5):
+        self.path = path
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst)
+        self.background_reserve = background_reserve
+        self.safety_margin = safety_margin
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'acquired': {INTERACTIVE: 0, BACKGROUND: 0},
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'throttled_responses': 0,
+            'server_remaining': None,
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._init_db()
+
+    def _connect(self):
+        # One connection per thread, reopened after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS bucket ('
+            'id INTEGER PRIMARY KEY CHECK (id = 1), '
+            'tokens REAL NOT NULL, updated REAL NOT NULL, '
+            'remaining REAL, reset_at REAL)'
+        )
+        conn.execute(
+            'INSERT OR IGNORE INTO bucket (id, tokens, updated) VALUES (1, ?, ?)',
+            (self.capacity, time.time())
+        )
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+
+    def _refill(self, tokens, updated, remaining, reset_at, now):
+        rate = self.rate
+        if reset_at is not None and now >= reset_at:
+            # Reddit's window rolled over; forget the stale server figures
+            remaining, reset_at = None, None
+        if remaining is not None:
+            usable = max(remaining - self.safety_margin, 0)
+            # Spread what is left of the server window evenly until it resets
+            rate = min(rate, usable / max(reset_at - now, 1.0))
+        tokens = min(self.capacity, tokens + (now - updated) * rate)
+        if remaining is not None:
+            tokens = min(tokens, max(remaining - self.safety_margin, 0))
+        return tokens, rate, remaining, reset_at
+
+    def try_acquire(self, priority=None):
+        """Take one token if available; otherwise return seconds to wait"""
+        priority = priority or _priority.get()
+        floor = 1.0
+        if priority == BACKGROUND:
+            floor += self.background_reserve * self.capacity
+
+        with self._transaction() as conn:
+            tokens, updated, remaining, reset_at = conn.execute(
+                'SELECT tokens, updated, remaining, reset_at FROM bucket WHERE id = 1'
+            ).fetchone()
+            now = time.time()
+            tokens, rate, remaining, reset_at = self._refill(
+                tokens, updated, remaining, reset_at, now
+            )
+            if tokens >= floor:
+                tokens -= 1
+                if remaining is not None:
+                    remaining -= 1
+                wait = 0.0
+            elif rate <= 0:
+                wait = max((reset_at or now + 1) - now, 0.05)
+            else:
+                wait = (floor - tokens) / rate
+            conn.execute(
+                'UPDATE bucket SET tokens = ?, updated = ?, remaining = ?, reset_at = ? '
+                'WHERE id = 1',
+                (tokens, now, remaining, reset_at)
+            )
+        return wait
+
+    def acquire(self, priority=None):
+        """Block until a token is available for a Reddit call"""
+        priority = priority or _priority.get()
+        budget = _budget.get()
+        if budget is not None:
+            budget.spend()
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(priority)
+            if wait <= 0:
+                break
+            # Sleep in short slices so a freed token is picked up promptly
+            wait = min(wait, 1.0)
+            time.sleep(wait)
+            waited += wait
+
+        with self._stats_lock:
+            self._stats['acquired'][priority] = self._stats['acquired'].get(priority, 0) + 1
+            if waited:
+                self._stats['waits'] += 1
+                self._stats['wait_seconds'] += waited
+
+    def update_from_response(self, status_code, headers):
+        """Clamp the shared bucket to Reddit's own view of the rate limit"""
+        remaining = headers.get('x-ratelimit-remaining')
+        reset = headers.get('x-ratelimit-reset')
+        throttled = status_code == 429
+        if remaining is None and not throttled:
+            return
+
+        now = time.time()
+        try:
+            remaining = float(remaining) if remaining is not None else 0.0
+            reset_at = now + float(reset or headers.get('retry-after') or 60)
+        except ValueError:
+            return
+        if throttled:
+            remaining = 0.0
+
+        with self._transaction() as conn:
+            conn.execute(
+                'UPDATE bucket SET remaining = ?, reset_at = ?, '
+                'tokens = MIN(tokens, MAX(? - ?, 0)) WHERE id = 1',
+                (remaining, reset_at, remaining, self.safety_margin)
+            )
+
+        with self._stats_lock:
+            self._stats['server_remaining'] = remaining
+            if throttled:
+                self._stats['throttled_responses'] += 1
+                logger.warning("Reddit returned 429; pausing until reset in %.0fs", reset_at - now)
+
+    @contextmanager
+    def priority(self, level):
+        """Run the enclosed Reddit calls at ``level`` priority"""
+        token = _priority.set(level)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+
+    @contextmanager
+    def budget(self, limit=None):
+        """Allow at most ``limit`` Reddit calls in the enclosed block"""
+        budget = CallBudget(limit, parent=_budget.get())
+        token = _budget.set(budget)
+        try:
+            yield budget
+        finally:
+            _budget.reset(token)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats['acquired'] = dict(self._stats['acquired'])
+        conn = self._connect()
+        tokens, remaining, reset_at = conn.execute(
+            'SELECT tokens, remaining, reset_at FROM bucket WHERE id = 1'
+        ).fetchone()
+        stats.update({'tokens': tokens, 'remaining': remaining, 'reset_at': reset_at})
+        return stats
+
+
+class GovernedRequestor(Requestor):
+    """prawcore requestor that routes every Reddit API call through the governor"""
+
+    def __init__(self, *args, governor=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.governor = governor
+
+    def request(self, *args, **kwargs):
+        if self.governor is None:
+            return super().request(*args, **kwargs)
+
+        url = args[1] if len(args) > 1 else kwargs.get('url', '')
+        # Token exchanges are not counted against the API budget
+        is_token_call = 'access_token' in str(url)
+        if not is_token_call:
+            self.governor.acquire()
+        response = super().request(*args, **kwargs)
+        if not is_token_call:
+            self.governor.update_from_response(response.status_code, response.headers)
+        return response
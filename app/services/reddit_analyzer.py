@@ -1,33 +1,30 @@
 # app/reddit_analyzer.py
 from collections import Counter, defaultdict
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.tokenize import sent_tokenize
-from textblob import TextBlob
-import nltk
 import re
+import logging
+from concurrent.futures import BrokenExecutor
+
+from .theme_matcher import ThemeDictionary, REDDIT_THEMES
+from .trending_sketch import TrendingSketch
+from .parallel_analysis import aggregate, columns, extract_phrases
+from app.utils.post_batch import PostBatch
+from app.extensions import nltk_resources
+
+logger = logging.getLogger(__name__)
 
 class RedditAnalyzer:
-    def __init__(self):
-        nltk.download('punkt')
-        nltk.download('stopwords')
-        nltk.download('wordnet')
-        nltk.download('averaged_perceptron_tagger')
-        
+    def __init__(self, themes=None, sketch_capacity=1000, parallel=None):
         # Custom stop words that preserve important terms
         custom_stops = set(['http', 'https', 'www', 'com', 'reddit'])
-        self.stop_words = set(stopwords.words('english')) | custom_stops
+        # NLTK's list is read from local data once per process, never downloaded
+        self.stop_words = nltk_resources.stop_words('english') | custom_stops
         
-        # Theme indicators dictionary
-        self.theme_indicators = {
-            'Question/Help': ['help', 'question', 'how', 'what', 'why', 'where', 'who', 'when', '?'],
-            'Discussion': ['discuss', 'opinion', 'think', 'thoughts', 'perspective', 'view'],
-            'Guide/Tutorial': ['guide', 'tutorial', 'how to', 'tips', 'advice', 'steps', 'learn'],
-            'News/Update': ['news', 'update', 'announcement', 'release', 'launched'],
-            'Showcase': ['showcase', 'created', 'made', 'built', 'finished', 'completed'],
-            'Resource': ['resource', 'tool', 'library', 'framework', 'package', 'download'],
-            'Meta': ['meta', 'subreddit', 'rules', 'moderator', 'community'],
-        }
+        # Theme definitions, hot-reloaded when a user dictionary is configured
+        self.themes = themes if themes is not None else ThemeDictionary(REDDIT_THEMES)
+        # Phrases monitored per trending sketch, bounding its memory
+        self.sketch_capacity = sketch_capacity
+        # Optional ParallelAnalysis process pool for large batches
+        self.parallel = parallel
     
     def clean_text(self, text):
         """Basic text cleaning"""
@@ -41,114 +38,71 @@ class RedditAnalyzer:
         text = ' '.join(text.split())
         return text.lower()
 
+    def extract_phrases(self, text):
+        """Single words and two-word phrases of a lower-cased title and body start"""
+        return extract_phrases(text, self.stop_words)
+
+    def aggregate(self, posts, rows=None, trends=True, themes=True, bucket_seconds=None):
+        """Trend and theme aggregates of ``posts`` (or those at ``rows``).
+
+        See ``parallel_analysis.aggregate``; large batches are sharded over
+        the process pool when one is configured.
+        """
+        batch = PostBatch.of(posts)
+        rows = list(range(len(batch))) if rows is None else [int(i) for i in rows]
+        matcher = self.themes.matcher
+        if self.parallel is not None and self.parallel.wanted(len(rows)):
+            try:
+                return self.parallel.aggregate(batch, rows, matcher.themes, self.stop_words,
+                                               self.sketch_capacity, trends, themes,
+                                               bucket_seconds)
+            except (BrokenExecutor, OSError) as e:
+                self.parallel.failures += 1
+                logger.error("Parallel analysis failed, analysing in process: %s", e)
+        return aggregate(columns(batch, rows), matcher, self.stop_words, self.sketch_capacity,
+                         trends, themes, bucket_seconds)
+
+    def trending_sketch(self, posts):
+        """Bounded phrase counts with engagement for ``posts``; see TrendingSketch"""
+        part = self.aggregate(posts, themes=False).get(None)
+        return part['sketch'] if part else TrendingSketch(self.sketch_capacity)
+
     def get_trending_topics(self, posts, min_count=2):
         """Extract trending topics from posts with improved processing"""
-        word_data = defaultdict(lambda: {'count': 0, 'score': 0, 'comments': 0})
-        
-        for post in posts:
-            # Get post title and clean it
-            title = post.title.lower()
-            
-            # Get post text if available
-            body = post.selftext.lower() if hasattr(post, 'selftext') else ''
-            
-            # Combine title and first 500 characters of body
-            combined_text = f"{title} {body[:500]}"
-            
-            # Clean text
-            cleaned_text = re.sub(r'http\S+|www\S+|https\S+', '', combined_text)
-            cleaned_text = re.sub(r'[^\w\s]', ' ', cleaned_text)
-            
-            # Extract meaningful phrases (2-3 words)
-            words = cleaned_text.split()
-            phrases = []
-            
-            # Single words
-            phrases.extend([w for w in words if len(w) > 2 
-                          and not w.isnumeric() 
-                          and w not in self.stop_words])
-            
-            # Two-word phrases
-            for i in range(len(words)-1):
-                phrase = f"{words[i]} {words[i+1]}"
-                if all(len(w) > 2 and not w.isnumeric() and w not in self.stop_words 
-                       for w in phrase.split()):
-                    phrases.append(phrase)
-            
-            # Update word data with engagement metrics
-            for phrase in set(phrases):  # Use set to avoid counting duplicates
-                word_data[phrase]['count'] += 1
-                word_data[phrase]['score'] += post.score
-                word_data[phrase]['comments'] += post.num_comments
-        
-        # Convert to list of trending topics
-        trending = []
-        for phrase, data in word_data.items():
-            if data['count'] >= min_count:
-                engagement_score = (data['score'] * 0.7) + (data['comments'] * 0.3)  # Weight score higher
-                trending.append({
-                    'topic': phrase,
-                    'count': data['count'],
-                    'score': data['score'],
-                    'comments': data['comments'],
-                    'engagement': engagement_score,
-                })
-        
-        # Sort by engagement score
-        trending.sort(key=lambda x: x['engagement'], reverse=True)
-        
-        # Return top 20 trending topics
-        return trending[:20]
+        # Top 20 by engagement score (score weighted higher than comments)
+        return self.trending_sketch(posts).top(20, min_count)
+
+    def post_themes(self, text):
+        """Themes of one lower-cased post text; one scan finds all of them"""
+        return self.themes.matcher.match(text, lowered=True)
 
     def analyze_themes(self, posts):
         """Analyze common themes in posts"""
-        theme_counts = defaultdict(int)
-        theme_posts = defaultdict(list)
-        
-        for post in posts:
-            title = self.clean_text(post.title)
-            text = self.clean_text(post.selftext if hasattr(post, 'selftext') else '')
-            combined_text = f"{title} {text}"
-            
-            # Check for themes
-            matched_themes = set()
-            for theme, indicators in self.theme_indicators.items():
-                if any(indicator in combined_text for indicator in indicators):
-                    matched_themes.add(theme)
-                    
-            # If no theme matched, categorize as "Other"
-            if not matched_themes:
-                theme_counts['Other'] += 1
-                theme_posts['Other'].append({
-                    'title': post.title,
-                    'url': f"https://reddit.com{post.permalink}",
-                    'score': post.score
-                })
-            else:
-                for theme in matched_themes:
-                    theme_counts[theme] += 1
-                    theme_posts[theme].append({
-                        'title': post.title,
-                        'url': f"https://reddit.com{post.permalink}",
-                        'score': post.score
-                    })
+        batch = PostBatch.of(posts)
+        part = self.aggregate(batch, trends=False).get(None)
+        if not part:
+            return []
         
         # Calculate percentages and prepare results
-        total_posts = len(posts)
+        total_posts = part['posts']
         themes_analysis = []
         
-        for theme in theme_counts.keys():
-            count = theme_counts[theme]
+        # Themes in order of first appearance; posts without one are "Other"
+        for theme, (count, _, top) in sorted(part['themes'].items(),
+                                             key=lambda item: (item[1][1], item[0])):
             theme_data = {
                 'theme': theme,
                 'count': count,
                 'percentage': round((count / total_posts) * 100, 1),
-                'examples': sorted(theme_posts[theme], 
-                                 key=lambda x: x['score'], 
-                                 reverse=True)[:3]  # Top 3 posts per theme
+                # Top 3 posts per theme
+                'examples': [{
+                    'title': batch.titles[-row],
+                    'url': f"https://reddit.com{batch.permalinks[-row]}",
+                    'score': score
+                } for score, _, _, row in sorted(top, reverse=True)]
             }
             themes_analysis.append(theme_data)
         
         # Sort by count
         themes_analysis.sort(key=lambda x: x['count'], reverse=True)
-        return themes_analysis
\ No newline at end of file
+        return themes_analysis
@@ -0,0 +1,284 @@
+import os
+import threading
+import logging
+
+import praw
+import requests
+
+from .rate_governor import RateGovernor, GovernedRequestor, ContextThreadPoolExecutor
+from .single_flight import SingleFlight
+from .negative_cache import NegativeCache
+from .reddit_data import RedditData
+from .reddit_transport import build_adapter
+from .parallel_analysis import ParallelAnalysis
+from .theme_matcher import ThemeDictionary, REDDIT_THEMES
+from .trending_window import TrendingWindows
+from .comment_ingest import CommentIngestor
+from app.utils.post_store import PostStore
+from app.utils.cache_store import CacheStore
+
+logger = logging.getLogger(__name__)
+
+
+class RedditClientRegistry:
+    """Per-process owner of the Reddit client, its HTTP session and the analyzer.
+
+    Building ``praw.Reddit`` (new session, new OAuth token) and
+    ``RedditAnalyzer`` on every request is expensive, so the registry creates
+    them lazily once per worker process and hands out the shared instances.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.RLock()
+        self._pid = None
+        self._session = None
+        self._reddit = None
+        self._data = None
+        self._analyzer = None
+        self._windows = None
+        self._comment_ingestor = None
+        self._executor = None
+        self._parallel = None
+        self.governor = None
+        self.single_flight = SingleFlight()
+        self.post_store = None
+        self.precomputed = None
+        self.unavailable = None
+        self.themes = None
+        self.config = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.config = {
+            'client_id': app.config.get('REDDIT_CLIENT_ID'),
+            'client_secret': app.config.get('REDDIT_CLIENT_SECRET'),
+            'user_agent': app.config.get('REDDIT_USER_AGENT'),
+            'oauth_url': app.config.get('REDDIT_OAUTH_URL'),
+            'transport': app.config.get('REDDIT_TRANSPORT', 'live'),
+            'cassette_path': app.config.get('REDDIT_CASSETTE_PATH')
+            or os.path.join(app.instance_path, 'reddit_cassette.jsonl'),
+            'replay_latency': app.config.get('REDDIT_REPLAY_LATENCY', 0.0),
+            'replay_429_rate': app.config.get('REDDIT_REPLAY_429_RATE', 0.0),
+            'replay_synthesize': app.config.get('REDDIT_REPLAY_SYNTHESIZE'),
+            'replay_listing_size': app.config.get('REDDIT_REPLAY_LISTING_SIZE', 1000),
+            'reddit_url': app.config.get('REDDIT_URL'),
+            'pool_size': app.config.get('REDDIT_HTTP_POOL_SIZE', 10),
+            'fanout_workers': app.config.get('REDDIT_FANOUT_WORKERS', 8),
+            'single_flight_window': app.config.get('REDDIT_SINGLE_FLIGHT_WINDOW', 60),
+            'post_sync_interval': app.config.get('REDDIT_POST_SYNC_INTERVAL', 300),
+            'post_refresh_window': app.config.get('REDDIT_POST_REFRESH_WINDOW', 2 * 24 * 3600),
+            'analysis_max_age': app.config.get('REDDIT_ANALYSIS_MAX_AGE', 3600),
+            'analysis_call_limit': app.config.get('REDDIT_ANALYSIS_CALL_LIMIT', 10),
+            'comment_max_depth': app.config.get('REDDIT_COMMENT_MAX_DEPTH', 3),
+            'comment_limit': app.config.get('REDDIT_COMMENT_LIMIT', 200),
+            'comment_replace_more': app.config.get('REDDIT_COMMENT_REPLACE_MORE', 2),
+            'comment_refresh_interval': app.config.get('REDDIT_COMMENT_REFRESH_INTERVAL', 900),
+            'trending_sketch_capacity': app.config.get('TRENDING_SKETCH_CAPACITY', 1000),
+            'trending_bucket_seconds': app.config.get('TRENDING_BUCKET_SECONDS', 6 * 3600),
+            'trending_window': app.config.get('TRENDING_WINDOW', '7d'),
+            'trending_half_life': app.config.get('TRENDING_HALF_LIFE'),
+            'trending_window_subreddits': app.config.get('TRENDING_WINDOW_SUBREDDITS', 200),
+            'analysis_workers': app.config.get('ANALYSIS_WORKERS', 0),
+            'analysis_parallel_min_posts': app.config.get('ANALYSIS_PARALLEL_MIN_POSTS', 5000),
+            'analysis_parallel_timeout': app.config.get('ANALYSIS_PARALLEL_TIMEOUT', 120),
+        }
+        self.governor = RateGovernor(
+            app.config.get('REDDIT_RATE_STATE_PATH')
+            or os.path.join(app.instance_path, 'reddit_ratelimit.db'),
+            per_minute=app.config.get('REDDIT_RATE_LIMIT_PER_MINUTE', 100),
+            burst=app.config.get('REDDIT_RATE_BURST', 10),
+            background_reserve=app.config.get('REDDIT_RATE_BACKGROUND_RESERVE', 0.3),
+        )
+        self.post_store = PostStore(
+            app.config.get('REDDIT_POST_STORE_PATH')
+            or os.path.join(app.instance_path, 'reddit_posts.db')
+        )
+        cache_path = app.config.get('REDDIT_CACHE_PATH') \
+            or os.path.join(app.instance_path, 'reddit_cache.db')
+        # Analyses and listings computed ahead of time by the refresh scheduler
+        self.precomputed = CacheStore(cache_path, namespace='precomputed')
+        # Missing, private, banned and quarantined subreddits
+        self.unavailable = NegativeCache(
+            CacheStore(cache_path, namespace='unavailable'),
+            ttl=app.config.get('REDDIT_NEGATIVE_CACHE_TTL', 900)
+        )
+        # Built-in themes plus the hot-reloaded user dictionary, if any
+        self.themes = ThemeDictionary(
+            REDDIT_THEMES,
+            path=app.config.get('THEME_DICTIONARY_PATH'),
+            check_interval=app.config.get('THEME_RELOAD_INTERVAL', 5)
+        )
+        app.extensions['reddit_clients'] = self
+
+    def _ensure_process(self):
+        # Sockets and locks must not be shared with a forked child, so a new
+        # worker process starts from a clean registry.
+        if self._pid != os.getpid():
+            self._lock = threading.RLock()
+            self._session = None
+            self._reddit = None
+            self._data = None
+            self._analyzer = None
+            self._windows = None
+            self._comment_ingestor = None
+            self._executor = None
+            self._parallel = None
+            self.single_flight = SingleFlight()
+            self._pid = os.getpid()
+
+    def _build_session(self):
+        session = requests.Session()
+        # Live, recording or replaying transport; see reddit_transport
+        adapter = build_adapter(self.config, pool_size=self.config.get('pool_size') or 10)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _build_reddit(self):
+        replay = self.config.get('transport') == 'replay'
+        options = {
+            # Replay needs no real credentials
+            'client_id': self.config.get('client_id') or ('replay' if replay else None),
+            'client_secret': self.config.get('client_secret') or ('replay' if replay else None),
+            'user_agent': self.config.get('user_agent'),
+            'check_for_updates': False,
+            'requestor_class': GovernedRequestor,
+            'requestor_kwargs': {'session': self.session, 'governor': self.governor},
+        }
+        # Overrides let benchmarks point the client at a local fake endpoint
+        for key in ('oauth_url', 'reddit_url'):
+            if self.config.get(key):
+                options[key] = self.config[key]
+        return praw.Reddit(**options)
+
+    @property
+    def session(self):
+        self._ensure_process()
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    @property
+    def reddit(self):
+        self._ensure_process()
+        if self._reddit is None:
+            with self._lock:
+                if self._reddit is None:
+                    logger.info("Creating shared Reddit client for pid %s", self._pid)
+                    self._reddit = self._build_reddit()
+        return self._reddit
+
+    @property
+    def data(self):
+        """Data-access layer returning plain records with per-operation call counts"""
+        self._ensure_process()
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = RedditData(self.reddit, self.governor)
+        return self._data
+
+    @property
+    def analyzer(self):
+        self._ensure_process()
+        if self._analyzer is None:
+            with self._lock:
+                if self._analyzer is None:
+                    from .reddit_analyzer import RedditAnalyzer
+                    workers = self.config.get('analysis_workers') or 0
+                    if workers > 0:
+                        self._parallel = ParallelAnalysis(
+                            workers,
+                            min_posts=self.config.get('analysis_parallel_min_posts') or 5000,
+                            timeout=self.config.get('analysis_parallel_timeout') or 120
+                        )
+                    self._analyzer = RedditAnalyzer(
+                        themes=self.themes,
+                        sketch_capacity=self.config.get('trending_sketch_capacity', 1000),
+                        parallel=self._parallel
+                    )
+        return self._analyzer
+
+    @property
+    def windows(self):
+        """Incremental sliding-window trends of the subreddits analysed in this process"""
+        self._ensure_process()
+        if self._windows is None:
+            with self._lock:
+                if self._windows is None:
+                    self._windows = TrendingWindows(
+                        self.post_store, self.analyzer,
+                        bucket_seconds=self.config.get('trending_bucket_seconds') or 6 * 3600,
+                        capacity=self.config.get('trending_sketch_capacity') or 1000,
+                        max_subreddits=self.config.get('trending_window_subreddits') or 200
+                    )
+        return self._windows
+
+    @property
+    def comment_ingestor(self):
+        """Bounded, parallel comment tree ingestion into the post store"""
+        self._ensure_process()
+        if self._comment_ingestor is None:
+            with self._lock:
+                if self._comment_ingestor is None:
+                    self._comment_ingestor = CommentIngestor(
+                        self.data, self.post_store, self.executor,
+                        max_depth=self.config.get('comment_max_depth', 3),
+                        max_comments=self.config.get('comment_limit', 200),
+                        replace_more_limit=self.config.get('comment_replace_more', 2),
+                        refresh_interval=self.config.get('comment_refresh_interval', 900)
+                    )
+        return self._comment_ingestor
+
+    @property
+    def executor(self):
+        """Bounded thread pool shared by every fan-out in this process.
+
+        Tasks keep the submitter's governor priority and call budget.
+        """
+        self._ensure_process()
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ContextThreadPoolExecutor(
+                        max_workers=self.config.get('fanout_workers') or 8,
+                        thread_name_prefix='reddit-fanout'
+                    )
+        return self._executor
+
+    def stats(self):
+        """Counters for the shared Reddit machinery in this process"""
+        return {
+            'pid': os.getpid(),
+            'rate_governor': self.governor.stats() if self.governor else None,
+            'single_flight': self.single_flight.stats(),
+            'reddit_calls': self._data.stats() if self._data else {},
+            'transport': self._transport_stats(),
+            'themes': self.themes.stats() if self.themes else None,
+            'trending_windows': self._windows.stats() if self._windows else None,
+            'parallel_analysis': self._parallel.stats() if self._parallel else None,
+        }
+
+    def _transport_stats(self):
+        stats = {'mode': self.config.get('transport') or 'live'}
+        if self._session is not None:
+            adapter = self._session.get_adapter('https://')
+            stats.update(getattr(adapter, 'stats', {}))
+        return stats
+
+    def close(self):
+        """Release the pooled connections held by this process"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            if self._parallel is not None:
+                self._parallel.close()
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._reddit = None
+            self._data = None
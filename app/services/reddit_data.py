@@ -0,0 +1,161 @@
+import threading
+
+from app.utils.post_store import StoredPost, StoredComment
+
+# Reddit returns at most this many things per listing or /api/info request
+PAGE_SIZE = 100
+# prawcore retries a failed request up to twice more
+MAX_ATTEMPTS = 3
+
+
+def subreddit_record(data):
+    """Plain subreddit record from the ``data`` of a ``t5`` thing"""
+    name = data.get('display_name') or ''
+    active_users = data.get('active_user_count')
+    if active_users is None:
+        active_users = data.get('accounts_active')
+    return {
+        'name': name,
+        'title': data.get('title') or '',
+        'description': data.get('description') or '',
+        'subscribers': data.get('subscribers') or 0,
+        'active_users': active_users or 0,
+        'created_utc': data.get('created_utc'),
+        'over18': data.get('over18', False),
+        'icon_img': data.get('icon_img') or None,
+        'url': f"https://reddit.com/r/{name}",
+    }
+
+
+class RedditData:
+    """Thin data-access layer over the Reddit API returning plain records.
+
+    Nothing handed out is a lazy PRAW object, so reading a field never costs
+    a hidden round trip. Each method makes a known number of requests (noted
+    in its docstring, retries aside); every request runs inside a governor
+    budget so an unexpected extra one fails loudly, and requests are counted
+    per operation for ``/api/reddit/stats``.
+    """
+
+    def __init__(self, reddit, governor):
+        self.reddit = reddit
+        self.governor = governor
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _get(self, operation, path, params):
+        with self.governor.budget(MAX_ATTEMPTS) as budget:
+            try:
+                return self.reddit.request(method='GET', path=path, params=params)
+            finally:
+                with self._lock:
+                    stats = self._stats.setdefault(operation, {'calls': 0, 'requests': 0})
+                    stats['calls'] += 1
+                    stats['requests'] += budget.used
+
+    def _listing(self, operation, path, limit, params=None):
+        """``limit`` things from a listing: ``ceil(limit / 100)`` requests.
+
+        Pages through ``after`` (older things), or through ``before`` (newer
+        things) when ``params`` carries a ``before`` anchor.
+        """
+        things = []
+        params = dict(params or {})
+        direction = 'before' if params.get('before') else 'after'
+        while len(things) < limit:
+            listing = self._get(operation, path,
+                                dict(params, limit=min(PAGE_SIZE, limit - len(things))))['data']
+            things.extend(child['data'] for child in listing['children'])
+            anchor = listing.get(direction)
+            if not anchor or not listing['children']:
+                break
+            params[direction] = anchor
+        return things[:limit]
+
+    def subreddit(self, name):
+        """Full metadata for one subreddit: 1 request to ``about.json``"""
+        data = self._get('about', f"r/{name}/about", {})
+        return subreddit_record(data['data'])
+
+    def subreddits(self, names):
+        """Metadata for many subreddits via ``/api/info``: ``ceil(n / 100)`` requests.
+
+        Keyed by lower-cased name; names Reddit does not serve are left out.
+        """
+        records = {}
+        names = list(names)
+        for start in range(0, len(names), PAGE_SIZE):
+            chunk = names[start:start + PAGE_SIZE]
+            listing = self._get('info', 'api/info', {'sr_name': ','.join(chunk)})
+            for child in listing['data']['children']:
+                record = subreddit_record(child['data'])
+                records[record['name'].lower()] = record
+        return records
+
+    def popular_subreddits(self, limit=25):
+        """``ceil(limit / 100)`` requests"""
+        return [subreddit_record(data)
+                for data in self._listing('popular', 'subreddits/popular', limit)]
+
+    def search_subreddits(self, query, limit=25):
+        """``ceil(limit / 100)`` requests"""
+        return [subreddit_record(data)
+                for data in self._listing('search', 'subreddits/search', limit, {'q': query})]
+
+    def posts(self, name, sort='hot', limit=25, params=None):
+        """Posts of a subreddit listing as ``StoredPost``: ``ceil(limit / 100)`` requests"""
+        return [StoredPost.from_data(data, name)
+                for data in self._listing(sort, f"r/{name}/{sort}", limit, params)]
+
+    def posts_by_fullname(self, fullnames):
+        """Current state of many posts via ``/api/info``: ``ceil(n / 100)`` requests"""
+        posts = []
+        fullnames = list(fullnames)
+        for start in range(0, len(fullnames), PAGE_SIZE):
+            chunk = fullnames[start:start + PAGE_SIZE]
+            listing = self._get('info', 'api/info', {'id': ','.join(chunk)})
+            posts.extend(StoredPost.from_data(child['data']) for child in listing['data']['children'])
+        return posts
+
+    def comments(self, post_id, depth=3, limit=200, sort='top'):
+        """One post's comment tree, cut at ``depth`` and ``limit``: 1 request.
+
+        Returns ``(post, comments, more)``; ``more`` lists the ``more``
+        placeholders (``{'parent_id', 'count', 'children'}``) left in the tree.
+        """
+        listings = self._get('comments', f"comments/{post_id}",
+                             {'depth': depth, 'limit': limit, 'sort': sort})
+        post = StoredPost.from_data(listings[0]['data']['children'][0]['data'])
+        comments, more = [], []
+        stack = [(child, 0) for child in reversed(listings[1]['data']['children'])]
+        while stack:
+            thing, level = stack.pop()
+            data = thing['data']
+            if thing['kind'] == 'more':
+                if data.get('children'):
+                    more.append({'parent_id': data.get('parent_id'),
+                                 'count': data.get('count') or 0,
+                                 'children': data['children']})
+                continue
+            if thing['kind'] != 't1' or level >= depth or len(comments) >= limit:
+                continue
+            comments.append(StoredComment.from_data(data, depth=level))
+            replies = data.get('replies')
+            if replies:
+                stack.extend((child, level + 1) for child in reversed(replies['data']['children']))
+        return post, comments, more
+
+    def more_comments(self, post_id, children, sort='top'):
+        """Expand up to 100 ``more`` ids of one post: 1 request"""
+        response = self._get('morechildren', 'api/morechildren', {
+            'api_type': 'json',
+            'link_id': f"t3_{post_id}",
+            'children': ','.join(children[:PAGE_SIZE]),
+            'sort': sort,
+        })
+        things = response['json']['data']['things']
+        return [StoredComment.from_data(thing['data']) for thing in things if thing['kind'] == 't1']
+
+    def stats(self):
+        with self._lock:
+            return {operation: dict(counts) for operation, counts in self._stats.items()}
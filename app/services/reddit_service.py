@@ -2,16 +2,16 @@ import praw
 import re
 from flask import current_app
 from collections import Counter
-from datetime import datetime
+from datetime import datetime, timedelta
 from textblob import TextBlob
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
 import time
 import logging
+import numpy as np
+from copy import deepcopy
+from concurrent.futures import wait
 from prawcore.exceptions import RequestException, ResponseException
 import urllib3
-from prawcore import NotFound
+from prawcore import NotFound, Forbidden, Redirect
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -19,89 +19,292 @@ praw_logger = logging.getLogger('prawcore')
 praw_logger.setLevel(logging.DEBUG)
 urllib3_logger = logging.getLogger('urllib3')
 urllib3_logger.setLevel(logging.DEBUG)
+logger = logging.getLogger(__name__)
 
 from app.models import Audience
-from .reddit_analyzer import RedditAnalyzer
-
-# Download necessary NLTK data
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('wordnet')
-nltk.download('averaged_perceptron_tagger')
+from app.extensions import reddit_clients, refresh_scheduler
+from .post_ingest import PostIngestor
+from .negative_cache import NOT_FOUND, REASON_LABELS
+from .trending_sketch import TrendingSketch
+from .trending_window import WINDOWS
+from app.utils.post_batch import PostBatch
 
 
 class RedditService:
-    def __init__(self):
-        self.reddit = praw.Reddit(
-            client_id=current_app.config['REDDIT_CLIENT_ID'],
-            client_secret=current_app.config['REDDIT_CLIENT_SECRET'],
-            user_agent=current_app.config['REDDIT_USER_AGENT']
+    def __init__(self, clients=None):
+        # Client, HTTP session and analyzer are shared for the worker's lifetime
+        clients = clients or reddit_clients
+        self.reddit = clients.reddit
+        # Plain records from one request per object; no lazy PRAW attributes
+        self.data = clients.data
+        self.analyzer = clients.analyzer
+        self.clients = clients
+        self.executor = clients.executor
+        self.governor = clients.governor  # Every Reddit call is paced by the shared rate governor
+        self.single_flight = clients.single_flight
+        self.single_flight_window = clients.config.get('single_flight_window') or 60
+        self.precomputed = clients.precomputed
+        self.analysis_max_age = timedelta(seconds=clients.config.get('analysis_max_age') or 3600)
+        self.unavailable = clients.unavailable  # Subreddits Reddit recently refused to serve
+        # Analyses read from the local post snapshot, synced incrementally
+        self.post_store = clients.post_store
+        # Incremental 24h/7d/30d trends and themes over that snapshot
+        self.windows = clients.windows
+        self.trending_window = clients.config.get('trending_window') or '7d'
+        self.trending_half_life = clients.config.get('trending_half_life')
+        self.analysis_call_limit = clients.config.get('analysis_call_limit') or 10
+        self.ingestor = PostIngestor(
+            self.data, self.post_store,
+            single_flight=self.single_flight,
+            sync_interval=clients.config.get('post_sync_interval', 300),
+            refresh_window=clients.config.get('post_refresh_window', 2 * 24 * 3600)
         )
-        self.analyzer = RedditAnalyzer()
-        self.min_request_delay = 2  # Minimum delay between requests in seconds
-        
-        # Theme indicators dictionary
-        self.theme_indicators = {
-            'Question/Help': ['help', 'question', 'how', 'what', 'why', 'where', 'who', 'when', '?'],
-            'Discussion': ['discuss', 'opinion', 'think', 'thoughts', 'perspective', 'view'],
-            'Guide/Tutorial': ['guide', 'tutorial', 'how to', 'tips', 'advice', 'steps', 'learn'],
-            'News/Update': ['news', 'update', 'announcement', 'release', 'launched'],
-            'Showcase': ['showcase', 'created', 'made', 'built', 'finished', 'completed'],
-            'Resource': ['resource', 'tool', 'library', 'framework', 'package', 'download'],
-            'Meta': ['meta', 'subreddit', 'rules', 'moderator', 'community'],
-        }
 
     
     def get_subreddit_analysis(self, subreddit_name):
+        """Stored analysis of ``subreddit_name``, however old; no Reddit calls.
+
+        A missing or stale analysis is recomputed in the background, so a
+        cold subreddit returns ``None`` (pending) until that is done.
+        """
+        cached = self.precomputed.get(f"analysis:{subreddit_name.lower()}")
+        if cached is None or datetime.now() - cached[1] >= self.analysis_max_age:
+            refresh_scheduler.refresh_analysis_soon(subreddit_name)
+        return cached[0] if cached else None
+
+    def refresh_subreddit_analysis(self, subreddit_name):
+        # Concurrent requests for the same listing share one fetch and analysis
+        time_bucket = int(time.time() // self.single_flight_window)
+        key = ('analysis', subreddit_name.lower(), 'hot', 50, time_bucket)
+        result = self.single_flight.do(key, self._analyze_and_store, subreddit_name)
+        # Callers annotate the result, so each gets its own copy
+        return deepcopy(result)
+
+    def _analyze_and_store(self, subreddit_name):
+        result = self._analyze_subreddit(subreddit_name)
+        if result is not None:
+            self.precomputed.set(f"analysis:{subreddit_name.lower()}", result)
+        return result
+
+    def _analyze_subreddit(self, subreddit_name):
+        if self.unavailable.get(subreddit_name):
+            return None
         try:
             print(f"\nStarting analysis for r/{subreddit_name}")
-            subreddit = self.reddit.subreddit(subreddit_name)
-            
-            print("Fetching posts...")
-            posts = list(subreddit.hot(limit=50))  # Get top 50 posts
-            print(f"Fetched {len(posts)} posts")
-            
-            # Run analysis
-            print("Analyzing trending topics...")
-            trending_topics = self.analyzer.get_trending_topics(posts)
-            print(f"Found {len(trending_topics)} trending topics")
+            # One about.json request, then at most a seed or an incremental
+            # sync; the budget makes the round trips per analysis explicit
+            with self.governor.budget(self.analysis_call_limit) as calls:
+                subreddit = self.data.subreddit(subreddit_name)
+
+                print("Fetching posts...")
+                self.ingestor.sync(subreddit_name)
+            print(f"Synced posts with {calls.used} Reddit calls")
             
-            print("Analyzing themes...")
-            themes = self.analyzer.analyze_themes(posts)
-            print(f"Found {len(themes)} themes")
-            
-            analysis_result = {
-                'metadata': {
-                    'name': subreddit.display_name,
-                    'subscribers': subreddit.subscribers,
-                    'description': subreddit.description,
-                    'active_users': subreddit.active_user_count
-                },
-                'trending_topics': trending_topics,
-                'themes': themes,
-            }
+            analysis_result = self._analysis_from_store(subreddit_name, {
+                'name': subreddit['name'],
+                'subscribers': subreddit['subscribers'],
+                'description': subreddit['description'],
+                'active_users': subreddit['active_users']
+            })
             
             print(f"Analysis complete for r/{subreddit_name}")
             return analysis_result
             
         except Exception as e:
-            print(f"Error analyzing subreddit r/{subreddit_name}: {e}")
+            reason = self.unavailable.record(subreddit_name, e)
+            if reason:
+                print(f"r/{subreddit_name} {REASON_LABELS[reason]}, skipping")
+            else:
+                print(f"Error analyzing subreddit r/{subreddit_name}: {e}")
             return None
-        
-    def search_subreddit(reddit, subreddit_name, keywords, sort='new', limit=25):
+
+    def _analysis_from_store(self, subreddit_name, metadata):
+        # Only posts stored or refreshed since the last analysis are read
+        window = self.windows.update(subreddit_name)
+        with window.lock:
+            print(f"Analyzing {len(window)} stored posts...")
+            # Quiet subreddits fall back to the longest window
+            headline = self.trending_window if window.post_count(self.trending_window) else '30d'
+            sketch = window.sketch(headline, half_life=self.trending_half_life)
+            windows = {
+                name: {
+                    'posts': window.post_count(name),
+                    'trending_topics': window.trending(name, half_life=self.trending_half_life),
+                    'themes': window.themes(name),
+                }
+                for name in WINDOWS
+            }
+        # Kept for audience-level trends, see audience_trending_topics
+        self.precomputed.set(f"trending:{subreddit_name.lower()}", sketch.to_dict())
+        trending_topics = sketch.top(20)
+        themes = windows[headline]['themes']
+        print(f"Found {len(trending_topics)} trending topics and {len(themes)} themes")
+        return {
+            'metadata': metadata,
+            'trending_topics': trending_topics,
+            'themes': themes,
+            'windows': windows,
+        }
+
+    def reanalyze_from_store(self, subreddit_name, metadata=None):
+        """Recompute a subreddit's stored analysis from the local snapshot.
+
+        Makes no Reddit calls: metadata comes from ``metadata`` or the previous
+        analysis. Returns ``None`` when neither is available.
+        """
+        key = f"analysis:{subreddit_name.lower()}"
+        if metadata is None:
+            cached = self.precomputed.get(key)
+            if cached is None:
+                return None
+            metadata = cached[0]['metadata']
+        result = self._analysis_from_store(subreddit_name, metadata)
+        self.precomputed.set(key, result)
+        return result
+
+    def audience_trending_topics(self, subreddit_names, limit=20):
+        """Trending topics across several subreddits from their stored sketches.
+
+        The per-subreddit sketches saved with each analysis are merged, so
+        phrases are counted over all posts rather than by comparing each
+        subreddit's own top list. Subreddits analysed before sketches existed
+        get one from their trend window over the local post store. No Reddit
+        calls.
+        """
+        sketches = {}
+        for name in subreddit_names:
+            stored = self.precomputed.get(f"trending:{name.lower()}")
+            if stored is not None:
+                sketches[name] = TrendingSketch.from_dict(stored[0])
+            else:
+                window = self.windows.update(name)
+                if len(window):
+                    with window.lock:
+                        sketches[name] = window.sketch(self.trending_window,
+                                                       half_life=self.trending_half_life)
+        if not sketches:
+            return []
+
+        merged = TrendingSketch.merged(sketches.values(), self.analyzer.sketch_capacity)
+        topics = merged.top(limit)
+        for topic in topics:
+            # Credit the subreddits mentioning it, most mentions first
+            counts = [(sketch.get(topic['topic']), name) for name, sketch in sketches.items()]
+            ranked = sorted(((c[0], name) for c, name in counts if c), reverse=True)
+            topic['subreddits'] = [name for _, name in ranked]
+            topic['subreddit'] = topic['subreddits'][0] if ranked else None
+        return topics
+
+    def audience_content(self, subreddit_names):
+        """Everything an audience page shows for ``subreddit_names``.
+
+        Reads the subreddits' stored analyses within the deadline, then merges
+        their trending topics and themes into one view of the audience.
+        Subreddits whose analysis is still being computed are listed as
+        ``pending``.
+        """
+        results, timed_out, cancelled = self.analyze_subreddits(subreddit_names)
+        content = {
+            'theme_analysis': [],
+            'total_posts': 0,
+            'total_subreddits': len(subreddit_names),
+            'timed_out': timed_out,
+            'cancelled': cancelled,
+            'unavailable': self.unavailable_subreddits(subreddit_names),
+            'pending': [name for name, analysis in results.items() if analysis is None],
+        }
+
+        theme_summary = {}
+        for name in subreddit_names:
+            analysis = results.get(name)
+            if not analysis:
+                continue
+            # Add themes with subreddit context
+            for theme in analysis['themes']:
+                theme['subreddit'] = name
+                content['theme_analysis'].append(theme)
+                summary = theme_summary.setdefault(theme['theme'], {'count': 0, 'subreddits': set()})
+                summary['count'] += theme['count']
+                summary['subreddits'].add(name)
+
+        # Trending topics over all posts of the audience, from the merged
+        # per-subreddit sketches
+        content['trending_topics'] = self.audience_trending_topics(
+            [name for name, analysis in results.items() if analysis]
+        )
+        content['theme_summary'] = sorted(
+            ({'theme': theme, 'count': data['count'], 'subreddits': list(data['subreddits'])}
+             for theme, data in theme_summary.items()),
+            key=lambda x: x['count'], reverse=True
+        )
+        content['analysed'] = sum(1 for analysis in results.values() if analysis)
+        return content
+
+    def analyze_subreddits(self, subreddit_names, deadline=None):
+        """Stored analyses of several subreddits, read concurrently on the shared fan-out pool.
+
+        Returns ``(results, timed_out, cancelled)``: ``results`` maps every
+        subreddit read within ``deadline`` seconds to its analysis (``None``
+        while pending or on error; see ``get_subreddit_analysis``).
+        ``timed_out`` lists the reads still running at the deadline. ``cancelled`` lists the ones
+        that had not started, which are dropped so they do not hold the shared
+        pool. Subreddits in the negative cache are skipped without any Reddit
+        call; see ``unavailable_subreddits``.
+        """
+        if deadline is None:
+            deadline = current_app.config.get('AUDIENCE_ANALYSIS_DEADLINE', 20)
+        app = current_app._get_current_object()
+
+        def run(name):
+            with app.app_context():
+                return self.get_subreddit_analysis(name)
+
+        futures = {}
+        for name in dict.fromkeys(subreddit_names):
+            if self.unavailable.get(name):
+                continue
+            futures[self.executor.submit(run, name)] = name
+
+        done, pending = wait(futures, timeout=deadline)
+        # Only queued futures can be cancelled; running ones finish and store
+        cancelled = [futures[future] for future in pending if future.cancel()]
+
+        results = {}
+        for future in done:
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                logger.error("Error analyzing subreddit r/%s: %s", futures[future], e)
+                results[futures[future]] = None
+
+        timed_out = [futures[future] for future in pending if not future.cancelled()]
+        if pending:
+            logger.warning("Analysis deadline of %ss hit, still running: %s, cancelled: %s",
+                           deadline, timed_out, cancelled)
+        return results, timed_out, cancelled
+
+    def unavailable_subreddits(self, subreddit_names):
+        """Names among ``subreddit_names`` known to be missing, private, banned or quarantined"""
+        return [
+            {'name': name, 'reason': reason, 'label': REASON_LABELS[reason]}
+            for name, reason in self.unavailable.reasons(dict.fromkeys(subreddit_names)).items()
+        ]
+
+    def search_subreddit(self, subreddit_name, keywords, sort='new', limit=25):
+        if self.unavailable.get(subreddit_name):
+            return []
         try:
-            subreddit = reddit.subreddit(subreddit_name)
-            search_query = ' OR '.join(keywords)
+            self.ingestor.sync(subreddit_name)
             
-            # Get posts based on sorting option
+            # Get posts from the local snapshot based on sorting option
             if sort == 'new':
-                posts = subreddit.new(limit=limit)
+                posts = self.post_store.recent(subreddit_name, limit=limit)
             elif sort == 'hot':
-                posts = subreddit.hot(limit=limit)
+                posts = self.post_store.hot(subreddit_name, limit=limit)
             elif sort == 'top':
-                posts = subreddit.top(limit=limit)
+                posts = self.post_store.top(subreddit_name, limit=limit)
             else:
-                posts = subreddit.new(limit=limit)
+                posts = self.post_store.recent(subreddit_name, limit=limit)
                 
             results = []
             for post in posts:
@@ -115,39 +318,96 @@ class RedditService:
                         'score': post.score,
                         'num_comments': post.num_comments,
                         'created_utc': post.created_utc,
-                        'author': str(post.author),
+                        'author': post.author,
                         'is_self': post.is_self,
-                        'thumbnail': post.thumbnail if hasattr(post, 'thumbnail') else None
+                        'thumbnail': post.thumbnail
                     })
 
             return results
-        except NotFound:
+        except (NotFound, Forbidden, Redirect) as e:
+            self.unavailable.record(subreddit_name, e)
             return []
         except Exception as e:
             print(f"Error searching subreddit: {str(e)}")
             return []
 
+    def top_comments(self, subreddit_name, posts=25, limit=20, deadline=None):
+        """Highest scored comments on the most discussed hot posts of a subreddit.
+
+        Only those ``posts`` get their comment trees ingested (bounded and in
+        parallel); trees already stored and unchanged cost no Reddit call.
+        """
+        if self.unavailable.get(subreddit_name):
+            return []
+        if deadline is None:
+            deadline = current_app.config.get('AUDIENCE_ANALYSIS_DEADLINE', 20)
+        try:
+            self.ingestor.sync(subreddit_name)
+            hot = self.post_store.hot(subreddit_name, limit=100)
+            discussed = sorted(hot, key=lambda p: p.num_comments, reverse=True)[:posts]
+            self.clients.comment_ingestor.ingest(discussed, deadline=deadline)
+
+            titles = {post.id: post.title for post in discussed}
+            comments = sorted(
+                (comment for post in discussed for comment in self.post_store.comments(post.id, limit=5)),
+                key=lambda c: c.score, reverse=True
+            )[:limit]
+            return [dict(comment._asdict(), post_title=titles[comment.post_id]) for comment in comments]
+        except (NotFound, Forbidden, Redirect) as e:
+            self.unavailable.record(subreddit_name, e)
+            return []
+        except Exception as e:
+            logger.error("Error fetching comments of r/%s: %s", subreddit_name, e)
+            return []
+
     def get_subreddit_info(self, name):
         if not name or not isinstance(name, str):
             current_app.logger.error("Invalid subreddit name.")
             return None
+        if self.unavailable.get(name.strip()):
+            return None
 
         try:
-            subreddit = self.reddit.subreddit(name.strip())
+            subreddit = self.data.subreddit(name.strip())
             return {
-                'name': subreddit.display_name,
-                'title': getattr(subreddit, 'title', ''),
-                'description': getattr(subreddit, 'description', ''),
-                'subscribers': getattr(subreddit, 'subscribers', 0)
+                'name': subreddit['name'],
+                'title': subreddit['title'],
+                'description': subreddit['description'],
+                'subscribers': subreddit['subscribers']
             }
         except Exception as e:
-            current_app.logger.error(f"Error fetching subreddit info: {str(e)}")
+            if not self.unavailable.record(name.strip(), e):
+                current_app.logger.error(f"Error fetching subreddit info: {str(e)}")
             return None
 
-    def get_trending_subreddits(self):
+    def get_subreddits_info(self, names):
+        """Metadata for many subreddits through /api/info, 100 names per request.
+
+        Returns a dict keyed by lower-cased subreddit name; names Reddit does
+        not serve are left out and remembered in the negative cache.
+        """
+        names = [name.strip() for name in dict.fromkeys(names)
+                 if name and isinstance(name, str)]
+        records = {}
+        if not names:
+            return records
+
         try:
-            trending = self.reddit.trending_subreddits()
-            return [self.get_subreddit_info(sr) for sr in trending]
+            records = self.data.subreddits(names)
+        except Exception as e:
+            current_app.logger.error(f"Error fetching subreddit metadata in bulk: {str(e)}")
+            return records
+
+        # /api/info silently leaves out names it cannot serve
+        for name in names:
+            if name.lower() not in records:
+                self.unavailable.add(name, NOT_FOUND)
+        return records
+
+    def get_trending_subreddits(self, limit=100):
+        try:
+            # The popular listing already carries each subreddit's metadata
+            return self.data.popular_subreddits(limit=limit)
         except Exception as e:
             current_app.logger.error(f"Error fetching trending subreddits: {str(e)}")
             return []
@@ -159,14 +419,14 @@ class RedditService:
 
         try:
             results = []
-            for subreddit in self.reddit.subreddits.search(interest, limit=15):
+            for subreddit in self.data.search_subreddits(interest, limit=15):
                 try:
-                    if subreddit and subreddit.subscribers > 10000:
+                    if subreddit['subscribers'] > 10000:
                         results.append({
-                            'name': subreddit.display_name,
-                            'title': subreddit.title,
-                            'description': getattr(subreddit, 'description', ''),
-                            'subscribers': subreddit.subscribers,
+                            'name': subreddit['name'],
+                            'title': subreddit['title'],
+                            'description': subreddit['description'],
+                            'subscribers': subreddit['subscribers'],
                             'category': interest
                         })
                 except Exception as e:
@@ -184,8 +444,8 @@ class RedditService:
             return None
 
         try:
-            subreddit = self.reddit.subreddit(subreddit_name)
-            posts = list(subreddit.hot(limit=100))
+            subreddit = self.data.subreddit(subreddit_name)
+            posts = self.data.posts(subreddit_name, 'hot', limit=100)
             current_app.logger.debug(f"Fetched {len(posts)} posts from subreddit '{subreddit_name}'.")
 
             analysis = self.analyzer.analyze_content(posts)
@@ -193,8 +453,8 @@ class RedditService:
 
             return {
                 'stats': {
-                    'subscribers': getattr(subreddit, 'subscribers', 0),
-                    'active_users': getattr(subreddit, 'active_user_count', 0)
+                    'subscribers': subreddit['subscribers'],
+                    'active_users': subreddit['active_users']
                 },
                 'trending_topics': analysis.get('trending_topics', 'No trending topics available'),
                 'themes': analysis.get('themes', 'No hot discussions available'),
@@ -210,11 +470,13 @@ class RedditService:
         categories['top_content'] = []
 
         for post in posts:
-            if post.score > 100 or len(list(post.comments)) > 50:
+            # num_comments comes with the listing; post.comments would pull
+            # the whole comment forest
+            if post.score > 100 or post.num_comments > 50:
                 categories['top_content'].append({
                     'title': post.title,
                     'score': post.score,
-                    'comments': len(list(post.comments)),
+                    'comments': post.num_comments,
                     'url': f"https://reddit.com{post.permalink}"
                 })
 
@@ -224,7 +486,7 @@ class RedditService:
                     categories[category].append({
                         'title': post.title,
                         'score': post.score,
-                        'comments': len(list(post.comments)),
+                        'comments': post.num_comments,
                         'sentiment': TextBlob(text).sentiment.polarity
                     })
 
@@ -235,11 +497,11 @@ class RedditService:
             if not interest:
                 return None
                 
-            subreddits = list(self.reddit.subreddits.search(interest, limit=5))
+            subreddits = self.data.search_subreddits(interest, limit=5)
             trending_data = []
             
             for subreddit in subreddits:
-                posts = self.get_subreddit_posts(subreddit.display_name)
+                posts = self.get_subreddit_posts(subreddit['name'])
                 if posts and posts.get('data'):
                     trending_data.extend(posts['data']['trending_topics'])
             
@@ -259,25 +521,29 @@ class RedditService:
         }
         
         try:
+            # One /api/info round trip covers every curated subreddit
+            metadata = self.get_subreddits_info(
+                [name for subreddits in categories.values() for name in subreddits]
+            )
+
             curated = []
             for category, subreddits in categories.items():
                 category_data = []
                 for subreddit_name in subreddits:
-                    try:
-                        subreddit = self.reddit.subreddit(subreddit_name)
-                        category_data.append({
-                            'name': subreddit.display_name,
-                            'subreddit': subreddit.display_name.lower(),
-                            'description': subreddit.description,
-                            'subscribers': subreddit.subscribers,
-                            'active_users': subreddit.active_user_count,
-                            'category': category,
-                            'theme': category.lower(),
-                            'topic': subreddit_name
-                        })
-                    except Exception as e:
-                        print(f"Error fetching subreddit {subreddit_name}: {e}")
+                    record = metadata.get(subreddit_name.lower())
+                    if not record:
+                        print(f"Error fetching subreddit {subreddit_name}: not found")
                         continue
+                    category_data.append({
+                        'name': record['name'],
+                        'subreddit': record['name'].lower(),
+                        'description': record['description'],
+                        'subscribers': record['subscribers'],
+                        'active_users': record['active_users'],
+                        'category': category,
+                        'theme': category.lower(),
+                        'topic': subreddit_name
+                    })
                 
                 if category_data:
                     curated.extend(category_data)
@@ -287,24 +553,26 @@ class RedditService:
             print(f"Error getting curated audiences: {e}")
             return []
 
-    def get_trending_audiences(self):
+    def get_trending_audiences(self, subreddits=None):
         try:
             trending = []
-            subreddits = self.reddit.subreddits.popular(limit=20)
+            # Records of an already fetched popular listing, if given
+            if subreddits is None:
+                subreddits = self.data.popular_subreddits(limit=20)
             
             for subreddit in subreddits:
                 # Calculate growth rate safely
                 growth_rate = 0
-                if subreddit.subscribers and subreddit.subscribers > 0:
-                    active_ratio = (subreddit.active_user_count or 0) / subreddit.subscribers
+                if subreddit['subscribers'] > 0:
+                    active_ratio = subreddit['active_users'] / subreddit['subscribers']
                     growth_rate = round(active_ratio * 100, 1)
                 
                 trending.append({
-                    'name': subreddit.display_name,
-                    'subreddit': subreddit.display_name,
-                    'description': subreddit.description,
-                    'subscribers': subreddit.subscribers or 0,
-                    'active_users': subreddit.active_user_count or 0,
+                    'name': subreddit['name'],
+                    'subreddit': subreddit['name'],
+                    'description': subreddit['description'],
+                    'subscribers': subreddit['subscribers'],
+                    'active_users': subreddit['active_users'],
                     'growth_rate': growth_rate,
                     'theme': None,
                     'topic': None
@@ -322,29 +590,13 @@ class RedditService:
             if not subreddit_name:
                 return None
                 
-            subreddit = self.reddit.subreddit(str(subreddit_name).strip())
-            print(f"Got subreddit: {subreddit.display_name}")  # Debug
+            subreddit_name = str(subreddit_name).strip()
             
-            posts = []
-            for post in subreddit.hot(limit=limit):
-                try:
-                    if not hasattr(post, 'title') or not post.title:
-                        continue
-                        
-                    posts.append({
-                        'topic': str(post.title),
-                        'score': int(getattr(post, 'score', 0)),
-                        'comments': int(getattr(post, 'num_comments', 0)),
-                        'url': str(getattr(post, 'url', '')),
-                        'created_utc': int(getattr(post, 'created_utc', 0))
-                    })
-                    print(f"Added post: {post.title[:50]}...")  # Debug
-                    
-                except Exception as e:
-                    print(f"Error processing post: {e}")  # Debug
-                    continue
-                    
-            if not posts:
+            # Hot posts of the local snapshot, synced incrementally, as one
+            # columnar batch shared by every step below
+            self.ingestor.sync(subreddit_name)
+            fetched = self.post_store.hot(subreddit_name, limit=limit, batch=True)
+            if not len(fetched):
                 print("No posts found")  # Debug
                 return {
                     'trending_topics': [],
@@ -352,52 +604,54 @@ class RedditService:
                     'total_posts': 0
                 }
             
-            # Sort by score
-            posts.sort(key=lambda x: x['score'], reverse=True)
-            
             return {
-                'trending_topics': posts[:10],  # Top 10 posts
-                'theme_analysis': self.analyzer.analyze_themes(posts) if posts else [],
-                'total_posts': len(posts)
+                'trending_topics': self._top_posts(fetched, 10),  # Top 10 posts by score
+                'theme_analysis': self.analyzer.analyze_themes(fetched),
+                'total_posts': len(fetched)
             }
             
         except Exception as e:
             print(f"Error in get_trending_content: {e}")  # Debug
             return None
 
+    def _top_posts(self, batch, limit=None, title_chars=None):
+        """Post summaries of a ``PostBatch``, highest score first"""
+        order = np.argsort(-batch.scores, kind='stable')[:limit]
+        return [{
+            'topic': batch.titles[i][:title_chars],
+            'score': int(batch.scores[i]),
+            'comments': int(batch.num_comments[i]),
+            'url': batch.urls[i],
+            'created_utc': int(batch.created_utc[i])
+        } for i in order if batch.titles[i]]
+
     def _process_posts(self, posts):
-        if not posts:
+        batch = PostBatch.of(posts)
+        if not len(batch):
             return {
                 'trending_topics': [],
                 'theme_analysis': [],
                 'total_posts': 0
             }
 
-        trending_topics = [{
-            'topic': str(post.title)[:100],
-            'score': getattr(post, 'score', 0),
-            'comments': getattr(post, 'num_comments', 0),
-            'url': getattr(post, 'url', ''),
-            'created_utc': getattr(post, 'created_utc', 0)
-        } for post in posts if hasattr(post, 'title') and post.title]
-
         return {
-            'trending_topics': trending_topics,
-            'theme_analysis': self.analyzer.analyze_themes(posts) if posts else [],
-            'total_posts': len(posts)
+            'trending_topics': self._top_posts(batch, title_chars=100),
+            'theme_analysis': self.analyzer.analyze_themes(batch),
+            'total_posts': len(batch)
         }
 
     def get_subreddit_posts(self, subreddit_name):
         try:
             print(f"Fetching posts for r/{subreddit_name}")  # Debug
-            subreddit = self.reddit.subreddit(subreddit_name)
+            self.ingestor.sync(subreddit_name)
             
             # Get both hot and top posts
-            hot_posts = list(subreddit.hot(limit=25))
-            top_posts = list(subreddit.top('week', limit=25))
-            all_posts = list(set(hot_posts + top_posts))
+            hot_posts = self.post_store.hot(subreddit_name, limit=25)
+            top_posts = self.post_store.top(subreddit_name, limit=25,
+                                            since=time.time() - 7 * 24 * 3600)
+            all_posts = PostBatch.of({post.id: post for post in hot_posts + top_posts}.values())
             
-            if not all_posts:
+            if not len(all_posts):
                 return None
 
             # Use analyzer for trending topics and themes
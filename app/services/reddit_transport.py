@@ -0,0 +1,321 @@
+"""Record/replay transport for the shared Reddit HTTP session.
+
+``REDDIT_TRANSPORT`` picks the adapter mounted on the session PRAW uses:
+
+``live``
+    Plain pooled HTTP.
+``record``
+    Live HTTP; every API exchange is appended to the JSONL cassette
+    (``REDDIT_CASSETTE_PATH``). Token exchanges and auth headers are never
+    written.
+``replay``
+    No network. Requests are answered from the cassette, in recorded order
+    for repeated requests, with ``REDDIT_REPLAY_LATENCY`` seconds of delay and
+    a ``REDDIT_REPLAY_429_RATE`` share of injected 429s. Requests the cassette
+    lacks can be synthesized from ``subreddit_cache.json``
+    (``REDDIT_REPLAY_SYNTHESIZE``), which also serves listings of any size.
+"""
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Response headers worth keeping in a cassette
+RECORDED_HEADERS = ('content-type', 'x-ratelimit-remaining', 'x-ratelimit-used',
+                    'x-ratelimit-reset', 'location')
+# Query parameters that never change the response
+IGNORED_PARAMS = ('raw_json',)
+
+WORDS = ['python', 'help', 'question', 'guide', 'release', 'project', 'built',
+         'library', 'community', 'data', 'learning', 'tips', 'news', 'update',
+         'opinion', 'discussion', 'tool', 'framework', 'review', 'launch']
+
+
+def request_key(method, url, body=None):
+    """Host-independent key for a request: method, path and sorted query"""
+    parts = urlsplit(url)
+    path = parts.path.rstrip('/')
+    if path.endswith('.json'):
+        path = path[:-5]
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    if body and method != 'GET':
+        params += parse_qsl(body if isinstance(body, str) else body.decode('utf-8', 'replace'))
+    query = '&'.join(f"{k}={v}" for k, v in sorted(params) if k not in IGNORED_PARAMS)
+    return f"{method} {path}?{query}" if query else f"{method} {path}"
+
+
+def is_token_request(url):
+    return 'access_token' in urlsplit(url).path
+
+
+def build_response(request, status, body, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    try:
+        response.reason = HTTPStatus(status).phrase
+    except ValueError:
+        response.reason = ''
+    response._content = body.encode('utf-8') if isinstance(body, str) else body
+    response.headers = CaseInsensitiveDict(headers or {'content-type': 'application/json'})
+    response.encoding = 'utf-8'
+    response.url = request.url
+    response.request = request
+    return response
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Pooled HTTP adapter that appends every API exchange to a JSONL cassette"""
+
+    def __init__(self, cassette_path, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette_path = cassette_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(cassette_path)), exist_ok=True)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if is_token_request(request.url):
+            return response
+        entry = {
+            'key': request_key(request.method, request.url, request.body),
+            'status': response.status_code,
+            'headers': {k: v for k, v in response.headers.items()
+                        if k.lower() in RECORDED_HEADERS},
+            'body': response.text,
+            'recorded_at': time.time(),
+        }
+        with self._lock, open(self.cassette_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Serves recorded or synthesized responses without touching the network"""
+
+    def __init__(self, cassette_path=None, latency=0.0, error_rate=0.0, seed=0,
+                 synthesizer=None):
+        super().__init__()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.synthesizer = synthesizer
+        self._random = random.Random(seed)  # Same seed, same injected 429s
+        self._lock = threading.Lock()
+        self._recorded = {}
+        self._positions = {}
+        self.stats = {'replayed': 0, 'synthesized': 0, 'injected_429': 0, 'missed': 0}
+        if cassette_path and os.path.exists(cassette_path):
+            with open(cassette_path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._recorded.setdefault(entry['key'], []).append(entry)
+
+    def send(self, request, **kwargs):
+        if is_token_request(request.url):
+            return build_response(request, 200, json.dumps({
+                'access_token': 'replay-token', 'token_type': 'bearer',
+                'expires_in': 86400, 'scope': '*',
+            }))
+
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            inject = self.error_rate and self._random.random() < self.error_rate
+            if inject:
+                self.stats['injected_429'] += 1
+        if inject:
+            return build_response(request, 429, json.dumps({'message': 'Too Many Requests', 'error': 429}), {
+                'content-type': 'application/json',
+                'x-ratelimit-remaining': '0', 'x-ratelimit-used': '600', 'x-ratelimit-reset': '1',
+            })
+
+        key = request_key(request.method, request.url, request.body)
+        entry = self._next_recorded(key)
+        if entry is not None:
+            return build_response(request, entry['status'], entry['body'], entry['headers'])
+
+        if self.synthesizer is not None:
+            synthesized = self.synthesizer.respond(request.method, request.url)
+            if synthesized is not None:
+                with self._lock:
+                    self.stats['synthesized'] += 1
+                status, payload = synthesized
+                return build_response(request, status, json.dumps(payload))
+
+        with self._lock:
+            self.stats['missed'] += 1
+        raise requests.ConnectionError(f"No recorded response for {key}", request=request)
+
+    def _next_recorded(self, key):
+        # Repeated requests get the recordings in order, then the last one again
+        with self._lock:
+            entries = self._recorded.get(key)
+            if not entries:
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            self.stats['replayed'] += 1
+            return entries[min(position, len(entries) - 1)]
+
+    def close(self):
+        pass
+
+
+class ListingSynthesizer:
+    """Deterministic Reddit responses built from ``subreddit_cache.json``.
+
+    Subreddit metadata comes from the cache; every subreddit gets a listing
+    of ``listing_size`` synthetic posts, paged through ``after`` like Reddit.
+    """
+
+    def __init__(self, subreddit_cache_path, listing_size=1000, now=None):
+        with open(subreddit_cache_path, encoding='utf-8') as f:
+            cache = json.load(f)
+        self.subreddits = {}
+        for name, entry in cache.items():
+            data = entry[0] if isinstance(entry, list) else entry
+            self.subreddits[name.lower()] = dict(data, name=data.get('name') or name)
+        self._by_prefix = {self._prefix(name): name for name in self.subreddits}
+        self.listing_size = listing_size
+        self.now = now or time.time()
+
+    @staticmethod
+    def _prefix(name):
+        return f"{zlib.crc32(name.lower().encode()) % 10000:04d}"
+
+    def respond(self, method, url):
+        """``(status, payload)`` for a request, ``None`` if it cannot be synthesized"""
+        parts = urlsplit(url)
+        path = [p for p in parts.path.rstrip('/').removesuffix('.json').split('/') if p]
+        query = dict(parse_qsl(parts.query))
+        limit = min(int(query.get('limit', 25)), 100)
+
+        if path == ['api', 'info']:
+            if 'sr_name' in query:
+                names = [n.lower() for n in query['sr_name'].split(',')]
+                return 200, self._listing([self._subreddit(n) for n in names if n in self.subreddits])
+            fullnames = query.get('id', '').split(',')
+            return 200, self._listing([post for post in map(self._post_by_fullname, fullnames) if post])
+
+        if path in (['subreddits', 'popular'], ['subreddits', 'search']):
+            names = sorted(self.subreddits, key=lambda n: -(self.subreddits[n].get('subscribers') or 0))
+            if path[1] == 'search':
+                q = query.get('q', '').lower()
+                names = [n for n in names if q in n or q in (self.subreddits[n].get('description') or '').lower()]
+            return 200, self._listing([self._subreddit(n) for n in names[:limit]])
+
+        if len(path) >= 3 and path[0] == 'r':
+            members = [m.lower() for m in path[1].split('+')]
+            if any(m not in self.subreddits for m in members):
+                return 404, {'message': 'Not Found', 'error': 404}
+            if path[2] == 'about' and len(members) == 1:
+                return 200, self._subreddit(members[0])
+            if path[2] in ('hot', 'new', 'top', 'rising', 'controversial'):
+                if query.get('before'):
+                    return 200, self._listing([])  # Nothing is ever newer
+                start = self._index(query.get('after')) + 1 if query.get('after') else 0
+                end = min(start + limit, self.listing_size)
+                posts = [self._post(members[i % len(members)], i) for i in range(start, end)]
+                after = posts[-1]['data']['name'] if posts and end < self.listing_size else None
+                return 200, self._listing(posts, after)
+
+        if len(path) >= 2 and path[0] == 'comments':
+            post = self._post_by_fullname(f"t3_{path[1]}")
+            if post is None:
+                return 404, {'message': 'Not Found', 'error': 404}
+            comments = [self._comment(path[1], i) for i in range(min(limit, 20))]
+            return 200, [self._listing([post]), self._listing(comments)]
+        return None
+
+    def _listing(self, children, after=None):
+        return {'kind': 'Listing', 'data': {'after': after, 'before': None, 'children': children}}
+
+    def _subreddit(self, name):
+        data = self.subreddits[name]
+        return {'kind': 't5', 'data': {
+            'id': self._prefix(name),
+            'name': f"t5_{self._prefix(name)}",
+            'display_name': data['name'],
+            'title': data.get('title') or data['name'],
+            'description': data.get('description') or '',
+            'public_description': data.get('description') or '',
+            'subscribers': data.get('subscribers') or 0,
+            'active_user_count': data.get('active_users'),
+            'created_utc': data.get('created_utc'),
+            'over18': data.get('over18', False),
+            'icon_img': data.get('icon_img') or '',
+            'url': f"/r/{data['name']}/",
+        }}
+
+    def _index(self, fullname):
+        return int(fullname[-6:])
+
+    def _post_by_fullname(self, fullname):
+        post_id = fullname[3:] if fullname.startswith('t3_') else fullname
+        name = self._by_prefix.get(post_id[:4])
+        if name is None or not post_id[4:].isdigit():
+            return None
+        return self._post(name, int(post_id[4:]))
+
+    def _post(self, name, index):
+        post_id = f"{self._prefix(name)}{index:06d}"
+        seed = zlib.crc32(post_id.encode())
+        title = ' '.join(WORDS[(seed >> k) % len(WORDS)] for k in range(0, 24, 4))
+        display = self.subreddits[name]['name']
+        return {'kind': 't3', 'data': {
+            'id': post_id,
+            'name': f"t3_{post_id}",
+            'title': title.capitalize(),
+            'selftext': ' '.join(WORDS[(seed >> (k % 24)) % len(WORDS)] for k in range(40)),
+            'score': seed % 5000,
+            'num_comments': (seed >> 8) % 400,
+            'created_utc': self.now - index * 600,
+            'permalink': f"/r/{display}/comments/{post_id}/",
+            'url': f"https://www.reddit.com/r/{display}/comments/{post_id}/",
+            'subreddit': display,
+            'author': f"user{seed % 97}",
+            'is_self': True,
+            'thumbnail': 'self',
+        }}
+
+    def _comment(self, post_id, index):
+        comment_id = f"{post_id}c{index}"
+        seed = zlib.crc32(comment_id.encode())
+        return {'kind': 't1', 'data': {
+            'id': comment_id,
+            'name': f"t1_{comment_id}",
+            'link_id': f"t3_{post_id}",
+            'parent_id': f"t3_{post_id}",
+            'author': f"user{seed % 97}",
+            'body': ' '.join(WORDS[(seed >> (k % 24)) % len(WORDS)] for k in range(15)),
+            'score': seed % 300,
+            'created_utc': self.now,
+            'depth': 0,
+            'replies': '',
+        }}
+
+
+def build_adapter(config, pool_size=10):
+    """Session adapter for ``config['transport']`` (``live``, ``record`` or ``replay``)"""
+    transport = config.get('transport') or 'live'
+    if transport == 'record':
+        return RecordingAdapter(config['cassette_path'], pool_connections=pool_size,
+                                pool_maxsize=pool_size)
+    if transport == 'replay':
+        synthesizer = None
+        if config.get('replay_synthesize') and os.path.exists(config['replay_synthesize']):
+            synthesizer = ListingSynthesizer(config['replay_synthesize'],
+                                             listing_size=config.get('replay_listing_size') or 1000)
+        return ReplayAdapter(config.get('cassette_path'),
+                             latency=config.get('replay_latency') or 0.0,
+                             error_rate=config.get('replay_429_rate') or 0.0,
+                             synthesizer=synthesizer)
+    return HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
@@ -0,0 +1,314 @@
+import os
+import time
+import random
+import sqlite3
+import logging
+import threading
+
+try:
+    from celery import Celery
+except ImportError:  # Celery is optional; fall back to the in-process loop
+    Celery = None
+
+from .rate_governor import BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshJob:
+    def __init__(self, name, fn, interval, priority):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.priority = priority  # Lower runs first when the budget is tight
+        self.next_run = 0.0
+        self.last_run = None
+        self.last_error = None
+        self.calls_used = 0
+
+
+def refresh_trending(scheduler):
+    from app.services.reddit_service import RedditService
+    from app.models import Audience
+    from app.extensions import db
+
+    service = RedditService()
+    # One popular listing serves both; it is ordered, so the first 20 are
+    # what a limit=20 request returns
+    popular = service.get_trending_subreddits(limit=100)
+    scheduler.store.set('trending_audiences', service.get_trending_audiences(popular[:20]))
+
+    # Keep the trending Audience rows behind /trending current
+    for data in popular:
+        audience = Audience.query.filter_by(subreddit=data['name']).first()
+        if not audience:
+            audience = Audience(subreddit=data['name'], name=data['name'], category='trending')
+            db.session.add(audience)
+        audience.update_from_reddit_data(data)
+    db.session.commit()
+
+
+def refresh_curated(scheduler):
+    from app.services.reddit_service import RedditService
+
+    scheduler.store.set('curated_audiences', RedditService().get_curated_audiences())
+
+
+def refresh_saved_analyses(scheduler):
+    from app.services.reddit_service import RedditService
+    from app.models import Audience
+
+    # Every subreddit a user's audience page will ask an analysis for
+    names = {}
+    for audience in Audience.query.filter(Audience.user_id.isnot(None)).all():
+        for subreddit in audience.subreddit_list or []:
+            if isinstance(subreddit, dict) and subreddit.get('name'):
+                names.setdefault(subreddit['name'].lower(), subreddit['name'])
+
+    # Stalest first, so a cycle that runs out of budget resumes where it stopped
+    service = RedditService()
+
+    def age(key):
+        cached = service.precomputed.get(f"analysis:{key}")
+        return cached[1].timestamp() if cached else 0
+
+    for key in sorted(names, key=age):
+        if scheduler.budget_exhausted():
+            break
+        service.refresh_subreddit_analysis(names[key])
+
+
+class RefreshScheduler:
+    """Refreshes trending, curated and saved-audience data off the request path.
+
+    Jobs run at background governor priority under a per-cycle Reddit call
+    budget. With ``CELERY_BROKER_URL`` set (and Celery installed) jobs are
+    scheduled by Celery beat; otherwise run the loop with ``flask scheduler``
+    (one process per host holds a lease in the cache database and runs the
+    cycles). ``REFRESH_SCHEDULER_ENABLED`` runs it on a daemon thread of the
+    web process instead.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.jobs = {}
+        self.celery = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._local = threading.local()
+        self._queued = set()
+        self._queued_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from app.extensions import reddit_clients
+
+        self.app = app
+        self.clients = reddit_clients
+        self.store = reddit_clients.precomputed
+        self.cycle_seconds = app.config.get('REFRESH_CYCLE_SECONDS', 60)
+        self.call_budget = app.config.get('REFRESH_CALL_BUDGET', 40)
+        self._owner = f"{os.uname().nodename if hasattr(os, 'uname') else ''}:{os.getpid()}"
+
+        self.jobs = {}
+        self.add_job('trending', refresh_trending, interval=15 * 60, priority=0)
+        self.add_job('curated', refresh_curated, interval=60 * 60, priority=1)
+        self.add_job('saved_analyses', refresh_saved_analyses, interval=30 * 60, priority=2)
+        self._stagger()
+
+        app.extensions['refresh_scheduler'] = self
+        app.cli.command('refresh')(self._cli_refresh)
+        app.cli.command('scheduler')(self._cli_scheduler)
+
+        broker = app.config.get('CELERY_BROKER_URL')
+        if broker and Celery is not None:
+            self.celery = self._make_celery(app, broker)
+        elif app.config.get('REFRESH_SCHEDULER_ENABLED') and not app.config.get('TESTING'):
+            self.start()
+
+    def add_job(self, name, fn, interval, priority=10):
+        self.jobs[name] = RefreshJob(name, fn, interval, priority)
+
+    def _stagger(self):
+        # Spread first runs over one cycle each so jobs do not fire together
+        now = time.time()
+        for index, job in enumerate(sorted(self.jobs.values(), key=lambda j: j.priority)):
+            job.next_run = now + index * self.cycle_seconds / max(len(self.jobs), 1)
+
+    def budget_exhausted(self):
+        budget = getattr(self._local, 'budget', None)
+        return budget is not None and budget.exhausted
+
+    def run_job(self, name, budget=None):
+        """Run one job now in the background priority class"""
+        job = self.jobs[name]
+        governor = self.clients.governor
+        with self.app.app_context(), governor.priority(BACKGROUND), \
+                governor.budget(budget or self.call_budget) as call_budget:
+            self._local.budget = call_budget
+            try:
+                job.fn(self)
+                job.last_error = None
+            except Exception as e:
+                job.last_error = str(e)
+                logger.error("Refresh job %s failed: %s", name, e)
+            finally:
+                self._local.budget = None
+                job.calls_used = call_budget.used
+                job.last_run = time.time()
+                # Jitter keeps jobs from drifting back into lockstep
+                job.next_run = job.last_run + job.interval * random.uniform(0.9, 1.1)
+        return call_budget.used
+
+    def run_cycle(self):
+        """Run due jobs in priority order until this cycle's call budget is spent"""
+        remaining = self.call_budget
+        now = time.time()
+        for job in sorted(self.jobs.values(), key=lambda j: j.priority):
+            if remaining <= 0:
+                break
+            if job.next_run > now:
+                continue
+            remaining -= self.run_job(job.name, budget=remaining)
+
+    def read(self, key, job_name):
+        """Precomputed value for ``key``, however old.
+
+        On a cold start returns ``None`` at once and has ``job_name`` fill
+        the cache in the background; requests never call Reddit here.
+        """
+        cached = self.store.get(key)
+        if cached is None:
+            self.run_soon(job_name)
+            return None
+        return cached[0]
+
+    def run_soon(self, name):
+        """Run job ``name`` once on a background thread, unless already queued"""
+        with self._queued_lock:
+            if name in self._queued:
+                return
+            self._queued.add(name)
+
+        def run():
+            try:
+                self.run_job(name)
+            finally:
+                with self._queued_lock:
+                    self._queued.discard(name)
+
+        threading.Thread(target=run, name=f"refresh-{name}", daemon=True).start()
+
+    def refresh_analysis_soon(self, subreddit_name):
+        """Recompute one subreddit's stored analysis in the background, unless already queued"""
+        key = f"analysis:{subreddit_name.lower()}"
+        with self._queued_lock:
+            if key in self._queued:
+                return
+            self._queued.add(key)
+
+        governor = self.clients.governor
+
+        def run():
+            try:
+                with self.app.app_context(), governor.priority(BACKGROUND):
+                    from app.services.reddit_service import RedditService
+                    RedditService().refresh_subreddit_analysis(subreddit_name)
+            except Exception as e:
+                logger.error("Analysis refresh of r/%s failed: %s", subreddit_name, e)
+            finally:
+                with self._queued_lock:
+                    self._queued.discard(key)
+
+        try:
+            self.clients.executor.submit(run)
+        except RuntimeError:
+            # Pool already shut down
+            with self._queued_lock:
+                self._queued.discard(key)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name='refresh-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                if self._acquire_lease():
+                    self.run_cycle()
+            except Exception as e:
+                logger.error("Refresh cycle failed: %s", e)
+            self._stop.wait(self.cycle_seconds)
+
+    def _acquire_lease(self):
+        # One scheduler per host: whoever holds the unexpired lease runs cycles
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.store.path, timeout=30, isolation_level=None)
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT, expires REAL)'
+            )
+            self._local.conn = conn
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute("SELECT owner, expires FROM leases WHERE name = 'refresh'").fetchone()
+            held = row is None or row[0] == self._owner or row[1] < now
+            if held:
+                conn.execute(
+                    "INSERT OR REPLACE INTO leases (name, owner, expires) VALUES ('refresh', ?, ?)",
+                    (self._owner, now + 3 * self.cycle_seconds)
+                )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return held
+
+    def _make_celery(self, app, broker):
+        celery = Celery(app.import_name, broker=broker)
+
+        @celery.task(name='refresh_scheduler.run_job')
+        def run_job(name):
+            return self.run_job(name)
+
+        celery.conf.beat_schedule = {
+            job.name: {
+                'task': 'refresh_scheduler.run_job',
+                'schedule': job.interval,
+                'args': (job.name,),
+                'options': {'priority': job.priority},
+            }
+            for job in self.jobs.values()
+        }
+        return celery
+
+    def _cli_scheduler(self):
+        """Run the refresh cycles until interrupted."""
+        try:
+            self._loop()
+        except KeyboardInterrupt:
+            self.stop()
+
+    def _cli_refresh(self):
+        """Run every refresh job once."""
+        for job in sorted(self.jobs.values(), key=lambda j: j.priority):
+            used = self.run_job(job.name)
+            logger.info("%s: %d Reddit calls, error: %s", job.name, used, job.last_error)
+
+    def stats(self):
+        return {
+            name: {
+                'last_run': job.last_run,
+                'next_run': job.next_run,
+                'calls_used': job.calls_used,
+                'last_error': job.last_error,
+            }
+            for name, job in self.jobs.items()
+        }
@@ -0,0 +1,89 @@
+import logging
+
+from app.utils.embedding_cache import content_key
+
+logger = logging.getLogger(__name__)
+
+MODES = ('model', 'lexical')
+
+
+def lexical_sentiment(text):
+    """TextBlob polarity in the model's result shape; ``score`` grows with |polarity|"""
+    from textblob import TextBlob
+    polarity = TextBlob(text).sentiment.polarity
+    return {
+        'label': 'POSITIVE' if polarity >= 0 else 'NEGATIVE',
+        'score': 0.5 + abs(polarity) / 2,
+        'polarity': polarity,
+    }
+
+
+class SentimentService:
+    """Sentiment of post texts, each text scored at most once per mode.
+
+    ``model`` mode runs the registry's transformers pipeline over all
+    unscored texts in batches of ``batch_size``, truncating by tokens at
+    ``max_length``. ``lexical`` mode uses TextBlob polarity, which needs no
+    model and is fast enough for bulk or background runs. Every result
+    carries ``label``, ``score`` and a ``polarity`` in [-1, 1], and is
+    cached in ``store`` (a ``CacheStore``) under a hash of the mode and text,
+    so later calls and other processes reuse it.
+    """
+
+    def __init__(self, registry, store=None, batch_size=32, max_length=512, mode='model'):
+        if mode not in MODES:
+            raise ValueError(f"Unknown sentiment mode {mode!r}; expected one of {MODES}")
+        self.registry = registry
+        self.store = store
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.mode = mode
+        self._stats = {'scored': 0, 'cached': 0}
+
+    def _namespace(self, mode):
+        if mode == 'lexical':
+            return 'lexical'
+        return f"model:{self.registry.config.get('sentiment_model') or 'default'}"
+
+    def analyze(self, texts, mode=None):
+        """Sentiment results of ``texts``, in order"""
+        mode = mode or self.mode
+        if mode not in MODES:
+            raise ValueError(f"Unknown sentiment mode {mode!r}; expected one of {MODES}")
+        texts = list(texts)
+        namespace = self._namespace(mode)
+        keys = [str(content_key(namespace, text)) for text in texts]
+        results = self.store.get_many(keys) if self.store is not None else {}
+        self._stats['cached'] += sum(1 for key in keys if key in results)
+
+        # Each distinct unscored text once
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in results:
+                pending.setdefault(key, text)
+        if pending:
+            scored = dict(zip(pending, self._score(list(pending.values()), mode)))
+            results.update(scored)
+            self._stats['scored'] += len(scored)
+            if self.store is not None:
+                self.store.set_many(scored.items())
+        return [results[key] for key in keys]
+
+    def polarities(self, texts, mode=None):
+        return [result['polarity'] for result in self.analyze(texts, mode)]
+
+    def _score(self, texts, mode):
+        if mode == 'lexical':
+            return [lexical_sentiment(text) for text in texts]
+        pipe = self.registry.get('sentiment')
+        outputs = pipe(texts, batch_size=self.batch_size, truncation=True,
+                       max_length=self.max_length)
+        return [{
+            'label': output['label'],
+            'score': float(output['score']),
+            'polarity': float(output['score']) * (1 if output['label'] == 'POSITIVE' else -1),
+        } for output in outputs]
+
+    def stats(self):
+        return dict(self._stats, mode=self.mode, batch_size=self.batch_size,
+                    stored=len(self.store) if self.store is not None else None)
@@ -0,0 +1,190 @@
+import time
+import logging
+import threading
+
+from app.utils.post_store import StoredPost
+from .rate_governor import BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+
+class StreamIngestor:
+    """Long-running worker that streams new submissions into the post store.
+
+    Every subreddit referenced by an audience's ``subreddit_list`` is
+    followed through PRAW's submission stream, grouped into multireddits
+    (``a+b+c``) so one poll covers many subreddits. New posts are upserted,
+    the cursors of subreddits that got posts advanced and marked synced (so
+    page views skip their own sync), and the stored analyses of those
+    subreddits recomputed locally. Streamed posts carry no later score or
+    comment counts; ``PostIngestor`` refreshes those on its own schedule. Audience pages then read near-real-time data without
+    any Reddit call.
+
+    Run it with ``flask stream``; ``STREAM_INGEST_ENABLED`` runs it on a
+    daemon thread of the web process instead.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.listeners = []
+        self._streams = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {'polls': 0, 'posts': 0, 'reanalyzed': 0, 'errors': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from app.extensions import reddit_clients
+
+        self.app = app
+        self.clients = reddit_clients
+        self.poll_interval = app.config.get('STREAM_POLL_INTERVAL', 15)
+        self.multireddit_size = app.config.get('STREAM_MULTIREDDIT_SIZE', 50)
+        self.rescan_interval = app.config.get('STREAM_RESCAN_INTERVAL', 300)
+        self._rescanned_at = 0
+
+        app.extensions['stream_ingestor'] = self
+        app.cli.command('stream')(self._cli_stream)
+        if app.config.get('STREAM_INGEST_ENABLED') and not app.config.get('TESTING'):
+            self.start()
+
+    def add_listener(self, fn):
+        """Call ``fn(subreddit_name, posts)`` for every batch of new posts"""
+        self.listeners.append(fn)
+
+    def audience_subreddits(self):
+        from app.models import Audience
+
+        names = {}
+        for audience in Audience.query.all():
+            for subreddit in audience.subreddit_list or []:
+                if isinstance(subreddit, dict) and subreddit.get('name'):
+                    names.setdefault(subreddit['name'].lower(), subreddit['name'])
+        return sorted(name for name in names if not self.clients.unavailable.get(name))
+
+    def rescan(self, service):
+        """Rebuild the multireddit streams from the current audiences"""
+        names = []
+        for name in self.audience_subreddits():
+            # The stream only carries new posts; seed hot/new history first
+            if self.clients.post_store.get_cursor(name) is None:
+                try:
+                    service.ingestor.sync(name)
+                except Exception as e:
+                    # One unavailable subreddit would fail its whole multireddit
+                    if not self.clients.unavailable.record(name, e):
+                        logger.error("Seeding r/%s failed: %s", name, e)
+                    continue
+            names.append(name)
+
+        # Subreddits nobody analysed yet get metadata in bulk and a local analysis
+        missing = [name for name in names if self.clients.precomputed.get(f"analysis:{name}") is None]
+        for key, record in service.get_subreddits_info(missing).items():
+            service.reanalyze_from_store(key, metadata={
+                'name': record['name'],
+                'subscribers': record['subscribers'],
+                'description': record['description'],
+                'active_users': record['active_users'],
+            })
+
+        groups = [names[i:i + self.multireddit_size]
+                  for i in range(0, len(names), self.multireddit_size)]
+        streams = {}
+        for group in groups:
+            key = '+'.join(group)
+            # Keep running streams so their seen-set and cursor survive
+            streams[key] = self._streams.get(key) or \
+                self.clients.reddit.subreddit(key).stream.submissions(pause_after=0)
+        self._streams = streams
+        self._rescanned_at = time.time()
+        logger.info("Streaming %d subreddits in %d multireddits", len(names), len(streams))
+
+    def poll(self, service):
+        """Drain every stream once; returns the number of new posts stored"""
+        dirty = {}
+        for key, stream in list(self._streams.items()):
+            posts = []
+            try:
+                for submission in stream:
+                    if submission is None:
+                        break
+                    posts.append(StoredPost.from_submission(submission))
+            except Exception as e:
+                self._stats['errors'] += 1
+                logger.error("Stream r/%s failed: %s", key, e)
+                # PRAW generators cannot resume after an error
+                self._streams.pop(key, None)
+                self._rescanned_at = 0
+                continue
+            self._stats['polls'] += 1
+            self._store(key.split('+'), posts, dirty)
+
+        for name, posts in dirty.items():
+            if service.reanalyze_from_store(name) is not None:
+                self._stats['reanalyzed'] += 1
+            for listener in self.listeners:
+                listener(name, posts)
+        return sum(len(posts) for posts in dirty.values())
+
+    def _store(self, members, posts, dirty):
+        store = self.clients.post_store
+        store.upsert(posts)
+        self._stats['posts'] += len(posts)
+        by_subreddit = {}
+        for post in posts:
+            by_subreddit.setdefault(post.subreddit, []).append(post)
+
+        now = time.time()
+        for name in members:
+            name = name.lower()
+            cursor = store.get_cursor(name)
+            new = by_subreddit.get(name, [])
+            newest = max(new, key=lambda p: p.created_utc, default=None)
+            if newest and (cursor is None or newest.created_utc > (cursor.newest_created or 0)):
+                store.set_cursor(name, newest=newest.fullname,
+                                 newest_created=newest.created_utc, synced_at=now)
+            if new:
+                dirty[name] = new
+
+    def run(self, iterations=None):
+        """Poll until stopped (or ``iterations`` rounds) at background priority"""
+        from app.services.reddit_service import RedditService
+
+        with self.app.app_context(), self.clients.governor.priority(BACKGROUND):
+            service = RedditService()
+            rounds = 0
+            while not self._stop.is_set():
+                try:
+                    if time.time() - self._rescanned_at >= self.rescan_interval:
+                        self.rescan(service)
+                    self.poll(service)
+                except Exception as e:
+                    self._stats['errors'] += 1
+                    logger.error("Stream ingestion round failed: %s", e)
+                rounds += 1
+                if iterations is not None and rounds >= iterations:
+                    break
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='stream-ingest', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _cli_stream(self):
+        """Stream new submissions of every audience subreddit until interrupted."""
+        try:
+            self.run()
+        except KeyboardInterrupt:
+            self.stop()
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats['streams'] = len(self._streams)
+        return stats
@@ -0,0 +1,34 @@
+class TextPreprocessor:
+    """Streams post texts through spaCy with only the components needed.
+
+    Stop-word and alphabetic flags are lexical attributes set by the
+    tokenizer, so by default (no ``components``) texts only go through
+    ``nlp.tokenizer.pipe``: no tagger, parser or NER pass. With
+    ``components`` (e.g. ``('tok2vec', 'tagger', 'attribute_ruler',
+    'lemmatizer')``) the rest of the pipeline is disabled for the run.
+    Both stream in batches of ``batch_size``. ``n_process > 1`` uses
+    ``nlp.pipe``'s worker processes; that pays off for large bulk runs,
+    not for a web request.
+    """
+
+    def __init__(self, nlp, batch_size=256, n_process=1, components=()):
+        self.nlp = nlp
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.components = tuple(components)
+        missing = set(self.components) - set(nlp.pipe_names)
+        if missing:
+            raise ValueError(f"spaCy pipeline has no component(s) {', '.join(sorted(missing))}")
+
+    def docs(self, texts):
+        """Lazily processed ``Doc`` of each text, in order"""
+        if not self.components and self.n_process == 1:
+            return self.nlp.tokenizer.pipe(texts, batch_size=self.batch_size)
+        disable = [name for name in self.nlp.pipe_names if name not in self.components]
+        return self.nlp.pipe(texts, batch_size=self.batch_size, n_process=self.n_process,
+                             disable=disable)
+
+    def tokens(self, texts):
+        """Lower-cased alphabetic non-stop-word tokens of each text"""
+        return [[token.lower_ for token in doc if not token.is_stop and token.is_alpha]
+                for doc in self.docs(texts)]
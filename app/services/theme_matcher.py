@@ -0,0 +1,206 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Themes reported on audience and subreddit pages. A trailing ``*`` matches
+# any word continuing the stem ("discuss*" also finds "discussion").
+REDDIT_THEMES = {
+    'Question/Help': ['help', 'question*', 'how', 'what', 'why', 'where', 'who', 'when', '?'],
+    'Discussion': ['discuss*', 'opinion*', 'think', 'thoughts', 'perspective*', 'view'],
+    'Guide/Tutorial': ['guide*', 'tutorial*', 'how to', 'tips', 'advice', 'steps', 'learn*'],
+    'News/Update': ['news', 'update*', 'announcement*', 'release*', 'launched'],
+    'Showcase': ['showcase*', 'created', 'made', 'built', 'finished', 'completed'],
+    'Resource': ['resource*', 'tool*', 'library', 'libraries', 'framework*', 'package*', 'download*'],
+    'Meta': ['meta', 'subreddit*', 'rules', 'moderator*', 'community'],
+}
+
+# Themes of the NLP content analysis
+CONTENT_THEMES = {
+    'Questions': ['?', 'how', 'what', 'why', 'when', 'where', 'who'],
+    'Discussion': ['discuss*', 'opinion*', 'thoughts', 'think*', 'debate*'],
+    'News': ['update*', 'announcement*', 'release*', 'launch*', 'breaking'],
+    'Guide': ['guide*', 'tutorial*', 'help', 'tips', 'howto'],
+    'Review': ['review*', 'rating*', 'experience*', 'recommend*'],
+    'Showcase': ['project*', 'created', 'built', 'made', 'completed'],
+    'Problem': ['issue*', 'bug*', 'error*', 'problem*', 'help'],
+    'Meta': ['subreddit*', 'rules', 'meta', 'mod', 'mods', 'moderator*', 'announcement*'],
+}
+
+# Distinct matched strings remembered before the memo starts over
+MEMO_SIZE = 10000
+
+
+def _term_pattern(term):
+    """Regex for one term: whole words, any run of whitespace between words"""
+    prefix = term.endswith('*')
+    term = term.rstrip('*')
+    pattern = r'\s+'.join(re.escape(word) for word in term.split())
+    if term[:1].isalnum() or term[:1] == '_':
+        pattern = r'\b' + pattern
+    if prefix:
+        pattern += r'\w*'
+    if (term[-1:].isalnum() or term[-1:] == '_') or prefix:
+        pattern += r'\b'
+    return pattern
+
+
+def _trie_pattern(terms):
+    """One alternation for word terms, folded on shared prefixes.
+
+    ``re`` tries alternatives one by one, so ``help|how|how to`` is written
+    ``h(?:elp|ow(?:\\s+to)?)``: a position is rejected after one character
+    instead of once per term, and the longest term wins.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for word_index, word in enumerate(term.rstrip('*').split()):
+            if word_index:
+                node = node.setdefault(' ', {})
+            for ch in word:
+                node = node.setdefault(ch, {})
+        node['*' if term.endswith('*') else ''] = True
+
+    def emit(node):
+        alternatives = []
+        for key in sorted(k for k in node if k not in ('', '*')):
+            edge = r'\s+' if key == ' ' else re.escape(key)
+            alternatives.append(edge + emit(node[key]))
+        if '*' in node:
+            alternatives.append(r'\w*')
+        if not alternatives:
+            return ''
+        body = alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+        # A term ending here makes the rest optional; longer matches win
+        return f"(?:{body})?" if '' in node else body
+
+    return r'\b' + emit(trie) + r'\b'
+
+
+class ThemeMatcher:
+    """Finds every theme of a text in a single regex scan.
+
+    All indicator terms of all themes are compiled into one pattern that
+    only matches whole words, so "how" no longer fires inside "show". Each
+    distinct matched string is mapped back to its themes once and memoized;
+    the mapping includes the themes of shorter terms inside a longer match
+    ("how to" is both a guide and a question).
+    """
+
+    def __init__(self, themes):
+        self.themes = {theme: list(terms) for theme, terms in themes.items()}
+        self._terms = {}
+        for theme, terms in self.themes.items():
+            for term in terms:
+                term = ' '.join(term.lower().split())
+                if term.strip('*'):
+                    self._terms.setdefault(term, set()).add(theme)
+
+        word_terms = [t for t in self._terms if re.fullmatch(r'\w[\w ]*\*?', t)]
+        other_terms = sorted(set(self._terms) - set(word_terms), key=len, reverse=True)
+        parts = [_term_pattern(term) for term in other_terms]
+        if word_terms:
+            parts.insert(0, _trie_pattern(word_terms))
+        self.pattern = re.compile('|'.join(parts)) if parts else None
+        self._term_patterns = [(re.compile(_term_pattern(term)), themes)
+                               for term, themes in self._terms.items()]
+        self._memo = {}
+
+    def __len__(self):
+        return len(self._terms)
+
+    def _themes_for(self, hit):
+        themes = self._memo.get(hit)
+        if themes is None:
+            themes = frozenset().union(*(t for pattern, t in self._term_patterns
+                                         if pattern.search(hit)))
+            if len(self._memo) >= MEMO_SIZE:
+                self._memo = {}
+            self._memo[hit] = themes
+        return themes
+
+    def match(self, text, lowered=False):
+        """Set of themes found in ``text``; pass ``lowered`` if it already is"""
+        if not text or self.pattern is None:
+            return frozenset()
+        hits = set(self.pattern.findall(text if lowered else text.lower()))
+        if not hits:
+            return frozenset()
+        return frozenset().union(*(self._themes_for(hit) for hit in hits))
+
+
+class ThemeDictionary:
+    """Theme definitions merged from defaults and an optional JSON file.
+
+    The file maps theme names to lists of terms; its themes are added to the
+    defaults or replace them, and a theme mapped to ``[]`` is removed. The
+    file is checked at most every ``check_interval`` seconds and the matcher
+    recompiled when it changed, so edits apply without a restart. A file
+    that fails to load is logged and the previous themes stay in use.
+    """
+
+    def __init__(self, defaults, path=None, check_interval=5):
+        self.defaults = dict(defaults)
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0
+        self._reloads = 0
+        self._matcher = ThemeMatcher(self.defaults)
+        self._maybe_reload()
+
+    @property
+    def matcher(self):
+        self._maybe_reload()
+        return self._matcher
+
+    def match(self, text):
+        return self.matcher.match(text)
+
+    def _maybe_reload(self):
+        if not self.path or time.time() - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if time.time() - self._checked_at < self.check_interval:
+                return
+            self._checked_at = time.time()
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                mtime = None
+            if mtime == self._mtime:
+                return
+            self._mtime = mtime
+            self.reload()
+
+    def reload(self):
+        """Rebuild the matcher from the defaults and the current file"""
+        themes = dict(self.defaults)
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    custom = json.load(f)
+                for theme, terms in custom.items():
+                    if not isinstance(terms, list):
+                        raise ValueError(f"terms of {theme!r} must be a list")
+                    if terms:
+                        themes[theme] = [str(term) for term in terms]
+                    else:
+                        themes.pop(theme, None)
+            except (OSError, ValueError) as e:
+                logger.error("Could not load themes from %s: %s", self.path, e)
+                return
+        self._matcher = ThemeMatcher(themes)
+        self._reloads += 1
+        logger.info("Loaded %d themes with %d terms", len(themes), len(self._matcher))
+
+    def stats(self):
+        matcher = self._matcher
+        return {'themes': len(matcher.themes), 'terms': len(matcher),
+                'path': self.path, 'reloads': self._reloads}
@@ -0,0 +1,148 @@
+import heapq
+
+
+class TrendingSketch:
+    """Bounded-memory heavy-hitter counts of phrases with engagement sums.
+
+    A Space-Saving summary: at most ``capacity`` phrases are monitored, each
+    with a post count, the count's possible overestimate (``error``) and the
+    score and comment sums of the posts it was seen in. A new phrase arriving
+    when the summary is full replaces the least counted one and inherits its
+    count as ``error``. Any phrase making up more than ``1 / capacity`` of all
+    phrase occurrences is guaranteed to be monitored, and ``top`` only reports
+    phrases whose guaranteed count (``count - error``) reaches ``min_count``.
+    While fewer than ``capacity`` distinct phrases were seen the counts are
+    exact.
+
+    Sketches merge (``merge``), so per-subreddit sketches combine into
+    audience-level trends without re-reading posts, and they round-trip
+    through JSON (``to_dict`` / ``from_dict``).
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.posts = 0
+        # phrase -> [count, error, score, comments]
+        self._counters = {}
+        # (count, phrase) min-heap; entries go stale when a count grows and
+        # are repaired lazily when they reach the top
+        self._heap = []
+
+    def __len__(self):
+        return len(self._counters)
+
+    def __contains__(self, phrase):
+        return phrase in self._counters
+
+    def add(self, phrases, score=0, comments=0, count=1):
+        """Count one post's distinct ``phrases`` with its engagement.
+
+        ``count=0`` only adds engagement, for a post counted before whose
+        score or comments changed; phrases no longer monitored are skipped.
+        """
+        self.posts += count
+        counters = self._counters
+        # Distinct phrases in order, so every process counts them alike
+        for phrase in dict.fromkeys(phrases):
+            counter = counters.get(phrase)
+            if counter is not None:
+                counter[0] += count
+                counter[2] += score
+                counter[3] += comments
+            elif not count:
+                continue
+            elif len(counters) < self.capacity:
+                counters[phrase] = [count, 0, score, comments]
+                heapq.heappush(self._heap, (count, phrase))
+            else:
+                # The newcomer may have been seen up to the evicted count before
+                floor = self._pop_min()[0]
+                counters[phrase] = [floor + count, floor, score, comments]
+                heapq.heappush(self._heap, (floor + count, phrase))
+
+    def _pop_min(self):
+        heap, counters = self._heap, self._counters
+        while True:
+            count, phrase = heap[0]
+            current = counters[phrase][0]
+            if current == count:
+                heapq.heappop(heap)
+                return counters.pop(phrase)
+            heapq.heapreplace(heap, (current, phrase))
+
+    def min_count(self):
+        """Count a phrase not monitored here could at most have had"""
+        if len(self._counters) < self.capacity:
+            return 0
+        return min(counter[0] for counter in self._counters.values())
+
+    def get(self, phrase):
+        """``(count, error, score, comments)`` of a monitored phrase or ``None``"""
+        counter = self._counters.get(phrase)
+        return tuple(counter) if counter is not None else None
+
+    def merge(self, other, weight=1.0):
+        """Fold ``other`` into this sketch; returns ``self``.
+
+        A phrase monitored by only one side may have been evicted from the
+        other, so it gets that side's minimum count added as count and error.
+        ``weight`` scales the engagement ``other`` contributes (time decay).
+        The result keeps this sketch's capacity.
+        """
+        own_min, other_min = self.min_count(), other.min_count()
+        merged = {}
+        # Ordered union: ties in ``top`` keep first-seen order, as unmerged
+        for phrase in [*self._counters, *(p for p in other._counters if p not in self._counters)]:
+            count, error, score, comments = self._counters.get(phrase) or [own_min, own_min, 0, 0]
+            theirs = other._counters.get(phrase)
+            if theirs is None:
+                merged[phrase] = [count + other_min, error + other_min, score, comments]
+            else:
+                merged[phrase] = [count + theirs[0], error + theirs[1],
+                                  score + theirs[2] * weight, comments + theirs[3] * weight]
+        if len(merged) > self.capacity:
+            merged = dict(heapq.nlargest(self.capacity, merged.items(), key=lambda item: item[1][0]))
+        self.posts += other.posts
+        self._counters = merged
+        self._heap = [(counter[0], phrase) for phrase, counter in merged.items()]
+        heapq.heapify(self._heap)
+        return self
+
+    @classmethod
+    def merged(cls, sketches, capacity=1000, weights=None):
+        result = cls(capacity)
+        for i, sketch in enumerate(sketches):
+            result.merge(sketch, weights[i] if weights else 1.0)
+        return result
+
+    def top(self, k=20, min_count=2, score_weight=0.7, comments_weight=0.3):
+        """The ``k`` most engaging phrases seen in at least ``min_count`` posts"""
+        candidates = (
+            {
+                'topic': phrase,
+                'count': count,
+                # Decayed sums are fractional
+                'score': round(score),
+                'comments': round(comments),
+                'engagement': (score * score_weight) + (comments * comments_weight),
+            }
+            for phrase, (count, error, score, comments) in self._counters.items()
+            if count - error >= min_count
+        )
+        return heapq.nlargest(k, candidates, key=lambda topic: topic['engagement'])
+
+    def to_dict(self):
+        return {
+            'capacity': self.capacity,
+            'posts': self.posts,
+            'counters': [[phrase] + counter for phrase, counter in self._counters.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['capacity'])
+        sketch.posts = data['posts']
+        sketch._counters = {row[0]: list(row[1:]) for row in data['counters']}
+        sketch._heap = [(counter[0], phrase) for phrase, counter in sketch._counters.items()]
+        heapq.heapify(sketch._heap)
+        return sketch
@@ -0,0 +1,239 @@
+import time
+import threading
+from collections import OrderedDict
+
+from .trending_sketch import TrendingSketch
+from app.utils.post_batch import PostBatch
+
+# Sliding windows kept for every subreddit
+WINDOWS = {'24h': 24 * 3600, '7d': 7 * 24 * 3600, '30d': 30 * 24 * 3600}
+# Example posts kept per theme and bucket
+THEME_EXAMPLES = 3
+# Changes are re-read this many seconds back; a write can commit after a
+# later one and would otherwise be missed
+WATERMARK_OVERLAP = 5
+
+
+class _Bucket:
+    __slots__ = ('sketch', 'posts', 'themes')
+
+    def __init__(self, capacity):
+        self.sketch = TrendingSketch(capacity)
+        self.posts = 0
+        # theme -> [post count, {post id: example}]
+        self.themes = {}
+
+
+class TrendingWindow:
+    """Trending topics and themes of one subreddit over sliding time windows.
+
+    Posts go into fixed buckets of ``bucket_seconds`` by creation time; each
+    bucket holds a trending sketch and per-theme counts with its top example
+    posts. Adding posts costs O(posts added): a post seen before only adds
+    the change of its score and comments. Buckets older than the longest
+    window are dropped whole. A window's results merge the sketches of its
+    buckets (so window edges have bucket resolution), optionally decaying
+    engagement by bucket age with ``half_life``.
+    """
+
+    def __init__(self, analyzer, bucket_seconds=6 * 3600, capacity=1000):
+        self.analyzer = analyzer
+        self.bucket_seconds = bucket_seconds
+        self.capacity = capacity
+        self.horizon = max(WINDOWS.values())
+        self.buckets = {}
+        self.watermark = 0
+        self.lock = threading.Lock()
+        # post id -> (bucket start, score, num_comments) as last added
+        self._posts = {}
+
+    def __len__(self):
+        return len(self._posts)
+
+    def add(self, posts, now=None):
+        """Add new posts and the engagement changes of known ones"""
+        batch = PostBatch.of(posts)
+        now = now or time.time()
+        scores, comments = batch.scores.tolist(), batch.num_comments.tolist()
+        created = batch.created_utc.tolist()
+        fresh = [i for i, post_id in enumerate(batch.ids)
+                 if post_id not in self._posts and created[i] >= now - self.horizon]
+        # Large backfills are aggregated in bulk, in parallel when configured
+        bulk = fresh if self._bulk(len(fresh)) else []
+        if bulk:
+            self._add_bulk(batch, bulk)
+        bulk = set(bulk)
+        added = len(bulk)
+        for i, post_id in enumerate(batch.ids):
+            if created[i] < now - self.horizon or i in bulk:
+                continue
+            seen = self._posts.get(post_id)
+            if seen is not None and seen[1:] == (scores[i], comments[i]):
+                continue
+            start = created[i] - created[i] % self.bucket_seconds
+            bucket = self._bucket(start)
+
+            phrases = self.analyzer.extract_phrases(batch.trend_text(i))
+            if seen is None:
+                bucket.sketch.add(phrases, scores[i], comments[i])
+                bucket.posts += 1
+            else:
+                bucket.sketch.add(phrases, scores[i] - seen[1], comments[i] - seen[2], count=0)
+            rank, example = self._example(batch, i)
+            for theme in self.analyzer.post_themes(batch.texts[i]) or ('Other',):
+                entry = bucket.themes.setdefault(theme, [0, {}])
+                if seen is None:
+                    entry[0] += 1
+                self._add_example(entry[1], rank, example)
+            self._posts[post_id] = (start, scores[i], comments[i])
+            added += 1
+        return added
+
+    def _bulk(self, posts):
+        parallel = getattr(self.analyzer, 'parallel', None)
+        return parallel is not None and parallel.wanted(posts)
+
+    def _add_bulk(self, batch, rows):
+        """Add unseen posts from their merged per-bucket aggregates"""
+        parts = self.analyzer.aggregate(batch, rows, bucket_seconds=self.bucket_seconds)
+        for start, part in parts.items():
+            bucket = self._bucket(start)
+            bucket.sketch.merge(part['sketch'])
+            bucket.posts += part['posts']
+            for theme, (count, _, top) in part['themes'].items():
+                entry = bucket.themes.setdefault(theme, [0, {}])
+                entry[0] += count
+                for *_, row in top:
+                    self._add_example(entry[1], *self._example(batch, -row))
+        for i in rows:
+            created = float(batch.created_utc[i])
+            self._posts[batch.ids[i]] = (created - created % self.bucket_seconds,
+                                         int(batch.scores[i]), int(batch.num_comments[i]))
+
+    def _bucket(self, start):
+        bucket = self.buckets.get(start)
+        if bucket is None:
+            bucket = self.buckets[start] = _Bucket(self.capacity)
+        return bucket
+
+    @staticmethod
+    def _example(batch, i):
+        # Ranked as aggregate ranks them, so bulk and per-post adds agree
+        rank = (int(batch.scores[i]), float(batch.created_utc[i]), batch.ids[i])
+        return rank, {
+            'title': batch.titles[i],
+            'url': f"https://reddit.com{batch.permalinks[i]}",
+            'score': int(batch.scores[i]),
+        }
+
+    @staticmethod
+    def _add_example(examples, rank, example):
+        examples[rank[2]] = (rank, example)
+        if len(examples) > THEME_EXAMPLES:
+            del examples[min(examples.values(), key=lambda e: e[0])[0][2]]
+
+    def expire(self, now=None):
+        """Drop buckets that left the longest window"""
+        cutoff = (now or time.time()) - self.horizon
+        expired = [start for start in self.buckets if start + self.bucket_seconds <= cutoff]
+        for start in expired:
+            del self.buckets[start]
+        if expired:
+            self._posts = {post_id: seen for post_id, seen in self._posts.items()
+                           if seen[0] in self.buckets}
+        return len(expired)
+
+    def _selected(self, window, now):
+        cutoff = now - WINDOWS[window]
+        return [(start, bucket) for start, bucket in self.buckets.items()
+                if start + self.bucket_seconds > cutoff]
+
+    def post_count(self, window, now=None):
+        return sum(bucket.posts for _, bucket in self._selected(window, now or time.time()))
+
+    def sketch(self, window='7d', half_life=None, now=None):
+        """Merged trending sketch of ``window``; engagement halves every ``half_life`` seconds"""
+        now = now or time.time()
+        selected = self._selected(window, now)
+        weights = None
+        if half_life:
+            middle = self.bucket_seconds / 2
+            weights = [0.5 ** (max(0, now - start - middle) / half_life) for start, _ in selected]
+        return TrendingSketch.merged([bucket.sketch for _, bucket in selected],
+                                     self.capacity, weights)
+
+    def trending(self, window='7d', k=20, min_count=2, half_life=None, now=None):
+        return self.sketch(window, half_life, now).top(k, min_count)
+
+    def themes(self, window='7d', now=None):
+        """Theme counts of ``window`` shaped like ``RedditAnalyzer.analyze_themes``"""
+        counts, examples, total = {}, {}, 0
+        for _, bucket in self._selected(window, now or time.time()):
+            total += bucket.posts
+            for theme, (count, theme_examples) in bucket.themes.items():
+                counts[theme] = counts.get(theme, 0) + count
+                examples.setdefault(theme, []).extend(theme_examples.values())
+        themes_analysis = [
+            {
+                'theme': theme,
+                'count': count,
+                'percentage': round((count / total) * 100, 1),
+                'examples': [example for _, example in
+                             sorted(examples[theme], key=lambda x: x[0], reverse=True)[:THEME_EXAMPLES]],
+            }
+            for theme, count in counts.items() if count
+        ]
+        themes_analysis.sort(key=lambda x: x['count'], reverse=True)
+        return themes_analysis
+
+
+class TrendingWindows:
+    """Per-process ``TrendingWindow`` of each subreddit analysed here.
+
+    A window is built from the local post store the first time a subreddit
+    is analysed in this process; after that each ``update`` only reads the
+    posts stored or refreshed since the previous one. At most
+    ``max_subreddits`` windows are kept, least recently used dropped first.
+    """
+
+    def __init__(self, post_store, analyzer, bucket_seconds=6 * 3600, capacity=1000,
+                 max_subreddits=200):
+        self.post_store = post_store
+        self.analyzer = analyzer
+        self.bucket_seconds = bucket_seconds
+        self.capacity = capacity
+        self.max_subreddits = max_subreddits
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def window(self, subreddit_name):
+        key = subreddit_name.lower()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = TrendingWindow(
+                    self.analyzer, self.bucket_seconds, self.capacity
+                )
+                while len(self._windows) > self.max_subreddits:
+                    self._windows.popitem(last=False)
+            self._windows.move_to_end(key)
+            return window
+
+    def update(self, subreddit_name, now=None):
+        """Bring the subreddit's window up to date with the post store"""
+        window = self.window(subreddit_name)
+        now = now or time.time()
+        with window.lock:
+            posts, watermark = self.post_store.changed(
+                subreddit_name, since=window.watermark - WATERMARK_OVERLAP,
+                created_since=now - window.horizon
+            )
+            window.add(posts, now)
+            window.expire(now)
+            window.watermark = max(window.watermark, watermark)
+        return window
+
+    def stats(self):
+        with self._lock:
+            windows = list(self._windows.values())
+        return {'subreddits': len(windows), 'posts': sum(len(w) for w in windows)}
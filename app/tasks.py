@@ -0,0 +1,8 @@
+# Celery entrypoint for the refresh scheduler:
+#   celery -A app.tasks.celery worker -B
+# Only used when CELERY_BROKER_URL is set.
+from app import create_app
+from app.extensions import refresh_scheduler
+
+flask_app = create_app()
+celery = refresh_scheduler.celery
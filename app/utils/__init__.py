@@ -1,3 +1,4 @@
 from .reddit_api import RedditAPI
+from .cache_store import CacheStore
 
-__all__ = ['RedditAPI']
+__all__ = ['RedditAPI', 'CacheStore']
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+
+class CacheStore:
+    """Keyed on-disk cache backed by SQLite in WAL mode.
+
+    Each entry is read and written on its own, so a cache write costs the
+    same no matter how many entries exist and opening the store does not
+    load anything. Entries are grouped by ``namespace`` so several caches
+    can share one file.
+    """
+
+    def __init__(self, path, namespace='default'):
+        self.path = path
+        self.namespace = namespace
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'namespace TEXT NOT NULL, key TEXT NOT NULL, '
+            'value TEXT NOT NULL, updated REAL NOT NULL, '
+            'PRIMARY KEY (namespace, key))'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS migrations (source TEXT PRIMARY KEY, migrated REAL)'
+        )
+
+    def _connect(self):
+        # One connection per thread, reopened after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        """Return ``(value, updated_at)`` for ``key`` or ``None``"""
+        row = self._connect().execute(
+            'SELECT value, updated FROM cache WHERE namespace = ? AND key = ?',
+            (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), datetime.fromtimestamp(row[1])
+
+    def set(self, key, value, updated=None):
+        updated = updated.timestamp() if updated else time.time()
+        self._connect().execute(
+            'INSERT OR REPLACE INTO cache (namespace, key, value, updated) VALUES (?, ?, ?, ?)',
+            (self.namespace, key, json.dumps(value), updated)
+        )
+
+    def get_many(self, keys):
+        """``{key: value}`` of the cached ``keys``"""
+        conn, found = self._connect(), {}
+        keys = list(set(keys))
+        # Chunked under SQLite's variable limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, value FROM cache WHERE namespace = ? "
+                f"AND key IN ({','.join('?' * len(chunk))})",
+                [self.namespace, *chunk]
+            )
+            found.update((key, json.loads(value)) for key, value in rows)
+        return found
+
+    def set_many(self, items, updated=None):
+        updated = updated.timestamp() if updated else time.time()
+        self._connect().executemany(
+            'INSERT OR REPLACE INTO cache (namespace, key, value, updated) VALUES (?, ?, ?, ?)',
+            [(self.namespace, key, json.dumps(value), updated) for key, value in items]
+        )
+
+    def delete(self, key):
+        self._connect().execute(
+            'DELETE FROM cache WHERE namespace = ? AND key = ?', (self.namespace, key)
+        )
+
+    def keys(self):
+        rows = self._connect().execute(
+            'SELECT key FROM cache WHERE namespace = ?', (self.namespace,)
+        )
+        return [row[0] for row in rows]
+
+    def __contains__(self, key):
+        return self._connect().execute(
+            'SELECT 1 FROM cache WHERE namespace = ? AND key = ?', (self.namespace, key)
+        ).fetchone() is not None
+
+    def __len__(self):
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM cache WHERE namespace = ?', (self.namespace,)
+        ).fetchone()[0]
+
+    def migrate_json(self, json_path):
+        """One-off import of a legacy ``{key: [value, iso_timestamp]}`` JSON cache"""
+        if not os.path.exists(json_path):
+            return 0
+        source = f"{self.namespace}:{os.path.abspath(json_path)}"
+        conn = self._connect()
+        if conn.execute('SELECT 1 FROM migrations WHERE source = ?', (source,)).fetchone():
+            return 0
+
+        with open(json_path, 'r') as f:
+            cache_data = json.load(f)
+        rows = [
+            (self.namespace, key, json.dumps(value), datetime.fromisoformat(timestamp).timestamp())
+            for key, (value, timestamp) in cache_data.items()
+        ]
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Keep anything already cached in the store over the legacy copy
+            conn.executemany(
+                'INSERT OR IGNORE INTO cache (namespace, key, value, updated) VALUES (?, ?, ?, ?)',
+                rows
+            )
+            conn.execute('INSERT INTO migrations (source, migrated) VALUES (?, ?)',
+                         (source, time.time()))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return len(rows)
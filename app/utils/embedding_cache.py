@@ -0,0 +1,163 @@
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+import numpy as np
+import xxhash
+
+# Keys looked up per SQL statement, under SQLite's variable limit
+LOOKUP_CHUNK = 500
+
+
+def content_key(model_id, text):
+    """Signed 64-bit xxh3 of a model id and the whitespace-normalized text"""
+    normalized = ' '.join(unicodedata.normalize('NFC', text or '').split())
+    digest = xxhash.xxh3_64_digest(f"{model_id}\x00{normalized}".encode('utf-8'))
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+class EmbeddingCache:
+    """Content-addressed embeddings of one model, persisted across restarts.
+
+    Vectors are appended as float16 rows to ``<name>.f16`` and read through
+    a read-only memory map, so every worker process on the host shares the
+    same page-cache pages. An SQLite index (WAL) maps each key (see
+    ``content_key``) to its row. Appends hold the index's write lock while
+    the rows are written, so processes never interleave rows; a row written
+    but not indexed (a crash in between) is simply never read.
+
+    Vectors are returned as float32 rounded through float16, whether they
+    were cached or just computed, so results do not depend on the cache.
+    """
+
+    def __init__(self, directory, model_id, dim):
+        self.model_id = model_id
+        self.dim = dim
+        os.makedirs(directory, exist_ok=True)
+        name = f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', model_id)}-{dim}"
+        self.data_path = os.path.join(directory, f"{name}.f16")
+        self.index_path = os.path.join(directory, f"{name}.idx.db")
+        self.row_bytes = dim * 2
+        self._local = threading.local()
+        self._map_lock = threading.Lock()
+        self._map = None
+        self.hits = 0
+        self.misses = 0
+        open(self.data_path, 'ab').close()
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS embeddings (key INTEGER PRIMARY KEY, row INTEGER NOT NULL)'
+        )
+
+    def _connect(self):
+        # One connection per thread, reopened after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _rows(self, keys):
+        """``{key: row}`` of the indexed ``keys``"""
+        conn, found = self._connect(), {}
+        keys = list(set(keys))
+        for start in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[start:start + LOOKUP_CHUNK]
+            found.update(conn.execute(
+                f"SELECT key, row FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk
+            ))
+        return found
+
+    def _matrix(self, rows_needed):
+        """Read-only map covering at least ``rows_needed`` rows; remapped as the file grows"""
+        matrix = self._map
+        if matrix is None or len(matrix) < rows_needed:
+            with self._map_lock:
+                matrix = self._map
+                if matrix is None or len(matrix) < rows_needed:
+                    rows = os.path.getsize(self.data_path) // self.row_bytes
+                    matrix = self._map = np.memmap(self.data_path, dtype=np.float16,
+                                                   mode='r', shape=(rows, self.dim))
+        return matrix
+
+    def get_many(self, keys):
+        """``(vectors, missing)``: float32 rows for ``keys`` and the positions not cached"""
+        vectors = np.zeros((len(keys), self.dim), dtype=np.float32)
+        found = self._rows(keys) if keys else {}
+        hit_positions = [i for i, key in enumerate(keys) if key in found]
+        if hit_positions:
+            rows = np.fromiter((found[keys[i]] for i in hit_positions), dtype=np.int64,
+                               count=len(hit_positions))
+            vectors[hit_positions] = self._matrix(int(rows.max()) + 1)[rows]
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        self.hits += len(hit_positions)
+        self.misses += len(missing)
+        return vectors, missing
+
+    def put_many(self, keys, vectors):
+        """Append the vectors of keys not indexed yet; returns how many were added"""
+        vectors = np.asarray(vectors, dtype=np.float16).reshape(-1, self.dim)
+        conn = self._connect()
+        # The write lock of the index also serializes appends to the data file
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            known = self._rows(keys)
+            fresh = {}
+            for key, vector in zip(keys, vectors):
+                if key not in known and key not in fresh:
+                    fresh[key] = vector
+            if fresh:
+                with open(self.data_path, 'r+b') as f:
+                    size = f.seek(0, os.SEEK_END)
+                    first = size // self.row_bytes
+                    # Drop a torn row left by a crash mid-append
+                    f.truncate(first * self.row_bytes)
+                    f.seek(first * self.row_bytes)
+                    f.write(np.ascontiguousarray(list(fresh.values())).tobytes())
+                conn.executemany('INSERT INTO embeddings (key, row) VALUES (?, ?)',
+                                 ((key, first + i) for i, key in enumerate(fresh)))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return len(fresh)
+
+    def embed(self, texts, compute):
+        """Vectors of ``texts``, calling ``compute(texts)`` only for unseen ones"""
+        texts = list(texts)
+        keys = [content_key(self.model_id, text) for text in texts]
+        vectors, missing = self.get_many(keys)
+        if missing:
+            # Duplicates within the call are computed once
+            unique = {}
+            for i in missing:
+                unique.setdefault(keys[i], i)
+            computed = np.asarray(compute([texts[i] for i in unique.values()]), dtype=np.float16)
+            self.put_many(list(unique), computed)
+            by_key = dict(zip(unique, computed.astype(np.float32)))
+            for i in missing:
+                vectors[i] = by_key[keys[i]]
+        return vectors
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        index_bytes = sum(os.path.getsize(path)
+                          for path in (self.index_path, self.index_path + '-wal')
+                          if os.path.exists(path))
+        return {
+            'model': self.model_id,
+            'vectors': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            'data_bytes': os.path.getsize(self.data_path),
+            'index_bytes': index_bytes,
+        }
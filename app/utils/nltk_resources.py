@@ -0,0 +1,92 @@
+import os
+import logging
+import threading
+
+import nltk
+
+logger = logging.getLogger(__name__)
+
+# NLTK data the analyzers read, by downloader name
+REQUIRED_RESOURCES = {'stopwords': 'corpora/stopwords'}
+# nltk_data/ at the repository root (see README), searched after NLTK_DATA_PATH
+VENDORED_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'nltk_data'
+)
+
+
+class NltkResourceError(RuntimeError):
+    """Required NLTK data is not installed where the app looks for it"""
+
+
+class NltkResources:
+    """Offline NLTK data: verified once per process, loaded on first use.
+
+    Nothing is ever downloaded. Resources are looked up in
+    ``NLTK_DATA_PATH``, the vendored ``nltk_data`` directory and NLTK's
+    default locations; a missing one raises ``NltkResourceError`` with the
+    command that installs it. Stop words are read once into a frozenset
+    shared by every analyzer in the process.
+    """
+
+    def __init__(self, app=None):
+        # Outside an app (scripts, benchmarks) the environment is used
+        self.paths = [path for path in (os.getenv('NLTK_DATA_PATH'), VENDORED_PATH) if path]
+        self.resources = dict(REQUIRED_RESOURCES)
+        self._lock = threading.Lock()
+        self._verified = False
+        self._stop_words = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.paths = [path for path in (app.config.get('NLTK_DATA_PATH'), VENDORED_PATH) if path]
+        self._verified = False
+        app.extensions['nltk_resources'] = self
+        if app.config.get('NLTK_VERIFY_ON_STARTUP', True):
+            self.verify()
+
+    def _add_search_paths(self):
+        for path in reversed(self.paths):
+            if path not in nltk.data.path:
+                nltk.data.path.insert(0, path)
+
+    def missing(self):
+        """Names of the required resources not found on the search path"""
+        self._add_search_paths()
+        missing = []
+        for name, resource in self.resources.items():
+            try:
+                nltk.data.find(resource)
+            except LookupError:
+                missing.append(name)
+        return missing
+
+    def verify(self):
+        """Raise ``NltkResourceError`` unless every required resource is installed"""
+        if self._verified:
+            return
+        with self._lock:
+            if self._verified:
+                return
+            missing = self.missing()
+            if missing:
+                raise NltkResourceError(
+                    f"NLTK data not found: {', '.join(missing)}. Install it with "
+                    f"`python -m nltk.downloader -d {self.paths[0]} {' '.join(missing)}` "
+                    f"or point NLTK_DATA_PATH at a directory holding it. "
+                    f"Searched: {', '.join(nltk.data.path)}"
+                )
+            self._verified = True
+            logger.info("NLTK data found: %s", ', '.join(self.resources))
+
+    def stop_words(self, language='english'):
+        words = self._stop_words.get(language)
+        if words is None:
+            self.verify()
+            from nltk.corpus import stopwords
+            words = self._stop_words[language] = frozenset(stopwords.words(language))
+        return words
+
+    def stats(self):
+        return {'verified': self._verified, 'paths': list(self.paths),
+                'stop_word_languages': sorted(self._stop_words)}
@@ -0,0 +1,97 @@
+import sys
+
+import numpy as np
+
+# Characters of the body that count towards trending phrases
+TREND_BODY_CHARS = 500
+
+
+class PostBatch:
+    """Columnar posts for the analysis hot path.
+
+    Numeric fields are NumPy arrays; subreddit and author names are
+    interned, so a batch of one subreddit holds each name once. The
+    lower-cased ``title + ' ' + selftext`` every analyzer scans is built on
+    first use and then shared. Build one batch per fetch with ``of`` and
+    hand it to every analyzer instead of a list of post objects.
+    """
+
+    __slots__ = ('ids', 'subreddits', 'titles', 'selftexts', 'permalinks', 'urls',
+                 'authors', 'scores', 'num_comments', 'created_utc', '_texts')
+
+    def __init__(self, ids, subreddits, titles, selftexts, permalinks, urls, authors,
+                 scores, num_comments, created_utc):
+        self.ids = ids
+        self.subreddits = subreddits
+        self.titles = titles
+        self.selftexts = selftexts
+        self.permalinks = permalinks
+        self.urls = urls
+        self.authors = authors
+        self.scores = np.asarray(scores, dtype=np.int64)
+        self.num_comments = np.asarray(num_comments, dtype=np.int64)
+        self.created_utc = np.asarray(created_utc, dtype=np.float64)
+        self._texts = None
+
+    @classmethod
+    def of(cls, posts):
+        """``posts`` as a batch; a batch is returned as is"""
+        if isinstance(posts, cls):
+            return posts
+        return cls.from_rows(
+            (post.id, post.subreddit, post.title, getattr(post, 'selftext', '') or '',
+             post.permalink, getattr(post, 'url', ''), getattr(post, 'author', ''),
+             post.score, post.num_comments, post.created_utc)
+            for post in posts
+        )
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from ``(id, subreddit, title, selftext, permalink, url, author,
+        score, num_comments, created_utc)`` tuples, e.g. straight from SQL"""
+        columns = list(zip(*rows)) or [()] * 10
+        intern = sys.intern
+        return cls(
+            ids=list(columns[0]),
+            subreddits=[intern(str(name).lower()) for name in columns[1]],
+            titles=[title or '' for title in columns[2]],
+            selftexts=[text or '' for text in columns[3]],
+            permalinks=list(columns[4]),
+            urls=list(columns[5]),
+            authors=[intern(str(author or '')) for author in columns[6]],
+            scores=columns[7],
+            num_comments=columns[8],
+            created_utc=columns[9],
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def texts(self):
+        """Lower-cased ``title selftext`` of every post, built once"""
+        if self._texts is None:
+            self._texts = [f"{title} {text}".lower()
+                           for title, text in zip(self.titles, self.selftexts)]
+        return self._texts
+
+    def trend_text(self, i):
+        """Lower-cased title and body start of post ``i``, as trending phrases read it"""
+        return self.texts[i][:len(self.titles[i]) + 1 + TREND_BODY_CHARS]
+
+    def engagement(self):
+        return self.scores + self.num_comments
+
+    def take(self, indices):
+        """Batch of the posts at ``indices`` (e.g. from ``np.argsort``)"""
+        indices = [int(i) for i in indices]
+        batch = PostBatch(
+            [self.ids[i] for i in indices], [self.subreddits[i] for i in indices],
+            [self.titles[i] for i in indices], [self.selftexts[i] for i in indices],
+            [self.permalinks[i] for i in indices], [self.urls[i] for i in indices],
+            [self.authors[i] for i in indices], self.scores[indices],
+            self.num_comments[indices], self.created_utc[indices],
+        )
+        if self._texts is not None:
+            batch._texts = [self._texts[i] for i in indices]
+        return batch
@@ -0,0 +1,310 @@
+import os
+import math
+import time
+import sqlite3
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from .post_batch import PostBatch
+
+# Epoch offset used by Reddit's hot ranking
+HOT_EPOCH = 1134028003
+
+POST_FIELDS = ('id', 'subreddit', 'title', 'selftext', 'score', 'num_comments',
+               'created_utc', 'permalink', 'url', 'author', 'is_self', 'thumbnail')
+# Columns of a PostBatch, in PostBatch.from_rows order
+BATCH_FIELDS = ('id', 'subreddit', 'title', 'selftext', 'permalink', 'url', 'author',
+                'score', 'num_comments', 'created_utc')
+
+COMMENT_FIELDS = ('id', 'post_id', 'parent_id', 'author', 'body', 'score', 'created_utc', 'depth')
+
+Cursor = namedtuple('Cursor', ['subreddit', 'newest', 'newest_created', 'synced_at', 'refreshed_at'])
+CommentSync = namedtuple('CommentSync', ['post_id', 'synced_at', 'num_comments', 'stored'])
+
+
+class StoredPost(namedtuple('StoredPost', POST_FIELDS)):
+    """Plain post record; exposes the Submission attributes the analyzers read"""
+    __slots__ = ()
+
+    @property
+    def fullname(self):
+        return f"t3_{self.id}"
+
+    @classmethod
+    def from_submission(cls, submission, subreddit=None):
+        return cls.from_data(vars(submission), subreddit)
+
+    @classmethod
+    def from_data(cls, data, subreddit=None):
+        """Build from the ``data`` of a ``t3`` thing as Reddit returns it"""
+        return cls(
+            id=data['id'],
+            subreddit=(subreddit or str(data.get('subreddit', ''))).lower(),
+            title=data.get('title') or '',
+            selftext=data.get('selftext') or '',
+            score=int(data.get('score') or 0),
+            num_comments=int(data.get('num_comments') or 0),
+            created_utc=float(data.get('created_utc') or 0),
+            permalink=data.get('permalink') or '',
+            url=data.get('url') or '',
+            author=str(data.get('author') or ''),
+            is_self=bool(data.get('is_self')),
+            thumbnail=data.get('thumbnail'),
+        )
+
+
+class StoredComment(namedtuple('StoredComment', COMMENT_FIELDS)):
+    __slots__ = ()
+
+    @classmethod
+    def from_data(cls, data, depth=None):
+        """Build from the ``data`` of a ``t1`` thing as Reddit returns it"""
+        return cls(
+            id=data['id'],
+            post_id=(data.get('link_id') or '').split('_')[-1],
+            parent_id=data.get('parent_id') or '',
+            author=str(data.get('author') or ''),
+            body=data.get('body') or '',
+            score=int(data.get('score') or 0),
+            created_utc=float(data.get('created_utc') or 0),
+            depth=int(data.get('depth') or 0) if depth is None else depth,
+        )
+
+
+def hot_rank(score, created_utc):
+    """Reddit's public hot formula, used to rank the local snapshot"""
+    order = math.log10(max(abs(score), 1))
+    sign = 1 if score > 0 else -1 if score < 0 else 0
+    return round(sign * order + (created_utc - HOT_EPOCH) / 45000, 7)
+
+
+def hot_ranks(batch):
+    """``hot_rank`` of every post of a ``PostBatch`` at once"""
+    order = np.log10(np.maximum(np.abs(batch.scores), 1))
+    return np.round(np.sign(batch.scores) * order + (batch.created_utc - HOT_EPOCH) / 45000, 7)
+
+
+class PostStore:
+    """Persistent per-subreddit snapshot of submissions and their comments, keyed by id.
+
+    Lives in its own SQLite file (WAL mode) so any worker can read the local
+    copy while another is ingesting.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS posts ('
+            'id TEXT PRIMARY KEY, subreddit TEXT NOT NULL, title TEXT, selftext TEXT, '
+            'score INTEGER, num_comments INTEGER, created_utc REAL, permalink TEXT, '
+            'url TEXT, author TEXT, is_self INTEGER, thumbnail TEXT, fetched_at REAL)'
+        )
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS ix_posts_subreddit_created '
+            'ON posts (subreddit, created_utc)'
+        )
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS ix_posts_subreddit_fetched '
+            'ON posts (subreddit, fetched_at)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cursors ('
+            'subreddit TEXT PRIMARY KEY, newest TEXT, newest_created REAL, '
+            'synced_at REAL, refreshed_at REAL)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS comments ('
+            'id TEXT PRIMARY KEY, post_id TEXT NOT NULL, parent_id TEXT, author TEXT, '
+            'body TEXT, score INTEGER, created_utc REAL, depth INTEGER)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_comments_post ON comments (post_id, score)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS comment_syncs ('
+            'post_id TEXT PRIMARY KEY, synced_at REAL, num_comments INTEGER, stored INTEGER)'
+        )
+
+    def _connect(self):
+        # One connection per thread, reopened after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _query(self, where, params, batch=False):
+        """Posts matching ``where``; a ``PostBatch`` when ``batch`` is set"""
+        fields = BATCH_FIELDS if batch else POST_FIELDS
+        rows = self._connect().execute(
+            f"SELECT {', '.join(fields)} FROM posts {where}", params
+        ).fetchall()
+        if batch:
+            return PostBatch.from_rows(rows)
+        return [StoredPost(*row[:10], bool(row[10]), row[11]) for row in rows]
+
+    def upsert(self, posts):
+        """Insert new posts and refresh the mutable fields of known ones"""
+        now = time.time()
+        rows = [(p.id, p.subreddit, p.title, p.selftext, p.score, p.num_comments,
+                 p.created_utc, p.permalink, p.url, p.author, int(p.is_self),
+                 p.thumbnail, now) for p in posts]
+        if not rows:
+            return 0
+        conn = self._connect()
+        conn.execute('BEGIN')
+        try:
+            conn.executemany(
+                'INSERT INTO posts (id, subreddit, title, selftext, score, num_comments, '
+                'created_utc, permalink, url, author, is_self, thumbnail, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET title = excluded.title, '
+                'selftext = excluded.selftext, score = excluded.score, '
+                'num_comments = excluded.num_comments, fetched_at = excluded.fetched_at',
+                rows
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return len(rows)
+
+    def unknown(self, post_ids):
+        """The ids among ``post_ids`` not stored yet"""
+        post_ids = list(post_ids)
+        known = set()
+        conn = self._connect()
+        # Under SQLite's bound-variable limit
+        for start in range(0, len(post_ids), 500):
+            chunk = post_ids[start:start + 500]
+            known.update(row[0] for row in conn.execute(
+                f"SELECT id FROM posts WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ))
+        return [post_id for post_id in post_ids if post_id not in known]
+
+    def update_counts(self, counts):
+        """Bulk update ``(id, score, num_comments)`` tuples"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN')
+        try:
+            conn.executemany(
+                'UPDATE posts SET score = ?, num_comments = ?, fetched_at = ? WHERE id = ?',
+                [(score, num_comments, now, post_id) for post_id, score, num_comments in counts]
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def recent(self, subreddit, limit=25, since=None, batch=False):
+        return self._query(
+            'WHERE subreddit = ? AND created_utc >= ? ORDER BY created_utc DESC LIMIT ?',
+            (subreddit.lower(), since or 0, limit), batch
+        )
+
+    def top(self, subreddit, limit=25, since=None, batch=False):
+        return self._query(
+            'WHERE subreddit = ? AND created_utc >= ? ORDER BY score DESC LIMIT ?',
+            (subreddit.lower(), since or 0, limit), batch
+        )
+
+    def changed(self, subreddit, since=0, created_since=0):
+        """Posts stored or updated after ``since`` (a ``fetched_at`` time).
+
+        Returns ``(batch, watermark)``; pass ``watermark`` back as ``since``
+        to get only what changed in between.
+        """
+        rows = self._connect().execute(
+            f"SELECT {', '.join(BATCH_FIELDS)}, fetched_at FROM posts "
+            'WHERE subreddit = ? AND fetched_at > ? AND created_utc >= ? ORDER BY fetched_at',
+            (subreddit.lower(), since, created_since)
+        ).fetchall()
+        return PostBatch.from_rows(row[:10] for row in rows), (rows[-1][10] if rows else since)
+
+    def hot(self, subreddit, limit=25, window=14 * 24 * 3600, batch=False):
+        # Hot rank only lets old posts win with huge scores; a two week
+        # window keeps the candidate set small
+        candidates = self.recent(subreddit, limit=10000, since=time.time() - window, batch=batch)
+        if batch:
+            return candidates.take(np.argsort(-hot_ranks(candidates), kind='stable')[:limit])
+        candidates.sort(key=lambda p: hot_rank(p.score, p.created_utc), reverse=True)
+        return candidates[:limit]
+
+    def get_cursor(self, subreddit):
+        row = self._connect().execute(
+            'SELECT subreddit, newest, newest_created, synced_at, refreshed_at '
+            'FROM cursors WHERE subreddit = ?', (subreddit.lower(),)
+        ).fetchone()
+        return Cursor(*row) if row else None
+
+    def set_cursor(self, subreddit, newest=None, newest_created=None, synced_at=None,
+                   refreshed_at=None):
+        current = self.get_cursor(subreddit)
+        values = current._asdict() if current else {
+            'subreddit': subreddit.lower(), 'newest': None, 'newest_created': None,
+            'synced_at': None, 'refreshed_at': None
+        }
+        for key, value in (('newest', newest), ('newest_created', newest_created),
+                           ('synced_at', synced_at), ('refreshed_at', refreshed_at)):
+            if value is not None:
+                values[key] = value
+        self._connect().execute(
+            'INSERT OR REPLACE INTO cursors (subreddit, newest, newest_created, synced_at, refreshed_at) '
+            'VALUES (:subreddit, :newest, :newest_created, :synced_at, :refreshed_at)',
+            values
+        )
+
+    def upsert_comments(self, post_id, comments, num_comments):
+        """Store one post's comments and remember what the post looked like"""
+        rows = [(c.id, c.post_id or post_id, c.parent_id, c.author, c.body, c.score,
+                 c.created_utc, c.depth) for c in comments]
+        conn = self._connect()
+        conn.execute('BEGIN')
+        try:
+            conn.executemany(
+                'INSERT INTO comments (id, post_id, parent_id, author, body, score, created_utc, depth) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET body = excluded.body, score = excluded.score',
+                rows
+            )
+            stored = conn.execute(
+                'SELECT COUNT(*) FROM comments WHERE post_id = ?', (post_id,)
+            ).fetchone()[0]
+            conn.execute(
+                'INSERT OR REPLACE INTO comment_syncs (post_id, synced_at, num_comments, stored) '
+                'VALUES (?, ?, ?, ?)', (post_id, time.time(), num_comments, stored)
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return len(rows)
+
+    def comments(self, post_id, limit=50):
+        rows = self._connect().execute(
+            f"SELECT {', '.join(COMMENT_FIELDS)} FROM comments "
+            'WHERE post_id = ? ORDER BY score DESC LIMIT ?', (post_id, limit)
+        ).fetchall()
+        return [StoredComment(*row) for row in rows]
+
+    def get_comment_sync(self, post_id):
+        row = self._connect().execute(
+            'SELECT post_id, synced_at, num_comments, stored FROM comment_syncs WHERE post_id = ?',
+            (post_id,)
+        ).fetchone()
+        return CommentSync(*row) if row else None
+
+    def count(self, subreddit=None):
+        if subreddit is None:
+            return self._connect().execute('SELECT COUNT(*) FROM posts').fetchone()[0]
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM posts WHERE subreddit = ?', (subreddit.lower(),)
+        ).fetchone()[0]
@@ -1,72 +1,175 @@
 # app/utils/reddit_api.py
-import praw
 import time
 from datetime import datetime, timedelta
 from typing import Dict, List
 import json
 import os
+import random
+import threading
+from contextlib import nullcontext
+
+from app.services.rate_governor import BACKGROUND
+from .cache_store import CacheStore
+
+# Fields that rarely change vs. fields that drift between visits
+STATIC_FIELDS = ('name', 'title', 'description', 'created_utc', 'over18', 'url', 'icon_img')
+VOLATILE_FIELDS = ('subscribers', 'active_users', 'weekly_posts')
+
 
 class RedditAPI:
-    def __init__(self, client_id, client_secret, user_agent):
-        self.reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=user_agent
-        )
-        self._cache_file = 'subreddit_cache.json'
-        self._cache_duration = timedelta(hours=24)
+    def __init__(self, reddit=None, executor=None, governor=None, unavailable=None,
+                 cache_path='subreddit_cache.db',
+                 static_ttl=timedelta(days=7), volatile_ttl=timedelta(hours=1),
+                 max_stale=timedelta(days=7), ttl_jitter=0.1, refresh_delay=5.0):
+        if reddit is None or executor is None or governor is None or unavailable is None:
+            # Imported here: app.extensions itself imports from app.utils
+            from app.extensions import reddit_clients
+            # The process-wide client (governed, pooled session) and the
+            # bounded fan-out pool, as RedditService uses
+            reddit = reddit or reddit_clients.reddit
+            executor = executor or reddit_clients.executor
+            governor = governor or reddit_clients.governor
+            unavailable = unavailable or reddit_clients.unavailable
+        self.reddit = reddit
+        self.governor = governor
+        self.unavailable = unavailable  # Negative cache shared with RedditService
+        self._cache_file = cache_path
+        self._legacy_cache_file = 'subreddit_cache.json'
+        self._static_ttl = static_ttl
+        self._volatile_ttl = volatile_ttl
+        self._max_stale = max_stale  # Older than this is refetched before returning
+        self._ttl_jitter = ttl_jitter
+        self._refresh_delay = refresh_delay
+        self._refresh_executor = executor
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
         self._load_cache()
 
     def _load_cache(self):
-        if os.path.exists(self._cache_file):
-            with open(self._cache_file, 'r') as f:
-                cache_data = json.load(f)
-                self._cache = {k: (v, datetime.fromisoformat(t)) 
-                             for k, (v, t) in cache_data.items()}
-        else:
-            self._cache = {}
-
-    def _save_cache(self):
-        cache_data = {k: (v, t.isoformat()) 
-                     for k, (v, t) in self._cache.items()}
-        with open(self._cache_file, 'w') as f:
-            json.dump(cache_data, f)
+        # Entries are read on demand; only the legacy JSON cache is imported once
+        self._cache = CacheStore(self._cache_file, namespace='subreddit_info')
+        self._cache.migrate_json(self._legacy_cache_file)
+
+    def _unpack(self, cached):
+        value, timestamp = cached
+        if 'data' in value and 'static_at' in value:
+            return {
+                'data': value['data'],
+                'static_at': datetime.fromisoformat(value['static_at']),
+                'volatile_at': datetime.fromisoformat(value['volatile_at']),
+            }
+        # Entries from the legacy JSON cache carry a single timestamp
+        return {'data': value, 'static_at': timestamp, 'volatile_at': timestamp}
+
+    def _ttl(self, subreddit_name, ttl):
+        # Stable per-entry spread so entries cached together expire apart
+        spread = random.Random(subreddit_name).uniform(-self._ttl_jitter, self._ttl_jitter)
+        return ttl * (1 + spread)
+
+    def _expired_tiers(self, subreddit_name, entry, now):
+        expired = []
+        if now - entry['static_at'] >= self._ttl(subreddit_name, self._static_ttl):
+            expired.append('static')
+        if now - entry['volatile_at'] >= self._ttl(subreddit_name, self._volatile_ttl):
+            expired.append('volatile')
+        return expired
 
     def get_subreddit_info(self, subreddit_name: str) -> Dict:
+        # Known missing, private or banned subreddits cost no Reddit call
+        if self.unavailable.get(subreddit_name):
+            return None
+
         # Check cache first
-        if subreddit_name in self._cache:
-            data, timestamp = self._cache[subreddit_name]
-            if datetime.now() - timestamp < self._cache_duration:
-                return data
+        cached = self._cache.get(subreddit_name)
+        entry = self._unpack(cached) if cached else None
+        if entry:
+            now = datetime.now()
+            expired = self._expired_tiers(subreddit_name, entry, now)
+            if not expired:
+                return entry['data']
+            oldest = min(entry['static_at'], entry['volatile_at'])
+            if now - oldest < self._max_stale:
+                # Serve the stale copy now and revalidate in the background
+                self._schedule_refresh(subreddit_name, expired)
+                return entry['data']
+
+        return self._refresh(subreddit_name, ('static', 'volatile'), entry)
 
+    def _refresh(self, subreddit_name, tiers, entry=None):
         try:
             subreddit = self.reddit.subreddit(subreddit_name)
-            data = {
-                'name': subreddit.display_name,
-                'title': subreddit.title,
-                'description': subreddit.description,
-                'subscribers': subreddit.subscribers,
-                'created_utc': subreddit.created_utc,
-                'over18': subreddit.over18,
-                'url': f"https://reddit.com/r/{subreddit.display_name}",
-                'icon_img': subreddit.icon_img if hasattr(subreddit, 'icon_img') else None,
-                'active_users': subreddit.active_user_count if hasattr(subreddit, 'active_user_count') else None,
-            }
-            
-            # Add growth metrics
-            posts = list(subreddit.new(limit=100))
-            week_ago = time.time() - (7 * 24 * 60 * 60)
-            recent_posts = sum(1 for post in posts if post.created_utc > week_ago)
-            data['weekly_posts'] = recent_posts
-            
+            data = dict(entry['data']) if entry else {}
+            now = datetime.now()
+            static_at = entry['static_at'] if entry else now
+            volatile_at = entry['volatile_at'] if entry else now
+
+            if 'static' in tiers or not entry:
+                data.update({
+                    'name': subreddit.display_name,
+                    'title': subreddit.title,
+                    'description': subreddit.description,
+                    'created_utc': subreddit.created_utc,
+                    'over18': subreddit.over18,
+                    'url': f"https://reddit.com/r/{subreddit.display_name}",
+                    'icon_img': subreddit.icon_img if hasattr(subreddit, 'icon_img') else None,
+                })
+                static_at = now
+
+            if 'volatile' in tiers or not entry:
+                data['subscribers'] = subreddit.subscribers
+                data['active_users'] = subreddit.active_user_count if hasattr(subreddit, 'active_user_count') else None
+
+                # Add growth metrics
+                posts = list(subreddit.new(limit=100))
+                week_ago = time.time() - (7 * 24 * 60 * 60)
+                recent_posts = sum(1 for post in posts if post.created_utc > week_ago)
+                data['weekly_posts'] = recent_posts
+                volatile_at = now
+
             # Cache the result
-            self._cache[subreddit_name] = (data, datetime.now())
-            self._save_cache()
-            
+            self._cache.set(subreddit_name, {
+                'data': data,
+                'static_at': static_at.isoformat(),
+                'volatile_at': volatile_at.isoformat(),
+            })
+
             return data
         except Exception as e:
+            if self.unavailable.record(subreddit_name, e):
+                return None
             print(f"Error fetching subreddit {subreddit_name}: {str(e)}")
-            return None
+            # A failed revalidation keeps serving the copy we already have
+            return entry['data'] if entry else None
+
+    def _schedule_refresh(self, subreddit_name, tiers):
+        with self._refresh_lock:
+            if subreddit_name in self._refreshing:
+                return
+            self._refreshing.add(subreddit_name)
+        # Jitter the start so a burst of expiries does not stampede Reddit;
+        # the timer waits, so no fan-out worker sleeps through the delay
+        timer = threading.Timer(random.uniform(0, self._refresh_delay), self._submit_refresh,
+                                (subreddit_name, tiers))
+        timer.daemon = True
+        timer.start()
+
+    def _submit_refresh(self, subreddit_name, tiers):
+        try:
+            self._refresh_executor.submit(self._background_refresh, subreddit_name, tiers)
+        except RuntimeError:
+            # Pool already shut down
+            with self._refresh_lock:
+                self._refreshing.discard(subreddit_name)
+
+    def _background_refresh(self, subreddit_name, tiers):
+        try:
+            priority = self.governor.priority(BACKGROUND) if self.governor else nullcontext()
+            with priority:
+                cached = self._cache.get(subreddit_name)
+                self._refresh(subreddit_name, tiers, self._unpack(cached) if cached else None)
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(subreddit_name)
 
     def search_subreddits(self, query: str, limit: int = 10) -> List[Dict]:
         try:
@@ -0,0 +1,97 @@
+"""Per-request Reddit setup overhead: fresh client per request vs shared registry.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.bench_client_pool --requests 50
+
+Both modes fetch ``hot(limit=50)`` from a local fake Reddit endpoint, so the
+numbers isolate client construction, OAuth token fetches and connection reuse.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import praw
+from flask import Flask
+
+from app.services.reddit_client import RedditClientRegistry
+from benchmarks.fake_reddit import FakeRedditServer
+
+USER_AGENT = 'Gummyclone-bench/1.0'
+
+
+def fetch(reddit):
+    return list(reddit.subreddit('python').hot(limit=50))
+
+
+def run_fresh(server, n, with_analyzer):
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        reddit = praw.Reddit(
+            client_id='bench',
+            client_secret='bench',
+            user_agent=USER_AGENT,
+            oauth_url=server.url,
+            reddit_url=server.url,
+            check_for_updates=False,
+        )
+        if with_analyzer:
+            from app.services.reddit_analyzer import RedditAnalyzer
+            RedditAnalyzer()
+        fetch(reddit)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_shared(server, n, with_analyzer):
+    app = Flask(__name__)
+    app.config.update(
+        REDDIT_CLIENT_ID='bench',
+        REDDIT_CLIENT_SECRET='bench',
+        REDDIT_USER_AGENT=USER_AGENT,
+        REDDIT_OAUTH_URL=server.url,
+        REDDIT_URL=server.url,
+        # Keep the governor out of the way; this measures setup cost only
+        REDDIT_RATE_LIMIT_PER_MINUTE=1_000_000,
+        REDDIT_RATE_BURST=1_000_000,
+        REDDIT_RATE_STATE_PATH=os.path.join(tempfile.mkdtemp(), 'ratelimit.db'),
+    )
+    registry = RedditClientRegistry(app)
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        reddit = registry.reddit
+        if with_analyzer:
+            registry.analyzer
+        fetch(reddit)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label, timings, stats):
+    print(f"{label:>8}: mean {statistics.mean(timings) * 1000:8.2f} ms  "
+          f"p50 {statistics.median(timings) * 1000:8.2f} ms  "
+          f"max {max(timings) * 1000:8.2f} ms  "
+          f"http requests {stats['requests']}  tokens {stats['tokens']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='artificial server latency per HTTP call (seconds)')
+    parser.add_argument('--with-analyzer', action='store_true',
+                        help='include RedditAnalyzer construction (reads NLTK stop words)')
+    args = parser.parse_args()
+
+    for label, runner in (('fresh', run_fresh), ('shared', run_shared)):
+        with FakeRedditServer(latency=args.latency) as server:
+            timings = runner(server, args.requests, args.with_analyzer)
+            report(label, timings, server.stats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""CPU embedding throughput: per-post BERT loop against the batched engine.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.bench_embeddings --posts 512 --batch-size 32 --threads 4
+
+Posts are synthetic (fixed seed) with a Reddit-like length spread: mostly
+short titles with a few sentences, some long self posts. Both runs use the
+same model; the largest difference between their vectors is printed too.
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+from app.services.embedding_engine import EmbeddingEngine
+from benchmarks.fake_reddit import WORDS
+
+
+def make_texts(n, rng):
+    texts = []
+    for _ in range(n):
+        # Long tail: median ~45 words, a few percent near BERT's 512-token limit
+        words = int(rng.paretovariate(1.2) * 25)
+        texts.append(' '.join(rng.choice(WORDS) for _ in range(min(words, 800))))
+    return texts
+
+
+def legacy_embeddings(tokenizer, model, texts):
+    """``ContentAnalyzer._get_embeddings`` before batching"""
+    embeddings = []
+    for text in texts:
+        inputs = tokenizer(text, return_tensors='pt', truncation=True, max_length=512)
+        with torch.no_grad():
+            outputs = model(**inputs)
+        embeddings.append(outputs.last_hidden_state[0][0].numpy())
+    return np.array(embeddings)
+
+
+def timed(label, fn, n):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>10}: {elapsed:7.2f} s  {n / elapsed:7.1f} posts/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=512)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=0, help='torch threads; 0 keeps the default')
+    parser.add_argument('--model', default='bert-base-uncased')
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModel.from_pretrained(args.model).eval()
+    engine = EmbeddingEngine(tokenizer, model, batch_size=args.batch_size,
+                             num_threads=args.threads or None)
+    texts = make_texts(args.posts, random.Random(42))
+    print(f"{args.posts} posts, {torch.get_num_threads()} torch threads, "
+          f"batch size {args.batch_size}")
+
+    before = timed('per post', lambda: legacy_embeddings(tokenizer, model, texts), args.posts)
+    after = timed('batched', lambda: engine.embed(texts), args.posts)
+    stats = engine.stats()
+    print(f"padding: {stats['padded_tokens'] / stats['tokens'] - 1:.1%} extra tokens; "
+          f"matrix {after.shape} {after.dtype}, C-contiguous {after.flags['C_CONTIGUOUS']}")
+    print(f"max |difference|: {np.abs(before - after).max():.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Model load time and resident memory, and ContentAnalyzer construction cost.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.bench_models --analyzers 5
+
+Loads every model of the registry once, printing its load time and growth
+of resident memory, then times constructing ``ContentAnalyzer`` repeatedly.
+Those constructions now reuse the loaded models; before, each one loaded
+spaCy, BERT and two transformers pipelines.
+"""
+import argparse
+import json
+import time
+
+from app.services.model_registry import ModelRegistry, resident_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--analyzers', type=int, default=5)
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    baseline = resident_bytes()
+    registry.preload()
+    for name, stats in registry.stats()['models'].items():
+        print(f"{name:>10}: {stats['load_seconds']:6.1f} s  "
+              f"{stats['rss_bytes'] / 2**20:7.0f} MiB resident")
+    print(f"{'total':>10}: {(resident_bytes() - baseline) / 2**20:16.0f} MiB resident")
+
+    from app.services.content_analyzer import ContentAnalyzer
+    start = time.perf_counter()
+    for _ in range(args.analyzers):
+        ContentAnalyzer(registry=registry).nlp
+    elapsed = (time.perf_counter() - start) / args.analyzers
+    print(f"ContentAnalyzer(): {elapsed * 1000:.2f} ms each with shared models")
+    print(json.dumps(registry.stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Trend and theme analysis of one large batch, in process and on a process pool.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.bench_parallel_analysis --posts 200000 --workers 4
+
+Posts are synthetic (fixed seed) with theme terms mixed into random filler,
+spread over 30 days. Each mode runs ``get_trending_topics``,
+``analyze_themes`` and a 30-day trend window backfill, and the pool's
+results are compared with the in-process ones. Theme results, the
+window's included, are always identical: examples tied on score are
+ranked by creation time and id, however the posts were sharded. Trends
+are identical only while ``--capacity`` exceeds the distinct phrases;
+past that, both are Space-Saving estimates within the sketch's error
+bound.
+"""
+import argparse
+import random
+import string
+import time
+
+from app.services.parallel_analysis import ParallelAnalysis
+from app.services.reddit_analyzer import RedditAnalyzer
+from app.services.theme_matcher import REDDIT_THEMES
+from app.services.trending_window import TrendingWindow
+from app.utils.post_batch import PostBatch
+
+
+def make_batch(n, rng, now):
+    filler = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+              for _ in range(3000)]
+    terms = [t.rstrip('*') for ts in REDDIT_THEMES.values() for t in ts]
+    rows = []
+    for i in range(n):
+        words = [rng.choice(terms) if rng.random() < 0.05 else rng.choice(filler)
+                 for _ in range(rng.randint(30, 150))]
+        cut = rng.randint(5, 12)
+        rows.append((f"p{i}", 'bench', ' '.join(words[:cut]).capitalize(),
+                     ' '.join(words[cut:]), f"/r/bench/comments/p{i}/", '', f"user{i % 500}",
+                     rng.randint(0, 5000), rng.randint(0, 400),
+                     now - rng.random() * 30 * 24 * 3600))
+    return PostBatch.from_rows(rows)
+
+
+def run(label, analyzer, batch, now):
+    timings, results = [], []
+    for step in (lambda: analyzer.get_trending_topics(batch),
+                 lambda: analyzer.analyze_themes(batch),
+                 lambda: TrendingWindow(analyzer, capacity=analyzer.sketch_capacity)):
+        start = time.perf_counter()
+        result = step()
+        if isinstance(result, TrendingWindow):
+            result.add(batch, now)
+            result = (result.trending('30d', now=now), result.themes('30d', now=now))
+        timings.append(time.perf_counter() - start)
+        results.append(result)
+    print(f"{label:>12}: trends {timings[0]:6.2f} s  themes {timings[1]:6.2f} s  "
+          f"window backfill {timings[2]:6.2f} s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=200_000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--capacity', type=int, default=1000)
+    args = parser.parse_args()
+    now = time.time()
+    batch = make_batch(args.posts, random.Random(42), now)
+    batch.texts  # shared by both modes, as in a request
+
+    analyzer = RedditAnalyzer(sketch_capacity=args.capacity)
+    serial = run('in process', analyzer, batch, now)
+
+    analyzer.parallel = ParallelAnalysis(args.workers, min_posts=1)
+    analyzer.get_trending_topics(batch.take(range(args.workers)))  # start the workers
+    parallel = run(f"{args.workers} workers", analyzer, batch, now)
+    analyzer.parallel.close()
+
+    for name, a, b in zip(('trends', 'themes', 'window'), serial, parallel):
+        print(f"{name:>12}: {'same' if a == b else 'DIFFERENT'} results")
+
+
+if __name__ == '__main__':
+    main()
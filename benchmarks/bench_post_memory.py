@@ -0,0 +1,108 @@
+"""Bytes per post of PRAW submissions, StoredPost records and a PostBatch.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.bench_post_memory --posts 10000
+
+Posts are built from listing JSON shaped like Reddit's (the fake server's
+fields plus the ~90 others a real ``t3`` carries). Memory is what
+``tracemalloc`` sees allocated while the posts are alive, the JSON itself
+excluded.
+"""
+import argparse
+import gc
+import tracemalloc
+
+import praw
+from praw.models import Submission
+
+from app.utils.post_batch import PostBatch
+from app.utils.post_store import StoredPost
+from benchmarks.fake_reddit import make_post
+
+# Remaining fields of a real listing child, with typical values
+REDDIT_FIELDS = {
+    'approved_at_utc': None, 'author_flair_background_color': None, 'saved': False,
+    'mod_reason_title': None, 'gilded': 0, 'clicked': False, 'link_flair_richtext': [],
+    'subreddit_name_prefixed': None, 'hidden': False, 'pwls': 6, 'link_flair_css_class': None,
+    'downs': 0, 'thumbnail_height': None, 'top_awarded_type': None, 'hide_score': False,
+    'quarantine': False, 'link_flair_text_color': 'dark', 'upvote_ratio': 0.97,
+    'author_flair_background_color_2': None, 'subreddit_type': 'public', 'ups': 0,
+    'total_awards_received': 0, 'media_embed': {}, 'thumbnail_width': None,
+    'author_flair_template_id': None, 'is_original_content': False, 'user_reports': [],
+    'secure_media': None, 'is_reddit_media_domain': False, 'is_meta': False, 'category': None,
+    'secure_media_embed': {}, 'link_flair_text': None, 'can_mod_post': False,
+    'approved_by': None, 'is_created_from_ads_ui': False, 'author_premium': False,
+    'edited': False, 'author_flair_css_class': None, 'author_flair_richtext': [],
+    'gildings': {}, 'content_categories': None, 'mod_note': None, 'link_flair_type': 'text',
+    'wls': 6, 'removed_by_category': None, 'banned_by': None, 'author_flair_type': 'text',
+    'domain': 'self.python', 'allow_live_comments': False, 'selftext_html': None,
+    'likes': None, 'suggested_sort': None, 'banned_at_utc': None, 'view_count': None,
+    'archived': False, 'no_follow': False, 'is_crosspostable': True, 'pinned': False,
+    'over_18': False, 'all_awardings': [], 'awarders': [], 'media_only': False,
+    'can_gild': False, 'spoiler': False, 'locked': False, 'author_flair_text': None,
+    'treatment_tags': [], 'visited': False, 'removed_by': None, 'num_reports': None,
+    'distinguished': None, 'subreddit_id': 't5_2qh0y', 'author_is_blocked': False,
+    'mod_reason_by': None, 'removal_reason': None, 'link_flair_background_color': '',
+    'report_reasons': None, 'discussion_type': None, 'send_replies': True,
+    'contest_mode': False, 'mod_reports': [], 'author_patreon_flair': False,
+    'author_flair_text_color': None, 'parent_whitelist_status': 'all_ads',
+    'stickied': False, 'subreddit_subscribers': 1300000, 'created': 0.0,
+    'num_crossposts': 0, 'media': None, 'is_video': False, 'author_fullname': 't2_abc',
+}
+
+
+def listing(n):
+    children = []
+    for i in range(n):
+        data = make_post('python', i)['data']
+        data.update(REDDIT_FIELDS)
+        # Real bodies are longer and unique per post
+        data['selftext'] = f"{data['selftext']} post {i} " * 4
+        data['selftext_html'] = f"<div class=\"md\"><p>{data['selftext']}</p></div>"
+        children.append(data)
+    return children
+
+
+def measure(build, children):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    posts = build(children)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return posts, used
+
+
+def submissions(children):
+    reddit = praw.Reddit(client_id='bench', client_secret='bench', user_agent='bench',
+                         check_for_updates=False)
+    # PRAW keeps its own copy of every field of every post
+    return [Submission(reddit, _data=dict(data)) for data in children]
+
+
+def stored_posts(children):
+    return [StoredPost.from_data(data) for data in children]
+
+
+def post_batch(children):
+    return PostBatch.of(StoredPost.from_data(data) for data in children)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=10_000)
+    args = parser.parse_args()
+    children = listing(args.posts)
+
+    for label, build in (('praw Submission', submissions),
+                         ('StoredPost', stored_posts),
+                         ('PostBatch', post_batch)):
+        posts, used = measure(build, children)
+        print(f"{label:>16}: {used / args.posts:8.0f} bytes/post  ({used / 2**20:6.1f} MiB total)")
+        del posts
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""spaCy preprocessing throughput: per-post full pipeline against nlp.pipe stages.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.bench_preprocess --posts 10000 --n-process 4
+
+Posts are synthetic (fixed seed) title + body texts. Runs:
+
+* ``nlp(text)`` per post with every component (the old preprocessing)
+* ``nlp.pipe`` with all components disabled
+* the tokenizer-only fast path (``TextPreprocessor`` default)
+* ``nlp.pipe`` over ``--n-process`` processes, if more than one
+
+Each run's tokens are checked against the old ones.
+"""
+import argparse
+import random
+import time
+
+import spacy
+
+from app.services.text_preprocessor import TextPreprocessor
+from benchmarks.fake_reddit import WORDS
+
+FILLER = ['the', 'is', 'a', 'with', 'and', 'I', 'my', 'to', 'for', 'it', '2024', 'v3.12', '?']
+
+
+def make_texts(n, rng):
+    vocabulary = WORDS + FILLER
+    texts = []
+    for _ in range(n):
+        title = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(5, 12)))
+        body = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(0, 150)))
+        texts.append(f"{title.capitalize()}? {body}.")
+    return texts
+
+
+def legacy_tokens(nlp, texts):
+    """``ContentAnalyzer._preprocess_posts`` before this change"""
+    return [[token.text.lower() for token in nlp(text) if not token.is_stop and token.is_alpha]
+            for text in texts]
+
+
+def pipe_tokens(nlp, texts, batch_size):
+    """``nlp.pipe`` in this process with every component disabled"""
+    return [[token.lower_ for token in doc if not token.is_stop and token.is_alpha]
+            for doc in nlp.pipe(texts, batch_size=batch_size, disable=nlp.pipe_names)]
+
+
+def run(label, fn, texts, expected=None):
+    start = time.perf_counter()
+    tokens = fn(texts)
+    elapsed = time.perf_counter() - start
+    check = '' if expected is None else ('  same tokens' if tokens == expected
+                                         else '  DIFFERENT tokens')
+    print(f"{label:>24}: {elapsed:7.2f} s  {len(texts) / elapsed:9.0f} docs/s{check}")
+    return tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=10_000)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--n-process', type=int, default=1)
+    parser.add_argument('--model', default='en_core_web_sm')
+    args = parser.parse_args()
+
+    nlp = spacy.load(args.model)
+    texts = make_texts(args.posts, random.Random(42))
+    print(f"{args.posts} posts, pipeline {nlp.pipe_names}")
+
+    expected = run('nlp(text) per post', lambda t: legacy_tokens(nlp, t), texts)
+    run('nlp.pipe, all disabled', lambda t: pipe_tokens(nlp, t, args.batch_size),
+        texts, expected)
+    run('tokenizer only', TextPreprocessor(nlp, args.batch_size).tokens, texts, expected)
+    if args.n_process > 1:
+        run(f"nlp.pipe x{args.n_process} processes",
+            TextPreprocessor(nlp, args.batch_size, n_process=args.n_process).tokens,
+            texts, expected)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Audience analysis against the replay transport, with no network.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.bench_replay --subreddits 20 --latency 0.05 --rate-429 0.02
+    python -m benchmarks.bench_replay --record cassette.jsonl   # capture via the fake server
+    python -m benchmarks.bench_replay --cassette cassette.jsonl # replay that capture
+
+Without ``--cassette`` every response is synthesized from
+``subreddit_cache.json``. The same seed injects the same 429s on every run,
+so results are reproducible.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from flask import Flask
+
+from app.extensions import db, reddit_clients
+
+CACHE_JSON = 'subreddit_cache.json'
+
+
+def make_app(**config):
+    state = tempfile.mkdtemp()
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(state, 'app.db')}",
+        REDDIT_USER_AGENT='Gummyclone-bench/1.0',
+        REDDIT_RATE_LIMIT_PER_MINUTE=1_000_000,
+        REDDIT_RATE_BURST=1_000_000,
+        REDDIT_RATE_STATE_PATH=os.path.join(state, 'ratelimit.db'),
+        REDDIT_POST_STORE_PATH=os.path.join(state, 'posts.db'),
+        REDDIT_CACHE_PATH=os.path.join(state, 'cache.db'),
+        **config
+    )
+    db.init_app(app)
+    reddit_clients.init_app(app)
+    return app
+
+
+def subreddit_names(count):
+    import json
+    with open(CACHE_JSON) as f:
+        return list(json.load(f))[:count]
+
+
+def analyze(app, names):
+    from app.services.reddit_service import RedditService
+
+    def run(name):
+        with app.app_context():
+            return service.refresh_subreddit_analysis(name)
+
+    with app.app_context():
+        service = RedditService()
+        start = time.perf_counter()
+        # What the background refresh runs; requests only read its stored result
+        results = list(service.executor.map(run, names))
+        elapsed = time.perf_counter() - start
+    return elapsed, sum(1 for result in results if result)
+
+
+def report(label, elapsed, analysed, total):
+    stats = reddit_clients.stats()
+    calls = sum(op['requests'] for op in stats['reddit_calls'].values())
+    print(f"{label:>8}: {analysed}/{total} analysed in {elapsed:6.2f} s, "
+          f"{calls} Reddit requests, transport {stats['transport']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subreddits', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='delay per replayed request (seconds)')
+    parser.add_argument('--rate-429', type=float, default=0.0,
+                        help='share of replayed requests answered with 429')
+    parser.add_argument('--cassette', help='replay this cassette instead of synthesizing')
+    parser.add_argument('--record', metavar='CASSETTE',
+                        help='record a run against the local fake Reddit server')
+    args = parser.parse_args()
+    names = subreddit_names(args.subreddits)
+
+    if args.record:
+        from benchmarks.fake_reddit import FakeRedditServer
+        with FakeRedditServer() as server:
+            app = make_app(REDDIT_TRANSPORT='record', REDDIT_CASSETTE_PATH=args.record,
+                           REDDIT_CLIENT_ID='bench', REDDIT_CLIENT_SECRET='bench',
+                           REDDIT_OAUTH_URL=server.url, REDDIT_URL=server.url)
+            elapsed, analysed = analyze(app, names)
+            report('record', elapsed, analysed, len(names))
+        return
+
+    app = make_app(
+        REDDIT_TRANSPORT='replay',
+        REDDIT_CASSETTE_PATH=args.cassette,
+        REDDIT_REPLAY_SYNTHESIZE=None if args.cassette else CACHE_JSON,
+        REDDIT_REPLAY_LATENCY=args.latency,
+        REDDIT_REPLAY_429_RATE=args.rate_429,
+    )
+    elapsed, analysed = analyze(app, names)
+    report('replay', elapsed, analysed, len(names))
+
+
+if __name__ == '__main__':
+    main()
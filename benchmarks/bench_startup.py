@@ -0,0 +1,73 @@
+"""Startup cost of the NLTK bootstrap: import, analyzer construction, legacy downloads.
+
+Usage (from the repository root)::
+
+    NLTK_DATA_PATH=/path/to/nltk_data python -m benchmarks.bench_startup --analyzers 10
+
+Each measurement runs in a fresh interpreter. "legacy" times the
+``nltk.download`` calls the old code made: four when
+``reddit_service`` was imported and four more per ``RedditAnalyzer``.
+Each call checks the network, so without a connection it waits for the
+request to fail.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+IMPORT = """
+import time
+start = time.perf_counter()
+import app.services.reddit_service
+print(time.perf_counter() - start)
+"""
+
+ANALYZERS = """
+import time
+from app.services.reddit_analyzer import RedditAnalyzer
+times = []
+for _ in range({n}):
+    start = time.perf_counter()
+    RedditAnalyzer()
+    times.append(time.perf_counter() - start)
+print(times[0], sum(times[1:]) / max(1, len(times) - 1))
+"""
+
+LEGACY = """
+import time, nltk
+start = time.perf_counter()
+for name in ('punkt', 'stopwords', 'wordnet', 'averaged_perceptron_tagger'):
+    nltk.download(name, quiet=True)
+print(time.perf_counter() - start)
+"""
+
+
+def child(code):
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    if result.returncode:
+        raise SystemExit(result.stderr.strip().splitlines()[-1])
+    return [float(x) for x in result.stdout.split()[-2:] if x]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--analyzers', type=int, default=10)
+    parser.add_argument('--skip-legacy', action='store_true',
+                        help='do not time the old nltk.download calls')
+    args = parser.parse_args()
+
+    results = {'import reddit_service (s)': child(IMPORT)[-1]}
+    first, rest = child(ANALYZERS.format(n=args.analyzers))
+    results['first RedditAnalyzer (s)'] = first
+    results['later RedditAnalyzer (s)'] = rest
+    if not args.skip_legacy:
+        downloads = child(LEGACY)[-1]
+        results['legacy: 4 downloads (s)'] = downloads
+        # Import paid 4 downloads, each analyzer 4 more
+        results[f"legacy: import + {args.analyzers} analyzers (s)"] = \
+            downloads * (1 + args.analyzers)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Single-pass theme matcher against the per-theme scans it replaced.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.bench_themes --posts 100000
+
+Posts are synthetic (fixed seed): random filler words with theme terms and
+near misses ("show", "whatever", "model") mixed in. Each dictionary is also
+run scaled up with generated extra themes, as user dictionaries grow.
+"""
+import argparse
+import random
+import re
+import string
+import time
+
+from app.services.theme_matcher import ThemeMatcher, REDDIT_THEMES, CONTENT_THEMES
+
+NEAR_MISSES = ['show', 'whatever', 'somehow', 'model', 'modern', 'review', 'overview',
+               'tooltip', 'remade', 'newsletter', 'metadata', 'whole']
+
+
+def legacy_reddit_analyzer(themes):
+    """``RedditAnalyzer.analyze_themes``: clean_text, then substring scans"""
+    def clean_text(text):
+        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+        text = re.sub(r'[^\w\s\?]', ' ', text)
+        return ' '.join(text.split()).lower()
+
+    # The old dictionaries had no stem markers
+    themes = {theme: [t.rstrip('*') for t in terms] for theme, terms in themes.items()}
+
+    def match(title, body):
+        combined_text = f"{clean_text(title)} {clean_text(body)}"
+        return {theme for theme, indicators in themes.items()
+                if any(indicator in combined_text for indicator in indicators)}
+    return match
+
+
+def legacy_content_analyzer(themes):
+    """``ContentAnalyzer._classify_themes``: one uncompiled ``re.search`` per theme"""
+    patterns = {theme: '|'.join(re.escape(t.rstrip('*')) for t in terms)
+                for theme, terms in themes.items()}
+
+    def match(title, body):
+        text = f"{title} {body}"
+        return {theme for theme, pattern in patterns.items()
+                if re.search(pattern, text, re.IGNORECASE)}
+    return match
+
+
+def single_pass(themes):
+    matcher = ThemeMatcher(themes)
+    return lambda title, body: matcher.match(f"{title} {body}")
+
+
+def scaled(themes, extra_themes, rng):
+    """``themes`` plus ``extra_themes`` generated themes of 10 terms each"""
+    themes = {theme: list(terms) for theme, terms in themes.items()}
+    for i in range(extra_themes):
+        themes[f"Custom {i}"] = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+                                 for _ in range(10)]
+    return themes
+
+
+def make_posts(n, themes, rng):
+    filler = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+              for _ in range(5000)]
+    terms = [t.rstrip('*') for ts in themes.values() for t in ts] + NEAR_MISSES
+    posts = []
+    for _ in range(n):
+        words = [rng.choice(terms) if rng.random() < 0.05 else rng.choice(filler)
+                 for _ in range(rng.randint(30, 120))]
+        cut = rng.randint(5, 12)
+        posts.append((' '.join(words[:cut]), ' '.join(words[cut:])))
+    return posts
+
+
+def run(label, match, posts):
+    start = time.perf_counter()
+    hits = [match(title, body) for title, body in posts]
+    elapsed = time.perf_counter() - start
+    tagged = sum(1 for h in hits if h)
+    print(f"{label:>34}: {elapsed:6.2f} s  {len(posts) / elapsed:9.0f} posts/s  "
+          f"{tagged} posts with a theme")
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=100_000)
+    parser.add_argument('--extra-themes', type=int, default=50,
+                        help='generated themes added for the scaled runs')
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    cases = [
+        ('RedditAnalyzer', legacy_reddit_analyzer, REDDIT_THEMES),
+        ('ContentAnalyzer', legacy_content_analyzer, CONTENT_THEMES),
+    ]
+    for name, legacy, themes in cases:
+        for label, dictionary in ((name, themes),
+                                  (f"{name} +{args.extra_themes}",
+                                   scaled(themes, args.extra_themes, rng))):
+            posts = make_posts(args.posts, dictionary, rng)
+            before = run(f"{label} loops", legacy(dictionary), posts)
+            after = run(f"{label} single pass", single_pass(dictionary), posts)
+            # Themes the old loops reported that whole-word matching drops
+            dropped = sum(len(b - a) for b, a in zip(before, after))
+            print(f"{'':>34}  {dropped} substring-only theme hits dropped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""TrendingSketch against exact phrase counts, with the Space-Saving bounds checked.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.bench_trending_sketch --posts 50000 --capacity 200
+
+Posts are synthetic (fixed seed): each carries several distinct phrases
+drawn from a Zipf-like vocabulary much larger than ``--capacity``, so the
+sketch evicts constantly. For every sketch (one fed directly, one merged
+from per-shard sketches) the bounds a Space-Saving summary guarantees are
+checked against the exact counts:
+
+* every monitored phrase has ``count - error <= true count <= count``
+* every phrase seen more often than ``min_count()`` is monitored
+* unmerged, the counts sum to the number of phrase occurrences
+"""
+import argparse
+import random
+import time
+from collections import Counter
+
+from app.services.trending_sketch import TrendingSketch
+
+
+def make_posts(n, rng, vocabulary):
+    phrases = [f"phrase{i}" for i in range(vocabulary)]
+    weights = [1 / (i + 1) for i in range(vocabulary)]
+    return [
+        (list(dict.fromkeys(rng.choices(phrases, weights, k=rng.randint(3, 12)))),
+         rng.randint(0, 5000), rng.randint(0, 400))
+        for _ in range(n)
+    ]
+
+
+def check(sketch, exact, occurrences=None):
+    """Violations of the Space-Saving bounds, as readable strings"""
+    problems = []
+    for phrase, true in exact.items():
+        counter = sketch.get(phrase)
+        if counter is None:
+            if true > sketch.min_count():
+                problems.append(f"{phrase} seen {true} times but not monitored")
+        elif not counter[0] - counter[1] <= true <= counter[0]:
+            problems.append(f"{phrase} seen {true} times, counted {counter[0]} - {counter[1]}")
+    if occurrences is not None:
+        total = sum(row[1] for row in sketch.to_dict()['counters'])
+        if total != occurrences:
+            problems.append(f"counts sum to {total}, {occurrences} occurrences")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=50_000)
+    parser.add_argument('--capacity', type=int, default=200)
+    parser.add_argument('--vocabulary', type=int, default=20_000)
+    parser.add_argument('--shards', type=int, default=4)
+    args = parser.parse_args()
+    posts = make_posts(args.posts, random.Random(42), args.vocabulary)
+
+    start = time.perf_counter()
+    exact = Counter(phrase for phrases, _, _ in posts for phrase in phrases)
+    exact_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sketch = TrendingSketch(args.capacity)
+    for phrases, score, comments in posts:
+        sketch.add(phrases, score, comments)
+    sketch_seconds = time.perf_counter() - start
+
+    shards = [TrendingSketch(args.capacity) for _ in range(args.shards)]
+    for i, (phrases, score, comments) in enumerate(posts):
+        shards[i % args.shards].add(phrases, score, comments)
+    merged = TrendingSketch.merged(shards, args.capacity)
+
+    print(f"{args.posts} posts, {len(exact)} distinct phrases, capacity {args.capacity}")
+    print(f"{'exact':>8}: {exact_seconds:6.2f} s")
+    print(f"{'sketch':>8}: {sketch_seconds:6.2f} s")
+    for name, result in (('direct', check(sketch, exact, sum(exact.values()))),
+                         ('merged', check(merged, exact))):
+        print(f"{name:>8}: {'bounds hold' if not result else f'{len(result)} VIOLATIONS'}")
+        for problem in result[:5]:
+            print(f"{'':>10}{problem}")
+
+
+if __name__ == '__main__':
+    main()
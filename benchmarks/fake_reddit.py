@@ -0,0 +1,294 @@
+"""Minimal local stand-in for the Reddit API used by the benchmarks.
+
+Serves just enough of the OAuth and listing endpoints for PRAW to work:
+token issuance, ``/api/info``, ``/r/<name>/about``, the ``hot``/``new``/``top``
+listings, the ``/subreddits/popular`` and ``/subreddits/search`` listings, and
+comment trees (``/comments/<id>``, ``/api/morechildren``). Multireddit
+listings (``/r/a+b/new``) mix posts of their members, and
+``FakeRedditServer.publish`` makes fresh posts appear in ``new`` listings the
+way PRAW's submission stream expects.
+Every response is synthetic and deterministic. Subreddit names starting with
+``missing``, ``banned``, ``private`` or ``quarantined`` get the error Reddit
+returns for such a subreddit.
+"""
+import json
+import socket
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+WORDS = ['python', 'flask', 'help', 'question', 'guide', 'release', 'project',
+         'built', 'library', 'community', 'data', 'learning', 'tips', 'news']
+
+
+def make_post(subreddit, index, now=None):
+    now = now or time.time()
+    post_id = f"{zlib.crc32(subreddit.encode()) % 10000:04d}{index:05d}"
+    title_words = [WORDS[(index * 7 + k) % len(WORDS)] for k in range(6)]
+    return {
+        'kind': 't3',
+        'data': {
+            'id': post_id,
+            'name': f"t3_{post_id}",
+            'title': ' '.join(title_words).capitalize(),
+            'selftext': ' '.join(WORDS[(index + k) % len(WORDS)] for k in range(40)),
+            'score': (index * 37) % 5000,
+            'num_comments': (index * 13) % 400,
+            'created_utc': now - index * 600,
+            'permalink': f"/r/{subreddit}/comments/{post_id}/post_{index}/",
+            'url': f"https://www.reddit.com/r/{subreddit}/comments/{post_id}/",
+            'subreddit': subreddit,
+            'author': f"user{index % 50}",
+            'is_self': True,
+            'thumbnail': 'self',
+        }
+    }
+
+
+def make_comment(post_id, path, depth, replies=None):
+    comment_id = f"c{post_id}{path}"
+    parent = f"t1_c{post_id}{path[:-1]}" if len(path) > 1 else f"t3_{post_id}"
+    return {
+        'kind': 't1',
+        'data': {
+            'id': comment_id,
+            'name': f"t1_{comment_id}",
+            'link_id': f"t3_{post_id}",
+            'parent_id': parent,
+            'author': f"user{len(path)}",
+            'body': ' '.join(WORDS[(int(path, 36) + k) % len(WORDS)] for k in range(12)),
+            'score': (int(path, 36) * 17) % 300,
+            'created_utc': 1700000000.0,
+            'depth': depth,
+            'replies': replies or '',
+        }
+    }
+
+
+def make_comment_tree(post_id, path, depth, max_depth, width=3):
+    """``width`` replies per comment, deeper ones collapsed behind ``more``"""
+    replies = []
+    if depth + 1 < max_depth:
+        replies = [make_comment_tree(post_id, path + str(i), depth + 1, max_depth, width)
+                   for i in range(width)]
+    else:
+        replies = [{'kind': 'more', 'data': {
+            'count': width, 'parent_id': f"t1_c{post_id}{path}",
+            'children': [f"c{post_id}{path}{i}" for i in range(width)]}}]
+    listing = {'kind': 'Listing', 'data': {'children': replies}}
+    return make_comment(post_id, path, depth, listing)
+
+
+# (status, reason) Reddit answers with for subreddits it will not serve
+UNAVAILABLE = {
+    'missing': (404, None),
+    'banned': (404, 'banned'),
+    'private': (403, 'private'),
+    'quarantined': (403, 'quarantined'),
+}
+
+
+def unavailable(name):
+    for prefix, error in UNAVAILABLE.items():
+        if name.lower().startswith(prefix):
+            return error
+    return None
+
+
+def make_subreddit(name):
+    return {
+        'kind': 't5',
+        'data': {
+            'id': f"{zlib.crc32(name.encode()) % 100000:x}",
+            'name': f"t5_{zlib.crc32(name.encode()) % 100000:x}",
+            'display_name': name,
+            'title': f"{name} community",
+            'description': f"All about {name}",
+            'public_description': f"All about {name}",
+            'subscribers': 10000 + len(name) * 1000,
+            'active_user_count': 100 + len(name),
+            'created_utc': 1200000000.0,
+            'over18': False,
+            'icon_img': '',
+            'url': f"/r/{name}/",
+        }
+    }
+
+
+class FakeRedditHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Avoid Nagle/delayed-ACK stalls on keep-alive connections
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Ratelimit-Remaining', '600')
+        self.send_header('X-Ratelimit-Used', '0')
+        self.send_header('X-Ratelimit-Reset', '600')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _record(self):
+        server = self.server
+        with server.stats_lock:
+            server.stats['requests'] += 1
+            server.stats['paths'][urlparse(self.path).path] = \
+                server.stats['paths'].get(urlparse(self.path).path, 0) + 1
+        if server.latency:
+            time.sleep(server.latency)
+
+    def _published(self, members, before):
+        """Published posts of ``members`` newer than ``before``, newest first"""
+        members = {member.lower() for member in members}
+        with self.server.stats_lock:
+            published = [post for post in self.server.published
+                         if post['data']['subreddit'].lower() in members]
+        names = [post['data']['name'] for post in published]
+        if before in names:
+            published = published[names.index(before) + 1:]
+        return list(reversed(published))
+
+    def do_POST(self):
+        self._record()
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        if urlparse(self.path).path.startswith('/api/v1/access_token'):
+            with self.server.stats_lock:
+                self.server.stats['tokens'] += 1
+            return self._send_json({
+                'access_token': 'fake-token',
+                'token_type': 'bearer',
+                'expires_in': 3600,
+                'scope': '*',
+            })
+        self._send_json({'error': 404}, status=404)
+
+    def do_GET(self):
+        self._record()
+        parsed = urlparse(self.path)
+        parts = [p for p in parsed.path.split('/') if p]
+        query = parse_qs(parsed.query)
+        limit = int(query.get('limit', ['25'])[0])
+
+        if parts == ['api', 'info']:
+            names = query.get('sr_name', [''])[0].split(',')
+            # Missing and banned subreddits are silently left out
+            children = [make_subreddit(name) for name in names
+                        if name and (unavailable(name) or (200,))[0] != 404]
+            for fullname in query.get('id', [''])[0].split(','):
+                # Synthetic ids encode the listing index in their last five digits
+                if fullname.startswith('t3_'):
+                    children.append(make_post('info', int(fullname[-5:])))
+            return self._send_json({
+                'kind': 'Listing',
+                'data': {'after': None, 'before': None, 'children': children}
+            })
+
+        if len(parts) >= 2 and parts[0] == 'comments':
+            post_id = parts[1]
+            depth = int(query.get('depth', ['3'])[0])
+            post = make_post('info', int(post_id[-5:]) if post_id[-5:].isdigit() else 0)
+            top_level = [make_comment_tree(post_id, str(i), 0, depth) for i in range(5)]
+            top_level.append({'kind': 'more', 'data': {
+                'count': 20, 'parent_id': f"t3_{post_id}",
+                'children': [f"c{post_id}{i}" for i in range(5, 25)]}})
+            return self._send_json([
+                {'kind': 'Listing', 'data': {'children': [post]}},
+                {'kind': 'Listing', 'data': {'children': top_level}},
+            ])
+
+        if parts == ['api', 'morechildren']:
+            post_id = query.get('link_id', ['t3_'])[0][3:]
+            things = []
+            for child in query.get('children', [''])[0].split(','):
+                path = child[len(post_id) + 1:]
+                if child and path:
+                    comment = make_comment(post_id, path, len(path) - 1)
+                    things.append(comment)
+            return self._send_json({'json': {'errors': [], 'data': {'things': things}}})
+
+        if parts in (['subreddits', 'popular'], ['subreddits', 'search']):
+            prefix = query.get('q', ['popular'])[0]
+            children = [make_subreddit(f"{prefix}{i}") for i in range(min(limit, 100))]
+            return self._send_json({
+                'kind': 'Listing',
+                'data': {'after': None, 'before': None, 'children': children}
+            })
+
+        if len(parts) >= 3 and parts[0] == 'r' and unavailable(parts[1]):
+            status, reason = unavailable(parts[1])
+            payload = {'message': 'Not Found' if status == 404 else 'Forbidden', 'error': status}
+            if reason:
+                payload['reason'] = reason
+            return self._send_json(payload, status=status)
+
+        if len(parts) >= 3 and parts[0] == 'r' and parts[2] == 'about':
+            return self._send_json(make_subreddit(parts[1]))
+
+        if len(parts) >= 3 and parts[0] == 'r' and parts[2] in ('hot', 'new', 'top'):
+            members = parts[1].split('+')
+            children = [make_post(members[i % len(members)], i) for i in range(limit)]
+            if 'before' in query:
+                # Nothing newer than the cursor unless new posts are simulated
+                children = children[:self.server.new_posts]
+            if parts[2] == 'new':
+                children = self._published(members, query.get('before', [None])[0]) + children
+                children = children[:limit]
+            return self._send_json({
+                'kind': 'Listing',
+                'data': {'after': None, 'before': None, 'children': children}
+            })
+
+        self._send_json({'error': 404}, status=404)
+
+
+class FakeRedditServer:
+    """Run the fake API on a background thread; use as a context manager."""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        self.httpd = ThreadingHTTPServer((host, port), FakeRedditHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.new_posts = 0  # Posts returned for before= cursor requests
+        self.httpd.published = []  # Fresh posts, oldest first
+        self.httpd.stats_lock = threading.Lock()
+        self.httpd.stats = {'requests': 0, 'tokens': 0, 'paths': {}}
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self):
+        return self.httpd.stats
+
+    def publish(self, subreddit, count=1):
+        """Make ``count`` new posts appear at the top of ``subreddit``'s new listing"""
+        with self.httpd.stats_lock:
+            for _ in range(count):
+                index = 90000 + len(self.httpd.published)
+                self.httpd.published.append(make_post(subreddit, index, now=time.time() + index * 600))
+        return count
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -14,6 +14,87 @@ class Config:
     REDDIT_CLIENT_SECRET = os.getenv('REDDIT_CLIENT_SECRET')
     REDDIT_USER_AGENT = os.getenv('REDDIT_USER_AGENT', 'Gummyclone/1.0')
     REDDIT_REDIRECT_URI = os.getenv('REDDIT_REDIRECT_URI', 'http://127.0.0.1:5000/callback')
+    # Optional endpoint overrides (e.g. a local fake Reddit for benchmarks)
+    REDDIT_OAUTH_URL = os.getenv('REDDIT_OAUTH_URL')
+    REDDIT_URL = os.getenv('REDDIT_URL')
+    # Record/replay transport for offline benchmarks and tests: live, record or replay
+    REDDIT_TRANSPORT = os.getenv('REDDIT_TRANSPORT', 'live')
+    REDDIT_CASSETTE_PATH = os.getenv('REDDIT_CASSETTE_PATH')  # Defaults to instance/reddit_cassette.jsonl
+    REDDIT_REPLAY_LATENCY = float(os.getenv('REDDIT_REPLAY_LATENCY', 0))  # seconds per replayed request
+    REDDIT_REPLAY_429_RATE = float(os.getenv('REDDIT_REPLAY_429_RATE', 0))  # Share of replayed requests answered 429
+    REDDIT_REPLAY_SYNTHESIZE = os.getenv('REDDIT_REPLAY_SYNTHESIZE')  # e.g. subreddit_cache.json
+    REDDIT_REPLAY_LISTING_SIZE = 1000  # Posts per synthesized subreddit listing
+    REDDIT_HTTP_POOL_SIZE = int(os.getenv('REDDIT_HTTP_POOL_SIZE', 10))
+
+    # Audience analysis fan-out
+    REDDIT_FANOUT_WORKERS = int(os.getenv('REDDIT_FANOUT_WORKERS', 8))
+    AUDIENCE_ANALYSIS_DEADLINE = float(os.getenv('AUDIENCE_ANALYSIS_DEADLINE', 20))  # seconds
+    REDDIT_SINGLE_FLIGHT_WINDOW = 60  # Identical fetches within this many seconds share one call
+
+    # Reddit rate governor (shared by all workers on this host)
+    REDDIT_RATE_LIMIT_PER_MINUTE = int(os.getenv('REDDIT_RATE_LIMIT_PER_MINUTE', 100))
+    REDDIT_RATE_BURST = int(os.getenv('REDDIT_RATE_BURST', 10))
+    REDDIT_RATE_BACKGROUND_RESERVE = 0.3  # Share of the bucket kept for interactive requests
+    REDDIT_RATE_STATE_PATH = os.getenv('REDDIT_RATE_STATE_PATH')  # Defaults to instance/reddit_ratelimit.db
+
+    # Local post snapshot, synced incrementally from Reddit listings
+    REDDIT_POST_STORE_PATH = os.getenv('REDDIT_POST_STORE_PATH')  # Defaults to instance/reddit_posts.db
+    REDDIT_POST_SYNC_INTERVAL = int(os.getenv('REDDIT_POST_SYNC_INTERVAL', 300))  # seconds
+    REDDIT_POST_REFRESH_WINDOW = 2 * 24 * 3600  # Posts younger than this get score/comment refreshes
+    REDDIT_ANALYSIS_CALL_LIMIT = 10  # Max Reddit requests one subreddit analysis may make
+
+    # Comment ingestion limits, per post
+    REDDIT_COMMENT_MAX_DEPTH = 3
+    REDDIT_COMMENT_LIMIT = 200
+    REDDIT_COMMENT_REPLACE_MORE = 2  # Extra requests expanding collapsed branches
+    REDDIT_COMMENT_REFRESH_INTERVAL = 900  # seconds
+
+    # Precomputed data and the background refresh scheduler
+    REDDIT_CACHE_PATH = os.getenv('REDDIT_CACHE_PATH')  # Defaults to instance/reddit_cache.db
+    REDDIT_ANALYSIS_MAX_AGE = 3600  # Precomputed subreddit analyses older than this are recomputed
+    REDDIT_NEGATIVE_CACHE_TTL = 900  # How long a missing/private/banned subreddit is remembered
+    # Background refresh scheduler (`flask scheduler`)
+    REFRESH_SCHEDULER_ENABLED = os.getenv('REFRESH_SCHEDULER_ENABLED', '0') == '1'  # Run it inside the web process
+    REFRESH_CYCLE_SECONDS = 60
+    REFRESH_CALL_BUDGET = 40  # Max Reddit calls per refresh cycle
+    CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL')  # Use Celery beat instead of the in-process loop
+
+    # Live submission stream worker (`flask stream`)
+    STREAM_INGEST_ENABLED = os.getenv('STREAM_INGEST_ENABLED', '0') == '1'  # Run it inside the web process
+    STREAM_POLL_INTERVAL = 15  # seconds between polls of each multireddit stream
+    STREAM_MULTIREDDIT_SIZE = 50  # Subreddits per a+b+c stream
+    STREAM_RESCAN_INTERVAL = 300  # How often the audience subreddit list is re-read
+
+    # Theme detection; the JSON file ({"Theme": ["term", "stem*"]}) extends the built-in themes
+    THEME_DICTIONARY_PATH = os.getenv('THEME_DICTIONARY_PATH')
+    THEME_RELOAD_INTERVAL = 5  # seconds between checks of the dictionary file
+    TRENDING_SKETCH_CAPACITY = 1000  # Phrases each trending-topic sketch monitors
+    TRENDING_BUCKET_SECONDS = 6 * 3600  # Time resolution of the 24h/7d/30d trend windows
+    TRENDING_WINDOW = '7d'  # Window behind a subreddit's headline trends and themes
+    TRENDING_HALF_LIFE = 2 * 24 * 3600  # Engagement decay in seconds; None ranks by raw engagement
+    TRENDING_WINDOW_SUBREDDITS = 200  # Subreddit windows kept in memory per process
+    ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', 0))  # Processes for large text analyses; 0 analyses in process
+    ANALYSIS_PARALLEL_MIN_POSTS = 5000  # Smaller batches are not worth shipping to the pool
+    ANALYSIS_PARALLEL_TIMEOUT = 120  # seconds per batch before the pool is replaced and it runs in process
+    NLTK_DATA_PATH = os.getenv('NLTK_DATA_PATH')  # Local NLTK data; nltk_data/ in the repository is searched next
+    NLTK_VERIFY_ON_STARTUP = os.getenv('NLTK_VERIFY_ON_STARTUP', '1') == '1'  # Refuse to start without it
+
+    # NLP models of the content analysis, loaded once per process on first use
+    MODEL_PRELOAD = os.getenv('MODEL_PRELOAD', '')  # e.g. spacy,bert,sentiment; load before gunicorn --preload forks
+    SPACY_MODEL = 'en_core_web_sm'
+    SPACY_BATCH_SIZE = int(os.getenv('SPACY_BATCH_SIZE', 256))  # Texts per nlp.pipe batch
+    SPACY_N_PROCESS = int(os.getenv('SPACY_N_PROCESS', 1))  # >1 for bulk preprocessing runs
+    SPACY_COMPONENTS = os.getenv('SPACY_COMPONENTS', '')  # Pipeline components to run; empty is tokenizer only
+    BERT_MODEL = 'bert-base-uncased'
+    SENTIMENT_MODEL = os.getenv('SENTIMENT_MODEL')  # Defaults to the transformers sentiment pipeline model
+    EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', 32))  # Posts per BERT forward pass
+    EMBEDDING_MAX_LENGTH = 512  # Tokens per post; longer posts are truncated
+    TORCH_NUM_THREADS = int(os.getenv('TORCH_NUM_THREADS', 0)) or None  # None keeps torch's default
+    EMBEDDING_CACHE_ENABLED = os.getenv('EMBEDDING_CACHE_ENABLED', '1') == '1'
+    EMBEDDING_CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH')  # Defaults to instance/embeddings/
+    SENTIMENT_MODE = os.getenv('SENTIMENT_MODE', 'model')  # Content analysis: model, or lexical (TextBlob) for bulk runs
+    SENTIMENT_BATCH_SIZE = int(os.getenv('SENTIMENT_BATCH_SIZE', 32))  # Posts per sentiment forward pass
+    SENTIMENT_CACHE_PATH = os.getenv('SENTIMENT_CACHE_PATH')  # Defaults to instance/sentiment_cache.db
     
     # Session configuration
     SESSION_TYPE = 'filesystem'
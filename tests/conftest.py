@@ -0,0 +1,47 @@
+import json
+import os
+
+import pytest
+
+from app.extensions import reddit_clients
+from app.services.reddit_transport import ListingSynthesizer
+from benchmarks.bench_replay import make_app
+
+CACHE_JSON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'subreddit_cache.json')
+
+
+@pytest.fixture
+def synthesizer():
+    """Builds the posts a test scripts into its cassette"""
+    return ListingSynthesizer(CACHE_JSON)
+
+
+@pytest.fixture
+def cassette(tmp_path):
+    """A cassette path plus ``record(key, payload)`` to script responses into it"""
+    path = tmp_path / 'cassette.jsonl'
+
+    def record(key, payload, status=200):
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'key': key, 'status': status,
+                                'headers': {'content-type': 'application/json'},
+                                'body': json.dumps(payload)}) + '\n')
+
+    record.path = str(path)
+    return record
+
+
+@pytest.fixture
+def replay_app(cassette):
+    """App on the replay transport: the cassette first, then synthesized listings.
+
+    The cassette must be scripted before the first Reddit request, which
+    loads it.
+    """
+    app = make_app(TESTING=True, REDDIT_TRANSPORT='replay', REDDIT_CASSETTE_PATH=cassette.path,
+                   REDDIT_REPLAY_SYNTHESIZE=CACHE_JSON)
+    with app.app_context():
+        yield app
+    # The registry is process-wide; the next app needs its own session
+    reddit_clients.close()
@@ -0,0 +1,152 @@
+"""Post and stream ingestion against replayed Reddit responses.
+
+Cassette entries script the listings each scenario needs; every other
+request is synthesized from ``subreddit_cache.json``.
+"""
+from app.extensions import reddit_clients
+from app.services.post_ingest import PostIngestor
+from app.services.stream_ingest import StreamIngestor
+from benchmarks.bench_replay import make_app
+from benchmarks.fake_reddit import FakeRedditServer
+
+
+def listing(children):
+    return {'kind': 'Listing', 'data': {'after': None, 'before': None, 'children': children}}
+
+
+def new_posts(synthesizer, name):
+    """The 100 newest synthetic posts of ``name``, newest first"""
+    status, payload = synthesizer.respond('GET', f"https://oauth.reddit.com/r/{name}/new?limit=100")
+    assert status == 200
+    return payload['data']['children']
+
+
+def fullname(post):
+    return post['data']['name']
+
+
+def requests_made(operation):
+    return reddit_clients.stats()['reddit_calls'].get(operation, {}).get('requests', 0)
+
+
+def test_sync_seeds_then_advances_cursor(replay_app, cassette, synthesizer):
+    name = next(iter(synthesizer.subreddits))
+    posts = new_posts(synthesizer, name)
+    # Posts 0 and 1 appear after the seed
+    cassette(f"GET /r/{name}/hot?limit=100", listing(posts[2:]))
+    cassette(f"GET /r/{name}/new?limit=100", listing(posts[2:]))
+    cassette(f"GET /r/{name}/new?before={fullname(posts[2])}&limit=100", listing(posts[:2]))
+    cassette(f"GET /r/{name}/new?limit=100", listing(posts))
+    store = reddit_clients.post_store
+    ingestor = PostIngestor(reddit_clients.data, store)
+
+    assert ingestor.sync(name) == 98
+    assert store.get_cursor(name).newest == fullname(posts[2])
+    assert store.count(name) == 98
+    assert ingestor.sync(name) == 0  # synced recently
+
+    assert ingestor.sync(name, force=True) == 2
+    cursor = store.get_cursor(name)
+    assert cursor.newest == fullname(posts[0])
+    assert cursor.newest_created == posts[0]['data']['created_utc']
+    assert store.count(name) == 100
+    # One cursored request, no uncursored fallback
+    assert requests_made('new') == 2
+
+    # Nothing newer: the uncursored listing still holds the anchor
+    assert ingestor.sync(name, force=True) == 0
+    assert store.get_cursor(name).newest == fullname(posts[0])
+    assert requests_made('new') == 4
+    assert reddit_clients.stats()['transport']['missed'] == 0
+
+
+def test_sync_recovers_from_deleted_anchor(replay_app, cassette, synthesizer):
+    name = next(iter(synthesizer.subreddits))
+    posts = new_posts(synthesizer, name)
+    cassette(f"GET /r/{name}/hot?limit=100", listing(posts[2:]))
+    cassette(f"GET /r/{name}/new?limit=100", listing(posts[2:]))
+    # Every ``before`` request answers nothing, as for a deleted anchor.
+    # First the anchor (post 2) is deleted while posts 0 and 1 are new...
+    cassette(f"GET /r/{name}/new?limit=100", listing(posts[:2] + posts[3:]))
+    # ...then the new anchor (post 0) is deleted with nothing newer
+    cassette(f"GET /r/{name}/new?limit=100", listing(posts[1:2] + posts[3:]))
+    store = reddit_clients.post_store
+    ingestor = PostIngestor(reddit_clients.data, store)
+
+    ingestor.sync(name)
+    assert store.get_cursor(name).newest == fullname(posts[2])
+
+    # The missed posts are stored and the cursor moves onto the newest
+    assert ingestor.sync(name, force=True) == 2
+    assert store.get_cursor(name).newest == fullname(posts[0])
+    assert store.unknown(post['data']['id'] for post in posts) == []
+    assert requests_made('new') == 3
+
+    # Nothing to store, but the cursor falls back to the newest live post
+    assert ingestor.sync(name, force=True) == 0
+    cursor = store.get_cursor(name)
+    assert cursor.newest == fullname(posts[1])
+    assert cursor.newest_created == posts[1]['data']['created_utc']
+    assert requests_made('new') == 5
+    assert reddit_clients.stats()['transport']['missed'] == 0
+
+
+class RecordingService:
+    """The part of ``RedditService`` that ``StreamIngestor.poll`` calls"""
+
+    def __init__(self):
+        self.reanalyzed = []
+
+    def reanalyze_from_store(self, name, metadata=None):
+        self.reanalyzed.append(name)
+
+
+def stream_rounds(app, names, publish=None):
+    """Seed ``names``, stream them as one multireddit and poll three times.
+
+    ``publish(name, count)`` adds fresh posts before the second poll; a
+    replayed run passes nothing, its cassette already holds them. Returns
+    per poll the posts stored, the subreddits reanalysed and the cursors.
+    """
+    rounds = []
+    with app.app_context():
+        ingestor = StreamIngestor(app)
+        store = reddit_clients.post_store
+        service = RecordingService()
+        for name in names:
+            PostIngestor(reddit_clients.data, store).sync(name)
+        key = '+'.join(names)
+        ingestor._streams = {key: reddit_clients.reddit.subreddit(key).stream.submissions(pause_after=0)}
+        for step in range(3):
+            if step == 1 and publish:
+                publish(names[0], 3)
+            service.reanalyzed = []
+            stored = ingestor.poll(service)
+            rounds.append((stored, sorted(service.reanalyzed),
+                           {name: store.get_cursor(name).newest for name in names}))
+    reddit_clients.close()
+    return rounds
+
+
+def test_stream_poll_marks_only_subreddits_with_posts(tmp_path):
+    names = ['alpha', 'beta']
+    cassette = str(tmp_path / 'stream.jsonl')
+    with FakeRedditServer() as server:
+        app = make_app(TESTING=True, REDDIT_TRANSPORT='record', REDDIT_CASSETTE_PATH=cassette,
+                       REDDIT_CLIENT_ID='test', REDDIT_CLIENT_SECRET='test',
+                       REDDIT_OAUTH_URL=server.url, REDDIT_URL=server.url)
+        recorded = stream_rounds(app, names, publish=server.publish)
+
+    backlog, fresh, idle = recorded
+    # The first poll drains the stream's initial listing of both subreddits
+    assert backlog[0] == 100 and backlog[1] == names
+    # Then only the subreddit that got posts is stored, advanced and reanalysed
+    assert fresh[0] == 3 and fresh[1] == names[:1]
+    assert fresh[2][names[0]] != backlog[2][names[0]]
+    assert fresh[2][names[1]] == backlog[2][names[1]]
+    assert idle == (0, [], fresh[2])
+
+    app = make_app(TESTING=True, REDDIT_TRANSPORT='replay', REDDIT_CASSETTE_PATH=cassette)
+    replayed = stream_rounds(app, names)
+    assert [r[:2] for r in replayed] == [r[:2] for r in recorded]
+    assert replayed[1][2][names[0]] == fresh[2][names[0]]